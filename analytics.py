@@ -0,0 +1,432 @@
+# analytics.py - Analytics Snapshots for StudentConnect
+"""
+Columnar snapshots of the StudentConnect tables for offline reporting
+A snapshot job copies Applications, Jobs, Students and StudentReferences
+into one binary file per column: numbers and timestamps as packed arrays,
+low-cardinality text (status, company, university, ...) dictionary-encoded
+as small integer codes. Reports then run group-by / count / avg over the
+arrays and never touch the production database.
+
+    python analytics.py snapshot          # export the tables
+    python analytics.py report            # standard reports from the latest snapshot
+    python analytics.py query applications --group-by status
+    python analytics.py query references --group-by company --value rating --agg avg
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from config import ANALYTICS_DIR
+
+FETCH_SIZE = 5000
+SNAPSHOTS_KEPT = 3
+
+# Null markers for integer and timestamp columns (floats use NaN, codes use -1)
+NULL_INT = -(2 ** 63)
+
+# Column kind -> array typecode
+TYPECODES = {'int': 'q', 'float': 'd', 'datetime': 'q', 'dict': 'i'}
+
+# table name -> (source table, [(column, kind)])
+SNAPSHOT_TABLES = {
+    'applications': ('Applications', [
+        ('application_id', 'int'), ('job_id', 'int'), ('student_id', 'int'), ('company', 'dict'),
+        ('status', 'dict'), ('applied_date', 'datetime')
+    ]),
+    'jobs': ('Jobs', [
+        ('job_id', 'int'), ('employer_id', 'int'), ('company', 'dict'), ('job_type', 'dict'),
+        ('location', 'dict'), ('created_at', 'datetime')
+    ]),
+    'students': ('Students', [
+        ('student_id', 'int'), ('university', 'dict'), ('major', 'dict'), ('gpa', 'float'),
+        ('created_at', 'datetime')
+    ]),
+    'references': ('StudentReferences', [
+        ('reference_id', 'int'), ('student_id', 'int'), ('relationship', 'dict'), ('company', 'dict'),
+        ('status', 'dict'), ('rating', 'int'), ('request_date', 'datetime'), ('response_date', 'datetime')
+    ]),
+}
+
+AGGREGATES = ('count', 'sum', 'avg', 'min', 'max')
+
+
+# ==================== SNAPSHOT WRITER ====================
+
+class _ColumnBuilder:
+    """Accumulates one column as a packed array (plus a dictionary for 'dict' columns)"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.values = array(TYPECODES[kind])
+        self.dictionary = []
+        self._codes = {}
+
+    def extend(self, values):
+        if self.kind == 'dict':
+            codes = self._codes
+            for value in values:
+                if value is None:
+                    self.values.append(-1)
+                    continue
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(self.dictionary)
+                    self.dictionary.append(value)
+                self.values.append(code)
+        elif self.kind == 'float':
+            self.values.extend(math.nan if v is None else float(v) for v in values)
+        elif self.kind == 'datetime':
+            self.values.extend(NULL_INT if v is None else int(_as_datetime(v).timestamp()) for v in values)
+        else:
+            self.values.extend(NULL_INT if v is None else int(v) for v in values)
+
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def write_snapshot(conn, directory=ANALYTICS_DIR, fetch_size=FETCH_SIZE, keep=SNAPSHOTS_KEPT):
+    """Export every SNAPSHOT_TABLES table into a new snapshot directory; returns its manifest
+
+    The snapshot is written to a temporary directory and published by
+    rewriting the CURRENT pointer, so readers never see a partial snapshot.
+    """
+    started = time.perf_counter()
+    taken_at = datetime.now()
+    name = f"snapshot-{taken_at.strftime('%Y%m%d-%H%M%S-%f')}"
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, name + '.tmp')
+    os.makedirs(staging)
+
+    manifest = {'name': name, 'taken_at': taken_at.isoformat(), 'tables': {}}
+    try:
+        cursor = conn.cursor()
+        for table, (source, columns) in SNAPSHOT_TABLES.items():
+            builders = [_ColumnBuilder(kind) for _, kind in columns]
+            cursor.execute(f"SELECT {', '.join(c for c, _ in columns)} FROM {source}")
+            rows = 0
+            while True:
+                batch = cursor.fetchmany(fetch_size)
+                if not batch:
+                    break
+                rows += len(batch)
+                for builder, values in zip(builders, zip(*batch)):
+                    builder.extend(values)
+
+            table_info = {'rows': rows, 'columns': {}}
+            for (column, kind), builder in zip(columns, builders):
+                filename = f'{table}.{column}.bin'
+                with open(os.path.join(staging, filename), 'wb') as f:
+                    builder.values.tofile(f)
+                info = {'kind': kind, 'file': filename, 'typecode': TYPECODES[kind]}
+                if kind == 'dict':
+                    info['dictionary'] = builder.dictionary
+                table_info['columns'][column] = info
+            manifest['tables'][table] = table_info
+
+        manifest['byteorder'] = sys.byteorder
+        manifest['export_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    os.rename(staging, os.path.join(directory, name))
+    pointer = os.path.join(directory, 'CURRENT.tmp')
+    with open(pointer, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(directory, 'CURRENT'))
+    _prune(directory, keep)
+    return manifest
+
+
+def _prune(directory, keep):
+    """Remove all but the newest keep snapshots"""
+    snapshots = sorted(entry for entry in os.listdir(directory)
+                       if entry.startswith('snapshot-') and not entry.endswith('.tmp'))
+    for old in snapshots[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+# ==================== SNAPSHOT READER ====================
+
+class SnapshotTable:
+    """One table of a snapshot; columns are read from disk on first use"""
+
+    def __init__(self, path, name, info, byteorder):
+        self.path = path
+        self.name = name
+        self.rows = info['rows']
+        self.columns = info['columns']
+        self._swap = byteorder != sys.byteorder
+        self._arrays = {}
+
+    def array(self, column):
+        """Raw packed values of a column (dictionary codes for 'dict' columns)"""
+        values = self._arrays.get(column)
+        if values is None:
+            info = self._column_info(column)
+            values = array(info['typecode'])
+            with open(os.path.join(self.path, info['file']), 'rb') as f:
+                values.fromfile(f, self.rows)
+            if self._swap:
+                values.byteswap()
+            self._arrays[column] = values
+        return values
+
+    def _column_info(self, column):
+        if column not in self.columns:
+            raise KeyError(f"Table '{self.name}' has no column '{column}'. "
+                           f"Choose one of: {', '.join(self.columns)}")
+        return self.columns[column]
+
+    def decode(self, column, value):
+        """Turn a stored value back into what the database held"""
+        kind = self._column_info(column)['kind']
+        if kind == 'dict':
+            return None if value < 0 else self.columns[column]['dictionary'][value]
+        if kind == 'float':
+            return None if math.isnan(value) else value
+        if value == NULL_INT:
+            return None
+        return datetime.fromtimestamp(value) if kind == 'datetime' else value
+
+    def mask(self, where):
+        """Row selector for {column: value} equality filters, or None for every row"""
+        if not where:
+            return None
+        selected = None
+        for column, wanted in where.items():
+            info = self._column_info(column)
+            values = self.array(column)
+            if info['kind'] == 'dict':
+                try:
+                    target = info['dictionary'].index(wanted)
+                except ValueError:
+                    return bytes(self.rows)  # the value never occurs
+            elif info['kind'] == 'datetime':
+                target = int(_as_datetime(wanted).timestamp())
+            else:
+                target = type(values[0])(wanted) if self.rows else wanted
+            matches = bytes(v == target for v in values)
+            selected = matches if selected is None else bytes(a & b for a, b in zip(selected, matches))
+        return selected
+
+    def count_by(self, column, where=None):
+        """{value: row count} for a column"""
+        return self.aggregate(column, where=where)
+
+    def aggregate(self, group_by, value=None, agg='count', where=None):
+        """Group rows by one column and count them or aggregate another column over each group
+
+        Nulls in the value column are ignored, as in SQL.
+        """
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{agg}'. Choose one of: {', '.join(AGGREGATES)}")
+        if agg != 'count' and value is None:
+            raise ValueError(f"'{agg}' needs a value column")
+        if agg != 'count':
+            # Text is stored as dictionary codes, which have no meaningful sum or order
+            kind = self._column_info(value)['kind']
+            if kind == 'dict' or (kind == 'datetime' and agg not in ('min', 'max')):
+                raise ValueError(f"'{agg}' cannot be applied to {'text' if kind == 'dict' else 'date'} "
+                                 f"column '{value}'")
+
+        selected = self.mask(where)
+        keys = self.array(group_by)
+        if selected is not None:
+            keys = [k for k, keep in zip(keys, selected) if keep]
+
+        if agg == 'count' and value is None:
+            # Counter tallies the packed codes in C
+            groups = Counter(keys)
+        else:
+            values = self.array(value)
+            if selected is not None:
+                values = [v for v, keep in zip(values, selected) if keep]
+            kind = self._column_info(value)['kind']
+            if kind == 'float':
+                null = lambda v: v != v
+            elif kind == 'dict':
+                null = lambda v: v < 0
+            else:
+                null = lambda v: v == NULL_INT
+            groups = {}
+            for key, v in zip(keys, values):
+                if null(v):
+                    continue
+                state = groups.get(key)
+                if state is None:
+                    groups[key] = [1, v, v, v]
+                else:
+                    state[0] += 1
+                    state[1] += v
+                    if v < state[2]:
+                        state[2] = v
+                    if v > state[3]:
+                        state[3] = v
+            index = {'count': 0, 'sum': 1, 'min': 2, 'max': 3}
+            groups = {
+                key: (state[1] / state[0] if agg == 'avg' else state[index[agg]])
+                for key, state in groups.items()
+            }
+            if agg in ('min', 'max') and self._column_info(value)['kind'] == 'datetime':
+                groups = {key: datetime.fromtimestamp(v) for key, v in groups.items()}
+
+        return {self.decode(group_by, key): result for key, result in groups.items()}
+
+
+class Snapshot:
+    """A published snapshot: its manifest plus lazily loaded tables"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.taken_at = datetime.fromisoformat(self.manifest['taken_at'])
+        self._tables = {}
+
+    def table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            if name not in self.manifest['tables']:
+                raise KeyError(f"Unknown snapshot table '{name}'. Choose one of: {', '.join(self.manifest['tables'])}")
+            table = self._tables[name] = SnapshotTable(self.path, name, self.manifest['tables'][name],
+                                                       self.manifest.get('byteorder', sys.byteorder))
+        return table
+
+    def info(self):
+        return {
+            'name': self.manifest['name'],
+            'taken_at': self.manifest['taken_at'],
+            'export_ms': self.manifest['export_ms'],
+            'tables': {name: {'rows': t['rows'], 'columns': list(t['columns'])}
+                       for name, t in self.manifest['tables'].items()}
+        }
+
+
+def _current_name(directory):
+    try:
+        with open(os.path.join(directory, 'CURRENT'), encoding='utf-8') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(directory=ANALYTICS_DIR):
+    """Open the latest published snapshot, or None if no snapshot has been taken"""
+    name = _current_name(directory)
+    return Snapshot(os.path.join(directory, name)) if name else None
+
+
+class SnapshotStore:
+    """Keeps the latest snapshot open (with its loaded columns) until a newer one is published"""
+
+    def __init__(self, directory=ANALYTICS_DIR):
+        self.directory = directory
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def latest(self):
+        name = _current_name(self.directory)
+        with self._lock:
+            if name is None:
+                self._snapshot = None
+            elif self._snapshot is None or self._snapshot.manifest['name'] != name:
+                self._snapshot = Snapshot(os.path.join(self.directory, name))
+            return self._snapshot
+
+    def take(self, conn):
+        """Write a new snapshot and switch to it"""
+        manifest = write_snapshot(conn, self.directory)
+        self.latest()
+        return manifest
+
+
+# ==================== REPORTS ====================
+
+def standard_report(snapshot):
+    """The main_app report figures, computed from a snapshot"""
+    applications = snapshot.table('applications')
+    references = snapshot.table('references')
+    students = snapshot.table('students')
+    return {
+        'taken_at': snapshot.manifest['taken_at'],
+        'totals': {name: snapshot.table(name).rows for name in SNAPSHOT_TABLES},
+        'application_status': applications.count_by('status'),
+        'applications_per_company': applications.count_by('company'),
+        'reference_status': references.count_by('status'),
+        'avg_rating_by_relationship': references.aggregate('relationship', 'rating', 'avg'),
+        'students_per_university': students.count_by('university'),
+        'avg_gpa_by_university': students.aggregate('university', 'gpa', 'avg'),
+    }
+
+
+def _print_groups(title, groups, limit=20):
+    print(f"\n{title}")
+    print("-" * 50)
+    ranked = sorted(groups.items(), key=lambda item: item[1], reverse=True)
+    for key, value in ranked[:limit]:
+        value = f"{value:.2f}" if isinstance(value, float) else value
+        print(f"{str(key):<38} {value:>10}")
+    if len(ranked) > limit:
+        print(f"... {len(ranked) - limit} more")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Columnar analytics snapshots for StudentConnect')
+    parser.add_argument('--dir', default=ANALYTICS_DIR, help='snapshot directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('snapshot', help='export the tables into a new snapshot')
+    commands.add_parser('report', help='print the standard reports from the latest snapshot')
+    query = commands.add_parser('query', help='group-by query over the latest snapshot')
+    query.add_argument('table', choices=list(SNAPSHOT_TABLES))
+    query.add_argument('--group-by', required=True)
+    query.add_argument('--value')
+    query.add_argument('--agg', choices=AGGREGATES, default='count')
+    query.add_argument('--where', action='append', default=[], metavar='COLUMN=VALUE')
+    args = parser.parse_args(argv)
+
+    if args.command == 'snapshot':
+        from storage import get_storage_backend
+        conn = get_storage_backend().connect()
+        try:
+            manifest = write_snapshot(conn, args.dir)
+        finally:
+            conn.close()
+        rows = ', '.join(f"{name} {t['rows']}" for name, t in manifest['tables'].items())
+        print(f"Snapshot {manifest['name']} written in {manifest['export_ms']:.0f} ms ({rows})")
+        return 0
+
+    snapshot = load_snapshot(args.dir)
+    if snapshot is None:
+        print("No snapshot yet - run: python analytics.py snapshot")
+        return 1
+
+    started = time.perf_counter()
+    if args.command == 'report':
+        report = standard_report(snapshot)
+        print(f"Snapshot taken {report['taken_at']}")
+        print(', '.join(f"{name}: {count}" for name, count in report['totals'].items()))
+        for section in list(report)[2:]:
+            _print_groups(section.replace('_', ' ').title(), report[section])
+    else:
+        where = dict(item.split('=', 1) for item in args.where)
+        groups = snapshot.table(args.table).aggregate(args.group_by, args.value, args.agg, where)
+        _print_groups(f"{args.agg}({args.value or '*'}) by {args.group_by}", groups)
+    print(f"\nComputed in {(time.perf_counter() - started) * 1000:.1f} ms from snapshot {snapshot.manifest['name']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,35 +1,230 @@
 # app_backend.py - Flask Backend for StudentConnect
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
-import pyodbc
+from werkzeug.datastructures import MultiDict
+import atexit
 import hashlib
-from datetime import datetime
+import io
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from cache import create_cache_backend
+from db_pool import ConnectionPool
+from storage import derived_data_file, get_storage_backend
+from pagination import DEFAULT_PAGE_SIZE, parse_page_size, encode_cursor, decode_cursor, like_pattern
+from skill_index import SkillIndex
+from search_index import JobSearchIndex
+from autocomplete import Autocomplete, FIELDS as AUTOCOMPLETE_FIELDS
+from bulk_import import BulkImporter, IMPORT_SPECS, detect_format, read_records
+from passwords import PasswordHasher, PasswordHasherBusy, hash_password
+from auth import Authenticator, LoginThrottled
+from notifications import NotificationDispatcher, UnreadCounts, fetch_notifications, mark_read
+from references import ReferenceLifecycle, ReferenceUnavailable
+import reference_stats
+from analytics import AGGREGATES, SnapshotStore
+from trends import TrendReports, default_cache_file
+import serializers
+import config
+from export import EXPORTS, ENCODERS, FORMATS as EXPORT_FORMATS, export_watermark, iter_batches
 
 app = Flask(__name__, static_folder='.')
+app.json = serializers.FastJSONProvider(app)
 app.secret_key = 'studentconnect-secret-key-2025'
 CORS(app)
 
-# Database Configuration
-DB_CONFIG = {
-    'driver': '{ODBC Driver 17 for SQL Server}',
-    'server': 'localhost',
-    'database': 'StudentConnectDB',
-    'trusted_connection': 'yes'
+# Connection Pool Configuration
+POOL_CONFIG = {
+    'max_size': 10,
+    'checkout_timeout': 5.0,
+    'max_idle': 300.0,
+    'health_check_interval': 30.0
 }
 
-def get_db_connection():
-    """Create and return database connection"""
-    conn_str = (
-        f"DRIVER={DB_CONFIG['driver']};"
-        f"SERVER={DB_CONFIG['server']};"
-        f"DATABASE={DB_CONFIG['database']};"
-        f"Trusted_Connection={DB_CONFIG['trusted_connection']};"
-    )
-    return pyodbc.connect(conn_str)
+# Response cache for the hot read endpoints (entries are also invalidated by writes)
+CACHE_CONFIG = {
+    'max_entries': 2048,
+    'default_ttl': 60.0
+}
+
+# Collection version stamps (ETag / Last-Modified) are re-read from the database after this many
+# seconds; writes made through this process refresh them immediately
+VERSION_TTL = 5.0
+
+# Login throttling: failed attempts per email / per IP in sliding windows (seconds), and how long
+# unknown emails are remembered
+AUTH_CONFIG = {
+    'email_max_failures': 5,
+    'email_window': 900.0,
+    'ip_max_failures': 50,
+    'ip_window': 300.0,
+    'unknown_email_ttl': 60.0,
+    'unknown_email_max': 10000
+}
+
+# Only the process handling a registration can forget that email, so unknown emails are not cached
+# when serve.py runs several workers
+if config.SERVER_PROCESSES > 1:
+    AUTH_CONFIG['unknown_email_ttl'] = 0
+
+# Notifications are written in the background in batches of up to batch_size, at most
+# flush_interval seconds after they are queued
+NOTIFICATION_CONFIG = {
+    'batch_size': 100,
+    'flush_interval': 0.5,
+    'max_queue': 10000
+}
+
+# Unread notification counts are counted once per user, then kept up to date in memory; entries
+# are recounted after ttl seconds to pick up changes made by other processes
+UNREAD_COUNT_CONFIG = {
+    'max_entries': 10000,
+    'ttl': 300.0
+}
+
+NOTIFICATION_RECIPIENTS = ('student', 'employer')
+
+# Largest ID list accepted by a single bulk mark-read request
+MAX_MARK_READ_IDS = 10000
+
+# Referee tokens are cached for cache_ttl seconds; overdue reference requests are expired every
+# sweep_interval seconds, sweep_batch rows per UPDATE
+REFERENCE_CONFIG = {
+    'cache_max': 10000,
+    'cache_ttl': 300.0,
+    'sweep_interval': 300.0,
+    'sweep_batch': 500
+}
+
+# HTTP status for referee tokens that cannot be answered
+REFERENCE_UNAVAILABLE_STATUS = {'not_found': 404, 'expired': 410, 'completed': 409}
+
+# Admin dashboard summary is cached for this many seconds
+SUMMARY_CACHE_TTL = 30
+
+# The in-memory job indexes pick up jobs posted through other server processes (serve.py workers)
+# after at most this many seconds
+INDEX_REFRESH_INTERVAL = 10.0
+
+# Autocomplete values are reloaded after this many seconds, for the same reason
+AUTOCOMPLETE_REFRESH_INTERVAL = 60.0
+
+# Storage backend (SQL Server or SQLite) is selected in config.py
+storage = get_storage_backend()
+db_pool = ConnectionPool(storage.connect, **POOL_CONFIG)
+
+response_cache = create_cache_backend(**CACHE_CONFIG)
+
+unread_counts = UnreadCounts(db_pool, **UNREAD_COUNT_CONFIG)
+notification_dispatcher = NotificationDispatcher(db_pool, on_writing=unread_counts.begin_write,
+                                                 on_written=unread_counts.record_inserted,
+                                                 **NOTIFICATION_CONFIG)
+atexit.register(notification_dispatcher.shutdown)
+
+# Skill -> job inverted index for recommendations (built on first use)
+skill_index = SkillIndex(refresh_interval=INDEX_REFRESH_INTERVAL)
+
+# Full-text job search index, loaded from its snapshot in the background and saved on exit
+job_search = JobSearchIndex(derived_data_file(storage, 'job_search', 'marshal'),
+                            refresh_interval=INDEX_REFRESH_INTERVAL)
+job_search.warm(db_pool)
+atexit.register(job_search.save_if_changed)
+
+# Type-ahead values for the registration and job forms, loaded once and updated on insert
+autocomplete = Autocomplete(refresh_interval=AUTOCOMPLETE_REFRESH_INTERVAL)
+try:
+    autocomplete.load(db_pool)
+except Exception as e:
+    print(f"Could not load autocomplete values: {e}")
 
-def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+# Slow password hashing runs on a bounded pool instead of the request threads
+password_hasher = PasswordHasher()
+authenticator = Authenticator(db_pool, password_hasher, **AUTH_CONFIG)
+
+bulk_importer = BulkImporter(db_pool, hash_password, storage.integrity_errors)
+
+# Columnar analytics snapshots, queried without touching the database
+analytics_store = SnapshotStore()
+
+# Trend reports keep closed day/week buckets and only re-read the open ones
+trend_reports = TrendReports(default_cache_file(storage))
+
+def references_expired(rows):
+    """Reference sweeper callback: refresh cached reference lists and tell the students"""
+    response_cache.invalidate_tags(*{f'references:student:{student_id}' for _, student_id, _ in rows})
+    for _, student_id, referee_name in rows:
+        notification_dispatcher.enqueue(student_id, 'student',
+                                        f"Reference request to {referee_name} expired", 'reference')
+
+try:
+    with db_pool.connection() as conn:
+        reference_stats.ensure_built(conn)
+except Exception as e:
+    print(f"Could not build reference stats: {e}")
+
+reference_lifecycle = ReferenceLifecycle(db_pool, on_expired=references_expired, **REFERENCE_CONFIG)
+reference_lifecycle.start()
+atexit.register(reference_lifecycle.stop)
+
+def version_stamp(row):
+    """(stamp, last_modified) from a version query row
+
+    The query returns COUNT(*), MAX(id) and then the collection's timestamp
+    columns; any numeric columns after those (such as a count per status) only
+    feed the stamp.
+    """
+    stamps = [datetime.fromisoformat(value) if isinstance(value, str) else value
+              for value in row[2:] if isinstance(value, (str, datetime))]
+    extra = [str(value) for value in row[2:] if isinstance(value, (int, float))]
+    last_modified = max(stamps) if stamps else None
+    stamp = '-'.join([f"{row[0]}-{row[1]}-{last_modified.isoformat() if last_modified else ''}"] + extra)
+    return stamp, last_modified
+
+def version_etag(key, stamp):
+    """ETag of the payload cached under key at a version stamp"""
+    return hashlib.sha1(f'{key}|{stamp}'.encode()).hexdigest()[:24]
+
+def collection_version(key, sql, params=(), tags=()):
+    """Cheap version stamp for a collection from one aggregate query (see version_stamp)"""
+    def load():
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return version_stamp(cursor.fetchone())
+    
+    version, _ = response_cache.get_or_load(f'version:{key}', load, ttl=VERSION_TTL, tags=tags)
+    return version
+
+def cached_json(key, loader, tags=(), version=None):
+    """Serve a JSON payload from response_cache, building it with loader() on a miss
+
+    With a version from collection_version() the response carries ETag and
+    Last-Modified, and a matching conditional request gets 304 Not Modified
+    without loading or serializing anything.
+    """
+    headers = {'Cache-Control': 'no-cache'}
+    if version:
+        stamp, last_modified = version
+        etag = version_etag(key, stamp)
+        headers['ETag'] = f'"{etag}"'
+        if last_modified:
+            # Database timestamps are local time
+            last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+            headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = bool(last_modified and request.if_modified_since
+                                and last_modified <= request.if_modified_since)
+        if not_modified:
+            return Response(status=304, headers=headers)
+        # Cached bodies are per version, so a body never outlives the stamp it was served with
+        key = f'{key}@{stamp}'
+    
+    body, hit = response_cache.get_or_load(key, lambda: app.json.dumps(loader()), tags=tags)
+    response = Response(body, mimetype='application/json', headers=headers)
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
 
 # ==================== SERVE HTML FILES ====================
 
@@ -50,56 +245,268 @@ def student():
 
 # ==================== ADMIN ENDPOINTS ====================
 
+# /api/admin/users lists students, then employers, each in ID order
+USER_TYPES = {
+    'student': {
+        'table': 'Students',
+        'id': 'student_id',
+        'search': ('full_name', 'email'),
+        'columns': "student_id, full_name, email, phone, university, major, gpa, created_at, 'student' as type",
+        'serializer': serializers.STUDENT_USER
+    },
+    'employer': {
+        'table': 'Employers',
+        'id': 'employer_id',
+        'search': ('company_name', 'email'),
+        'columns': "employer_id, company_name, email, phone, industry, company_size, created_at, 'employer' as type",
+        'serializer': serializers.EMPLOYER_USER
+    }
+}
+
+def parse_user_list_args(args):
+    """(type, search, cursor, page_size, count_only) from /api/admin/users query parameters"""
+    user_type = args.get('type') or None
+    if user_type is not None and user_type not in USER_TYPES:
+        raise ValueError(f"type must be one of: {', '.join(USER_TYPES)}")
+    cursor = None
+    if args.get('cursor'):
+        cursor = decode_cursor(args['cursor'], (str, int))
+        if cursor[0] not in USER_TYPES:
+            raise ValueError("Invalid cursor")
+    return (user_type, (args.get('search') or '').strip(), cursor, parse_page_size(args.get('page_size')),
+            args.get('count_only') == '1')
+
+def _user_conditions(spec, search):
+    """(conditions, params) matching search against a user type's name and email"""
+    if not search:
+        return [], []
+    clause = ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in spec['search'])
+    return [f'({clause})'], [like_pattern(search)] * len(spec['search'])
+
+def user_page_queries(user_type, search, cursor, page_size):
+    """[(type, sql, params)]: one keyset query per type that can still appear after the cursor
+
+    Each reads at most page_size + 1 rows, and they are independent (async_api.py runs them
+    concurrently); user_page() merges the results.
+    """
+    types = list(USER_TYPES)
+    queries = []
+    for kind, spec in USER_TYPES.items():
+        if user_type and kind != user_type:
+            continue
+        if cursor and types.index(kind) < types.index(cursor[0]):
+            continue  # every user of this type was on earlier pages
+        conditions, params = _user_conditions(spec, search)
+        if cursor and kind == cursor[0]:
+            conditions.append(f"{spec['id']} > ?")
+            params.append(cursor[1])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        queries.append((kind, f'''
+            SELECT TOP {page_size + 1} {spec['columns']}
+            FROM {spec['table']}
+            {where}
+            ORDER BY {spec['id']}
+        ''', params))
+    return queries
+
+def user_page(results, page_size):
+    """Response payload from [(type, rows)] in type order"""
+    rows = [(kind, row) for kind, type_rows in results for row in type_rows][:page_size + 1]
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    users = [USER_TYPES[kind]['serializer'].one(row) for kind, row in rows]
+    return {
+        'success': True,
+        'users': users,
+        'page_size': page_size,
+        'next_cursor': encode_cursor(rows[-1][0], int(rows[-1][1][0])) if has_more else None
+    }
+
+def user_count_query(user_type, search):
+    """(sql, params) counting the matching users of each type in one UNION ALL"""
+    branches, params = [], []
+    for kind, spec in USER_TYPES.items():
+        if user_type and kind != user_type:
+            continue
+        conditions, branch_params = _user_conditions(spec, search)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        branches.append(f"SELECT '{kind}' AS type, COUNT(*) FROM {spec['table']} {where}")
+        params.extend(branch_params)
+    return ' UNION ALL '.join(branches), params
+
+def user_counts(rows):
+    counts = {kind: int(total) for kind, total in rows}
+    return {'success': True, 'counts': counts, 'total': sum(counts.values())}
+
 @app.route('/api/admin/users', methods=['GET'])
 def get_all_users():
-    """Get all users (admin only)"""
+    """Get one page of users (admin only): students first, then employers
+
+    Query parameters: type (student or employer), search (name or email), page_size, cursor,
+    count_only=1 (only the number of matching users of each type)
+    """
     try:
-        conn = get_db_connection()
+        user_type, search, cursor_key, page_size, count_only = parse_user_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            if count_only:
+                cursor.execute(*user_count_query(user_type, search))
+                return jsonify(user_counts(cursor.fetchall())), 200
+            
+            results = []
+            for kind, sql, params in user_page_queries(user_type, search, cursor_key, page_size):
+                cursor.execute(sql, params)
+                results.append((kind, cursor.fetchall()))
+                if sum(len(rows) for _, rows in results) > page_size:
+                    break  # the page is full; later types are not needed
+            
+            return jsonify(user_page(results, page_size)), 200
+        
+    except Exception as e:
+        print(f"Error getting users: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/pool', methods=['GET'])
+def get_pool_stats():
+    """Get database connection pool metrics (admin only)"""
+    return jsonify({'success': True, 'pool': db_pool.stats()}), 200
+
+@app.route('/api/admin/cache', methods=['GET'])
+def get_cache_stats():
+    """Get response cache hit/miss/eviction counters (admin only)"""
+    return jsonify({'success': True, 'cache': response_cache.stats()}), 200
+
+@app.route('/api/admin/search-index', methods=['GET'])
+def get_search_index_stats():
+    """Get job search index size and snapshot load time (admin only)"""
+    return jsonify({'success': True, 'search_index': job_search.stats()}), 200
+
+@app.route('/api/admin/password-hasher', methods=['GET'])
+def get_password_hasher_stats():
+    """Get password hashing pool queue depth and latency (admin only)"""
+    return jsonify({'success': True, 'hasher': password_hasher.stats()}), 200
+
+@app.route('/api/admin/auth', methods=['GET'])
+def get_auth_stats():
+    """Get login throttling and unknown-email cache counters (admin only)"""
+    return jsonify({'success': True, 'auth': authenticator.stats()}), 200
+
+@app.route('/api/admin/notifications/queue', methods=['GET'])
+def get_notification_queue_stats():
+    """Get notification dispatch queue depth and flush latency (admin only)"""
+    return jsonify({
+        'success': True,
+        'queue': notification_dispatcher.stats(),
+        'unread_counts': unread_counts.stats()
+    }), 200
+
+_summary_cache = {'payload': None, 'expires': 0.0}
+_summary_lock = threading.Lock()
+
+def build_admin_summary():
+    """Compute every dashboard aggregate in one grouped query"""
+    with db_pool.connection() as conn:
         cursor = conn.cursor()
         
-        # Get students
+        # Each branch yields (section, label, key_id, count) so one round trip covers all sections
         cursor.execute('''
-            SELECT student_id, full_name, email, phone, university, major, gpa, created_at, 'student' as type
-            FROM Students
+            SELECT 'users' AS section, 'student' AS label, CAST(NULL AS INT) AS key_id, COUNT(*) AS total FROM Students
+            UNION ALL SELECT 'users', 'employer', NULL, COUNT(*) FROM Employers
+            UNION ALL SELECT 'totals', 'jobs', NULL, COUNT(*) FROM Jobs
+            UNION ALL SELECT 'totals', 'applications', NULL, COUNT(*) FROM Applications
+            UNION ALL SELECT 'totals', 'references', NULL, COUNT(*) FROM StudentReferences
+            UNION ALL SELECT 'jobs_per_employer', NULL, employer_id, COUNT(*) FROM Jobs
+                      WHERE employer_id IS NOT NULL GROUP BY employer_id
+            UNION ALL SELECT 'applications_per_job', NULL, job_id, COUNT(*) FROM Applications GROUP BY job_id
+            UNION ALL SELECT 'application_status', status, NULL, COUNT(*) FROM Applications GROUP BY status
+            UNION ALL SELECT 'reference_status', status, NULL, COUNT(*) FROM StudentReferences GROUP BY status
         ''')
         
-        users = []
-        for row in cursor.fetchall():
-            users.append({
-                'id': int(row[0]),
-                'name': row[1],
-                'email': row[2],
-                'phone': row[3],
-                'university': row[4],
-                'major': row[5],
-                'gpa': float(row[6]) if row[6] else None,
-                'created_at': row[7].isoformat() if row[7] else None,
-                'type': row[8]
-            })
-        
-        # Get employers
+        summary = {
+            'users': {'student': 0, 'employer': 0},
+            'totals': {'jobs': 0, 'applications': 0, 'references': 0},
+            'jobs_per_employer': {},
+            'applications_per_job': {},
+            'application_status': {},
+            'reference_status': {}
+        }
+        for section, label, key_id, total in cursor.fetchall():
+            key = str(int(key_id)) if key_id is not None else label
+            summary[section][key] = int(total)
+        
         cursor.execute('''
-            SELECT employer_id, company_name, email, phone, industry, company_size, created_at, 'employer' as type
-            FROM Employers
+            SELECT TOP 10 application_id, job_title, company, applied_date, status
+            FROM Applications
+            ORDER BY applied_date DESC
         ''')
+        summary['recent_applications'] = [{
+            'id': int(row[0]),
+            'job_title': row[1],
+            'company': row[2],
+            'applied_date': row[3].isoformat() if row[3] else None,
+            'status': row[4]
+        } for row in cursor.fetchall()]
+    
+    summary['generated_at'] = datetime.now().isoformat()
+    return summary
+
+@app.route('/api/admin/summary', methods=['GET'])
+def get_admin_summary():
+    """Get aggregated dashboard statistics (admin only), cached for SUMMARY_CACHE_TTL seconds"""
+    try:
+        refresh = request.args.get('refresh') == '1'
+        with _summary_lock:
+            if refresh or _summary_cache['payload'] is None or time.monotonic() >= _summary_cache['expires']:
+                _summary_cache['payload'] = build_admin_summary()
+                _summary_cache['expires'] = time.monotonic() + SUMMARY_CACHE_TTL
+            summary = _summary_cache['payload']
         
-        for row in cursor.fetchall():
-            users.append({
-                'id': int(row[0]),
-                'name': row[1],
-                'email': row[2],
-                'phone': row[3],
-                'industry': row[4],
-                'company_size': row[5],
-                'created_at': row[6].isoformat() if row[6] else None,
-                'type': row[7]
-            })
+        return jsonify({'success': True, 'summary': summary}), 200
         
-        conn.close()
-        return jsonify({'success': True, 'users': users}), 200
+    except Exception as e:
+        print(f"Error getting admin summary: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/import/<kind>', methods=['POST'])
+def bulk_import(kind):
+    """Bulk import students, employers or jobs from a CSV or JSONL upload (admin only)
+
+    Send the file as multipart field 'file' or as the raw request body;
+    the format comes from ?format=, the file name or the Content-Type.
+    """
+    if kind not in IMPORT_SPECS:
+        return jsonify({'success': False, 'message': f"Unknown import type '{kind}'"}), 404
+    
+    upload = request.files.get('file')
+    if upload:
+        raw, fmt = upload.stream, detect_format(upload.filename, upload.mimetype)
+    else:
+        raw, fmt = request.stream, detect_format(content_type=request.mimetype)
+    fmt = request.args.get('format') or fmt
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'success': False, 'message': 'Send a CSV or JSONL file (or pass ?format=csv|jsonl)'}), 400
+    
+    try:
+        stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        result = bulk_importer.import_records(kind, read_records(stream, fmt))
+        if kind in ('students', 'employers') and result['inserted']:
+            authenticator.account_created()
+        if kind in ('students', 'employers', 'jobs') and result['inserted']:
+            autocomplete.load(db_pool)
+        if kind == 'jobs' and result['inserted']:
+            skill_index.invalidate()
+            if job_search.loaded:
+                job_search.refresh(db_pool)
+            response_cache.invalidate_tags('jobs:head')
+        return jsonify({'success': True, **result}), 200
         
     except Exception as e:
-        print(f"Error getting users: {e}")
+        print(f"Error importing {kind}: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # ==================== AUTHENTICATION ====================
@@ -109,29 +516,36 @@ def register_student():
     """Register a new student"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        password_hash = hash_password(data['password'])
-        
-        cursor.execute('''
-            INSERT INTO Students (full_name, email, password_hash, phone, university, major, gpa)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (data['name'], data['email'], password_hash,
-              data.get('phone'), data.get('university'), data.get('major'), data.get('gpa')))
-        
-        conn.commit()
-        cursor.execute('SELECT @@IDENTITY')
-        user_id = int(cursor.fetchone()[0])
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Registration successful',
-            'user': {'id': user_id, 'name': data['name'], 'email': data['email'], 'type': 'student'}
-        }), 201
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            password_hash = password_hasher.hash(data['password'])
+            # Store the spelling already in use, so grouping by university or major works
+            university = autocomplete.canonical('university', data.get('university'))
+            major = autocomplete.canonical('major', data.get('major'))
+            
+            cursor.execute('''
+                INSERT INTO Students (full_name, email, password_hash, phone, university, major, gpa)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (data['name'], data['email'], password_hash,
+                  data.get('phone'), university, major, data.get('gpa')))
+            
+            conn.commit()
+            cursor.execute('SELECT @@IDENTITY')
+            user_id = int(cursor.fetchone()[0])
+            authenticator.account_created('student', data['email'])
+            autocomplete.add('university', university)
+            autocomplete.add('major', major)
+            
+            return jsonify({
+                'success': True,
+                'message': 'Registration successful',
+                'user': {'id': user_id, 'name': data['name'], 'email': data['email'], 'type': 'student'}
+            }), 201
         
-    except pyodbc.IntegrityError:
+    except PasswordHasherBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '1'}
+    except storage.integrity_errors:
         return jsonify({'success': False, 'message': 'Email already exists'}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -141,29 +555,33 @@ def register_employer():
     """Register a new employer"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        password_hash = hash_password(data['password'])
-        
-        cursor.execute('''
-            INSERT INTO Employers (company_name, contact_person, email, password_hash, phone, industry, company_size)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (data['company'], data.get('contact_person', ''), data['email'], password_hash, 
-              data.get('phone'), data.get('industry'), data.get('company_size')))
-        
-        conn.commit()
-        cursor.execute('SELECT @@IDENTITY')
-        user_id = int(cursor.fetchone()[0])
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Registration successful',
-            'user': {'id': user_id, 'name': data['company'], 'email': data['email'], 'type': 'employer'}
-        }), 201
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            password_hash = password_hasher.hash(data['password'])
+            company = autocomplete.canonical('company', data['company'])
+            
+            cursor.execute('''
+                INSERT INTO Employers (company_name, contact_person, email, password_hash, phone, industry, company_size)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (company, data.get('contact_person', ''), data['email'], password_hash, 
+                  data.get('phone'), data.get('industry'), data.get('company_size')))
+            
+            conn.commit()
+            cursor.execute('SELECT @@IDENTITY')
+            user_id = int(cursor.fetchone()[0])
+            authenticator.account_created('employer', data['email'])
+            autocomplete.add('company', company)
+            
+            return jsonify({
+                'success': True,
+                'message': 'Registration successful',
+                'user': {'id': user_id, 'name': company, 'email': data['email'], 'type': 'employer'}
+            }), 201
         
-    except pyodbc.IntegrityError:
+    except PasswordHasherBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '1'}
+    except storage.integrity_errors:
         return jsonify({'success': False, 'message': 'Email already exists'}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -173,39 +591,31 @@ def login_student():
     """Student login"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        password_hash = hash_password(data['password'])
-        
-        cursor.execute('''
-            SELECT student_id, full_name, email, phone, university, major, gpa, skills, created_at
-            FROM Students
-            WHERE email = ? AND password_hash = ?
-        ''', (data['email'], password_hash))
-        
-        result = cursor.fetchone()
-        conn.close()
+        student = authenticator.authenticate('student', data['email'], data['password'], request.remote_addr)
         
-        if result:
+        if student:
             return jsonify({
                 'success': True,
                 'user': {
-                    'id': int(result[0]),
-                    'name': result[1],
-                    'email': result[2],
-                    'phone': result[3],
-                    'university': result[4],
-                    'major': result[5],
-                    'gpa': float(result[6]) if result[6] else None,
-                    'skills': result[7],
+                    'id': int(student['student_id']),
+                    'name': student['full_name'],
+                    'email': student['email'],
+                    'phone': student['phone'],
+                    'university': student['university'],
+                    'major': student['major'],
+                    'gpa': float(student['gpa']) if student['gpa'] else None,
+                    'skills': student['skills'],
                     'type': 'student',
-                    'created_at': result[8].isoformat() if result[8] else None
+                    'created_at': student['created_at'].isoformat() if student['created_at'] else None
                 }
             }), 200
         else:
             return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
-            
+        
+    except LoginThrottled as e:
+        return jsonify({'success': False, 'message': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except PasswordHasherBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         print(f"Login error: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -215,77 +625,199 @@ def login_employer():
     """Employer login"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        password_hash = hash_password(data['password'])
-        
-        cursor.execute('''
-            SELECT employer_id, company_name, email, phone, contact_person, created_at
-            FROM Employers
-            WHERE email = ? AND password_hash = ?
-        ''', (data['email'], password_hash))
+        employer = authenticator.authenticate('employer', data['email'], data['password'], request.remote_addr)
         
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
+        if employer:
             return jsonify({
                 'success': True,
                 'user': {
-                    'id': int(result[0]),
-                    'name': result[1],
-                    'email': result[2],
-                    'phone': result[3],
-                    'contact_person': result[4],
+                    'id': int(employer['employer_id']),
+                    'name': employer['company_name'],
+                    'email': employer['email'],
+                    'phone': employer['phone'],
+                    'contact_person': employer['contact_person'],
                     'type': 'employer',
-                    'created_at': result[5].isoformat() if result[5] else None
+                    'created_at': employer['created_at'].isoformat() if employer['created_at'] else None
                 }
             }), 200
         else:
             return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
-            
+        
+    except LoginThrottled as e:
+        return jsonify({'success': False, 'message': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except PasswordHasherBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         print(f"Login error: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# ==================== AUTOCOMPLETE ====================
+
+@app.route('/api/autocomplete/<field>', methods=['GET'])
+def get_autocomplete(field):
+    """Suggest values already in use for a form field, most common first
+
+    field: university, major, company or location
+    Query parameters: q (what has been typed so far), limit
+    """
+    if field not in AUTOCOMPLETE_FIELDS:
+        return jsonify({'success': False, 'message': f"Unknown autocomplete field '{field}'"}), 404
+    try:
+        limit = parse_page_size(request.args.get('limit'), default=10)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        autocomplete.ensure_fresh(db_pool)
+        suggestions = autocomplete.suggest(field, request.args.get('q', ''), limit)
+        return jsonify({'success': True, 'field': field, 'suggestions': suggestions}), 200
+        
+    except Exception as e:
+        print(f"Error getting autocomplete values: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 # ==================== JOBS ====================
 
+JOBS_VERSION_SQL = 'SELECT COUNT(*), MAX(job_id), MAX(created_at) FROM Jobs'
+
+def jobs_page_query(where, page_size):
+    """Newest-first jobs query for one page; one extra row tells us whether another page exists"""
+    return f'''
+        SELECT TOP {page_size + 1} j.job_id, j.title, j.company, j.job_type, j.location, j.salary, j.hours,
+               j.description, j.required_skills, j.posted, j.employer_id, j.created_at
+        FROM Jobs j
+        {where}
+        ORDER BY j.created_at DESC, j.job_id DESC
+    '''
+
+def jobs_cache_key(args, page_size):
+    """Cache key for a jobs page
+
+    Empty and default-valued parameters are left out, so equivalent requests
+    (such as /api/jobs and /api/jobs?page_size=20) share one entry and ETag.
+    """
+    items = [(name, value) for name, value in args.items(multi=True) if value and name != 'page_size']
+    if page_size != DEFAULT_PAGE_SIZE:
+        items.append(('page_size', str(page_size)))
+    return 'jobs?' + urlencode(sorted(items))
+
+def jobs_page(rows, page_size):
+    """Response payload for the rows of jobs_page_query()"""
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = encode_cursor(rows[-1][11], int(rows[-1][0])) if has_more else None
+    return {
+        'success': True,
+        'jobs': serializers.JOB.many(rows),
+        'page_size': page_size,
+        'next_cursor': next_cursor
+    }
+
 @app.route('/api/jobs', methods=['GET'])
 def get_jobs():
-    """Get all jobs"""
+    """Get one page of jobs, newest first, with optional filters
+
+    Query parameters: page_size, cursor, job_type, location, employer_id, skill, search
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        page_size = parse_page_size(request.args.get('page_size'))
+        cursor_token = request.args.get('cursor')
         
-        cursor.execute('''
-            SELECT j.job_id, j.title, j.company, j.job_type, j.location, j.salary, j.hours,
-                   j.description, j.required_skills, j.posted, j.employer_id, j.created_at
-            FROM Jobs j
-            ORDER BY j.created_at DESC
-        ''')
+        conditions, params = [], []
+        if request.args.get('job_type'):
+            conditions.append('j.job_type = ?')
+            params.append(request.args['job_type'])
+        if request.args.get('location'):
+            conditions.append("j.location LIKE ? ESCAPE '\\'")
+            params.append(like_pattern(request.args['location']))
+        if request.args.get('employer_id'):
+            conditions.append('j.employer_id = ?')
+            params.append(int(request.args['employer_id']))
+        if request.args.get('skill'):
+            # Whole skills only: ',Java,' is not part of ',JavaScript,'
+            conditions.append("CONCAT(',', REPLACE(j.required_skills, ', ', ','), ',') LIKE ? ESCAPE '\\'")
+            params.append(like_pattern(f",{request.args['skill'].strip()},"))
+        if request.args.get('search'):
+            conditions.append("(j.title LIKE ? ESCAPE '\\' OR j.company LIKE ? ESCAPE '\\')")
+            params.extend([like_pattern(request.args['search'])] * 2)
+        if cursor_token:
+            # Keyset condition on (created_at, job_id) - matches the ORDER BY below
+            last_created, last_id = decode_cursor(cursor_token, (datetime, int))
+            conditions.append('(j.created_at < ? OR (j.created_at = ? AND j.job_id < ?))')
+            params.extend([last_created, last_created, last_id])
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    def load():
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(jobs_page_query(where, page_size), params)
+            return jobs_page(cursor.fetchall(), page_size)
+    
+    try:
+        # New jobs are always newest, so they can only change pages fetched without a cursor
+        key = jobs_cache_key(request.args, page_size)
+        version = collection_version('jobs', JOBS_VERSION_SQL, tags=('jobs', 'jobs:head'))
+        return cached_json(key, load, tags=('jobs',) if cursor_token else ('jobs', 'jobs:head'), version=version)
+        
+    except Exception as e:
+        print(f"Error getting jobs: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/jobs/search', methods=['GET'])
+def search_jobs():
+    """Full-text job search over title, company, skills and description, best matches first
+
+    Query parameters: q, limit, prefix (prefix=0 stops the last word matching longer words)
+    """
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'success': False, 'message': 'q is required'}), 400
+    try:
+        limit = parse_page_size(request.args.get('limit'), default=10)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    prefix = request.args.get('prefix', '1') != '0'
+    
+    try:
+        job_search.ensure_loaded(db_pool)
+        started = time.perf_counter()
+        total, ranked = job_search.search(query, limit=limit, prefix=prefix)
+        took_ms = (time.perf_counter() - started) * 1000
+        
+        rows = []
+        if ranked:
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                placeholders = ','.join('?' * len(ranked))
+                cursor.execute(f'''
+                    SELECT job_id, title, company, job_type, location, salary, hours,
+                           description, required_skills, posted, employer_id
+                    FROM Jobs
+                    WHERE job_id IN ({placeholders})
+                ''', [job_id for job_id, _ in ranked])
+                rows = cursor.fetchall()
         
+        by_id = {int(row[0]): row for row in rows}
         jobs = []
-        for row in cursor.fetchall():
-            jobs.append({
-                'id': int(row[0]),
-                'title': row[1],
-                'company': row[2],
-                'type': row[3],
-                'location': row[4],
-                'salary': row[5],
-                'hours': row[6],
-                'description': row[7],
-                'skills': row[8].split(',') if row[8] else [],
-                'posted': row[9],
-                'employer_id': int(row[10]) if row[10] else None
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'jobs': jobs}), 200
+        for job_id, score in ranked:
+            if job_id in by_id:
+                job = serializers.JOB.one(by_id[job_id])
+                job['score'] = score
+                jobs.append(job)
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'jobs': jobs,
+            'total_matches': total,
+            'took_ms': round(took_ms, 2)
+        }), 200
         
     except Exception as e:
-        print(f"Error getting jobs: {e}")
+        print(f"Error searching jobs: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/jobs', methods=['POST'])
@@ -293,68 +825,122 @@ def create_job():
     """Create a new job"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        skills_str = ','.join(data.get('skills', [])) if isinstance(data.get('skills'), list) else data.get('skills', '')
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            skills_str = ','.join(data.get('skills', [])) if isinstance(data.get('skills'), list) else data.get('skills', '')
+            company = autocomplete.canonical('company', data['company'])
+            location = autocomplete.canonical('location', data.get('location'))
+            
+            cursor.execute('''
+                INSERT INTO Jobs (title, company, job_type, location, salary, hours, 
+                                description, required_skills, posted, employer_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (data['title'], company, data.get('type'), location,
+                  data.get('salary'), data.get('hours'), data.get('description'),
+                  skills_str, 'Just now', data.get('employer_id')))
+            
+            conn.commit()
+            cursor.execute('SELECT @@IDENTITY')
+            job_id = int(cursor.fetchone()[0])
+            
+            if skill_index.loaded:
+                skill_index.add_job(job_id, skills_str)
+            if job_search.loaded:
+                job_search.add_job(job_id, {'title': data['title'], 'company': company,
+                                            'skills': skills_str, 'description': data.get('description')})
+            autocomplete.add('company', company)
+            autocomplete.add('location', location)
+            response_cache.invalidate_tags('jobs:head')
+            
+            return jsonify({'success': True, 'message': 'Job created successfully', 'job_id': job_id}), 201
         
-        cursor.execute('''
-            INSERT INTO Jobs (title, company, job_type, location, salary, hours, 
-                            description, required_skills, posted, employer_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (data['title'], data['company'], data.get('type'), data.get('location'),
-              data.get('salary'), data.get('hours'), data.get('description'),
-              skills_str, 'Just now', data.get('employer_id')))
+    except Exception as e:
+        print(f"Error creating job: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/students/<int:student_id>/recommended-jobs', methods=['GET'])
+def get_recommended_jobs(student_id):
+    """Get jobs ranked by how well their required skills match the student's skills"""
+    try:
+        limit = parse_page_size(request.args.get('limit'), default=10)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        skill_index.ensure_loaded(db_pool)
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT skills FROM Students WHERE student_id = ?', (student_id,))
+            student = cursor.fetchone()
+            if not student:
+                return jsonify({'success': False, 'message': 'Student not found'}), 404
+            
+            ranked = skill_index.recommend(student[0], limit=limit)
+            rows = []
+            if ranked:
+                placeholders = ','.join('?' * len(ranked))
+                cursor.execute(f'''
+                    SELECT job_id, title, company, job_type, location, salary, hours,
+                           description, required_skills, posted, employer_id
+                    FROM Jobs
+                    WHERE job_id IN ({placeholders})
+                ''', [job_id for job_id, _, _ in ranked])
+                rows = cursor.fetchall()
         
-        conn.commit()
-        cursor.execute('SELECT @@IDENTITY')
-        job_id = int(cursor.fetchone()[0])
-        conn.close()
+        by_id = {int(row[0]): row for row in rows}
+        jobs = []
+        for job_id, score, matched in ranked:
+            if job_id in by_id:
+                job = serializers.JOB.one(by_id[job_id])
+                job.update(score=score, matched_skills=matched)
+                jobs.append(job)
         
-        return jsonify({'success': True, 'message': 'Job created successfully', 'job_id': job_id}), 201
+        return jsonify({'success': True, 'jobs': jobs}), 200
         
     except Exception as e:
-        print(f"Error creating job: {e}")
+        print(f"Error getting recommended jobs: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # ==================== APPLICATIONS ====================
 
+STUDENT_APPLICATIONS_SQL = '''
+    SELECT application_id, job_id, job_title, company, applied_date, status
+    FROM Applications
+    WHERE student_id = ?
+    ORDER BY applied_date DESC
+'''
+
+STUDENT_APPLICATIONS_VERSION_SQL = '''
+    SELECT COUNT(*), MAX(application_id), MAX(applied_date) FROM Applications WHERE student_id = ?
+'''
+
 @app.route('/api/applications', methods=['GET'])
 def get_applications():
     """Get all applications or filter by student"""
     try:
         student_id = request.args.get('student_id', type=int)
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if student_id:
-            cursor.execute('''
-                SELECT application_id, job_id, student_id, job_title, company, applied_date, status
-                FROM Applications
-                WHERE student_id = ?
-                ORDER BY applied_date DESC
-            ''', (student_id,))
-        else:
-            cursor.execute('''
-                SELECT application_id, job_id, student_id, job_title, company, applied_date, status
-                FROM Applications
-                ORDER BY applied_date DESC
-            ''')
-        
-        applications = []
-        for row in cursor.fetchall():
-            applications.append({
-                'id': int(row[0]),
-                'job_id': int(row[1]),
-                'student_id': int(row[2]),
-                'job_title': row[3],
-                'company': row[4],
-                'applied_date': row[5].isoformat() if row[5] else None,
-                'status': row[6]
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'applications': applications}), 200
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            if student_id:
+                cursor.execute('''
+                    SELECT application_id, job_id, student_id, job_title, company, applied_date, status
+                    FROM Applications
+                    WHERE student_id = ?
+                    ORDER BY applied_date DESC
+                ''', (student_id,))
+            else:
+                cursor.execute('''
+                    SELECT application_id, job_id, student_id, job_title, company, applied_date, status
+                    FROM Applications
+                    ORDER BY applied_date DESC
+                ''')
+            
+            applications = serializers.APPLICATION.many(cursor.fetchall())
+            
+            return jsonify({'success': True, 'applications': applications}), 200
         
     except Exception as e:
         print(f"Error getting applications: {e}")
@@ -365,28 +951,34 @@ def submit_application():
     """Submit a job application"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT application_id FROM Applications WHERE job_id = ? AND student_id = ?
-        ''', (data['job_id'], data['student_id']))
-        
-        if cursor.fetchone():
-            return jsonify({'success': False, 'message': 'Already applied to this job'}), 400
-        
-        cursor.execute('''
-            INSERT INTO Applications (job_id, student_id, job_title, company, cover_letter)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (data['job_id'], data['student_id'], data.get('job_title'), 
-              data.get('company'), data.get('cover_letter')))
-        
-        conn.commit()
-        cursor.execute('SELECT @@IDENTITY')
-        app_id = int(cursor.fetchone()[0])
-        conn.close()
-        
-        return jsonify({'success': True, 'message': 'Application submitted successfully', 'application_id': app_id}), 201
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT application_id FROM Applications WHERE job_id = ? AND student_id = ?
+            ''', (data['job_id'], data['student_id']))
+            
+            if cursor.fetchone():
+                return jsonify({'success': False, 'message': 'Already applied to this job'}), 400
+            
+            cursor.execute('''
+                INSERT INTO Applications (job_id, student_id, job_title, company, cover_letter)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (data['job_id'], data['student_id'], data.get('job_title'), 
+                  data.get('company'), data.get('cover_letter')))
+            
+            conn.commit()
+            cursor.execute('SELECT @@IDENTITY')
+            app_id = int(cursor.fetchone()[0])
+            response_cache.invalidate_tags(f"applications:student:{int(data['student_id'])}")
+            
+            cursor.execute('SELECT employer_id, title FROM Jobs WHERE job_id = ?', (data['job_id'],))
+            job = cursor.fetchone()
+            if job and job[0]:
+                notification_dispatcher.enqueue(job[0], 'employer', f"New application received for {job[1]}",
+                                                'application')
+            
+            return jsonify({'success': True, 'message': 'Application submitted successfully', 'application_id': app_id}), 201
         
     except Exception as e:
         print(f"Error submitting application: {e}")
@@ -395,30 +987,16 @@ def submit_application():
 @app.route('/api/applications/student/<int:student_id>', methods=['GET'])
 def get_student_applications(student_id):
     """Get all applications for a student"""
+    def load():
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(STUDENT_APPLICATIONS_SQL, (student_id,))
+            return {'success': True, 'applications': serializers.STUDENT_APPLICATION.many(cursor.fetchall())}
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT application_id, job_id, job_title, company, applied_date, status
-            FROM Applications
-            WHERE student_id = ?
-            ORDER BY applied_date DESC
-        ''', (student_id,))
-        
-        applications = []
-        for row in cursor.fetchall():
-            applications.append({
-                'id': int(row[0]),
-                'job_id': int(row[1]),
-                'job_title': row[2],
-                'company': row[3],
-                'applied_date': row[4].isoformat() if row[4] else None,
-                'status': row[5]
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'applications': applications}), 200
+        key = f'applications:student:{student_id}'
+        version = collection_version(key, STUDENT_APPLICATIONS_VERSION_SQL, (student_id,), tags=(key,))
+        return cached_json(key, load, tags=(key,), version=version)
         
     except Exception as e:
         print(f"Error getting student applications: {e}")
@@ -426,49 +1004,48 @@ def get_student_applications(student_id):
 
 # ==================== REFERENCES ====================
 
+STUDENT_REFERENCES_SQL = '''
+    SELECT reference_id, referee_name, referee_email, referee_phone, relationship,
+           company, position, status, request_date, response_date, rating
+    FROM StudentReferences
+    WHERE student_id = ?
+    ORDER BY request_date DESC
+'''
+
+# Expired requests change no timestamp, so their count is part of the version
+STUDENT_REFERENCES_VERSION_SQL = '''
+    SELECT COUNT(*), MAX(reference_id), MAX(request_date), MAX(response_date),
+           SUM(CASE WHEN status = 'expired' THEN 1 ELSE 0 END)
+    FROM StudentReferences WHERE student_id = ?
+'''
+
 @app.route('/api/references', methods=['GET'])
 def get_references():
     """Get all references or filter by student"""
     try:
         student_id = request.args.get('student_id', type=int)
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if student_id:
-            cursor.execute('''
-                SELECT reference_id, student_id, referee_name, referee_email, referee_phone, relationship,
-                       company, position, status, request_date, response_date, rating
-                FROM StudentReferences
-                WHERE student_id = ?
-                ORDER BY request_date DESC
-            ''', (student_id,))
-        else:
-            cursor.execute('''
-                SELECT reference_id, student_id, referee_name, referee_email, referee_phone, relationship,
-                       company, position, status, request_date, response_date, rating
-                FROM StudentReferences
-                ORDER BY request_date DESC
-            ''')
-        
-        references = []
-        for row in cursor.fetchall():
-            references.append({
-                'id': int(row[0]),
-                'student_id': int(row[1]),
-                'referee_name': row[2],
-                'referee_email': row[3],
-                'referee_phone': row[4],
-                'relationship': row[5],
-                'company': row[6],
-                'position': row[7],
-                'status': row[8],
-                'request_date': row[9].isoformat() if row[9] else None,
-                'response_date': row[10].isoformat() if row[10] else None,
-                'rating': int(row[11]) if row[11] else None
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'references': references}), 200
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            if student_id:
+                cursor.execute('''
+                    SELECT reference_id, student_id, referee_name, referee_email, referee_phone, relationship,
+                           company, position, status, request_date, response_date, rating
+                    FROM StudentReferences
+                    WHERE student_id = ?
+                    ORDER BY request_date DESC
+                ''', (student_id,))
+            else:
+                cursor.execute('''
+                    SELECT reference_id, student_id, referee_name, referee_email, referee_phone, relationship,
+                           company, position, status, request_date, response_date, rating
+                    FROM StudentReferences
+                    ORDER BY request_date DESC
+                ''')
+            
+            references = serializers.REFERENCE.many(cursor.fetchall())
+            
+            return jsonify({'success': True, 'references': references}), 200
         
     except Exception as e:
         print(f"Error getting references: {e}")
@@ -479,23 +1056,18 @@ def request_reference():
     """Request a new reference"""
     try:
         data = request.json
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO StudentReferences (student_id, referee_name, referee_email, referee_phone,
-                                    relationship, company, position)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (data['student_id'], data['referee_name'], data['referee_email'],
-              data.get('referee_phone'), data.get('relationship'), data.get('company'),
-              data.get('position')))
+        ref_id, token, expiry = reference_lifecycle.create_request(data)
+        response_cache.invalidate_tags(f"references:student:{int(data['student_id'])}")
+        notification_dispatcher.enqueue(data['student_id'], 'student',
+                                        f"Reference request sent to {data['referee_name']}", 'reference')
         
-        conn.commit()
-        cursor.execute('SELECT @@IDENTITY')
-        ref_id = int(cursor.fetchone()[0])
-        conn.close()
-        
-        return jsonify({'success': True, 'message': 'Reference request sent', 'reference_id': ref_id}), 201
+        return jsonify({
+            'success': True,
+            'message': 'Reference request sent',
+            'reference_id': ref_id,
+            'token': token,
+            'expiry_date': expiry.isoformat()
+        }), 201
         
     except Exception as e:
         print(f"Error requesting reference: {e}")
@@ -504,41 +1076,426 @@ def request_reference():
 @app.route('/api/references/student/<int:student_id>', methods=['GET'])
 def get_student_references(student_id):
     """Get all references for a student"""
+    def load():
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(STUDENT_REFERENCES_SQL, (student_id,))
+            return {'success': True, 'references': serializers.STUDENT_REFERENCE.many(cursor.fetchall())}
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT reference_id, referee_name, referee_email, referee_phone, relationship,
-                   company, position, status, request_date, response_date, rating
-            FROM StudentReferences
-            WHERE student_id = ?
-            ORDER BY request_date DESC
-        ''', (student_id,))
-        
-        references = []
-        for row in cursor.fetchall():
-            references.append({
-                'id': int(row[0]),
-                'referee_name': row[1],
-                'referee_email': row[2],
-                'referee_phone': row[3],
-                'relationship': row[4],
-                'company': row[5],
-                'position': row[6],
-                'status': row[7],
-                'request_date': row[8].isoformat() if row[8] else None,
-                'response_date': row[9].isoformat() if row[9] else None,
-                'rating': int(row[10]) if row[10] else None
-            })
-        
-        conn.close()
-        return jsonify({'success': True, 'references': references}), 200
+        key = f'references:student:{student_id}'
+        version = collection_version(key, STUDENT_REFERENCES_VERSION_SQL, (student_id,), tags=(key,))
+        return cached_json(key, load, tags=(key,), version=version)
         
     except Exception as e:
         print(f"Error getting student references: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/references/student/<int:student_id>/stats', methods=['GET'])
+def get_student_reference_stats(student_id):
+    """Get a student's reference counts and average rating"""
+    try:
+        with db_pool.connection() as conn:
+            stats = reference_stats.get_stats(conn.cursor(), student_id)
+        return jsonify({'success': True, 'stats': stats}), 200
+        
+    except Exception as e:
+        print(f"Error getting reference stats: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/references/stats', methods=['GET'])
+def get_global_reference_stats():
+    """Get reference counts across all students; ?verify=1 also checks them against StudentReferences (admin only)"""
+    try:
+        with db_pool.connection() as conn:
+            result = {'success': True, 'stats': reference_stats.get_stats(conn.cursor())}
+            if request.args.get('verify', '').lower() in ('1', 'true', 'yes'):
+                result['mismatches'] = [
+                    {'student_id': student_id, 'stored': stored, 'expected': expected}
+                    for student_id, stored, expected in reference_stats.verify(conn)
+                ]
+        return jsonify(result), 200
+        
+    except Exception as e:
+        print(f"Error getting reference stats: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/references/stats/rebuild', methods=['POST'])
+def rebuild_reference_stats():
+    """Recompute the reference stats from StudentReferences (admin only)"""
+    try:
+        with db_pool.connection() as conn:
+            students = reference_stats.rebuild(conn)
+            stats = reference_stats.get_stats(conn.cursor())
+        return jsonify({'success': True, 'students': students, 'stats': stats}), 200
+        
+    except Exception as e:
+        print(f"Error rebuilding reference stats: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/references/respond/<token>', methods=['GET'])
+def get_reference_request(token):
+    """Get the reference request behind a referee token"""
+    try:
+        reference = reference_lifecycle.lookup(token)
+        if reference is None:
+            return jsonify({'success': False, 'message': 'Reference request not found'}), 404
+        
+        return jsonify({
+            'success': True,
+            'reference': {
+                'id': reference['id'],
+                'student_name': reference['student_name'],
+                'referee_name': reference['referee_name'],
+                'relationship': reference['relationship'],
+                'company': reference['company'],
+                'status': reference['status'],
+                'request_date': reference['request_date'].isoformat() if reference['request_date'] else None,
+                'expiry_date': reference['expiry_date'].isoformat() if reference['expiry_date'] else None
+            }
+        }), 200
+        
+    except Exception as e:
+        print(f"Error getting reference request: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/references/respond/<token>', methods=['POST'])
+def respond_to_reference(token):
+    """Submit a referee's answer to a pending reference request"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('reference_text'):
+        return jsonify({'success': False, 'message': 'reference_text is required'}), 400
+    try:
+        rating = int(data['rating']) if data.get('rating') is not None else None
+        if rating is not None and not 1 <= rating <= 5:
+            raise ValueError
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'message': 'rating must be an integer from 1 to 5'}), 400
+    
+    try:
+        reference = reference_lifecycle.respond(token, data['reference_text'], rating)
+        response_cache.invalidate_tags(f"references:student:{reference['student_id']}")
+        notification_dispatcher.enqueue(reference['student_id'], 'student',
+                                        f"{reference['referee_name']} completed your reference", 'reference')
+        
+        return jsonify({'success': True, 'message': 'Reference submitted', 'reference_id': reference['id']}), 200
+        
+    except ReferenceUnavailable as e:
+        return jsonify({'success': False, 'message': str(e), 'status': e.status}), \
+            REFERENCE_UNAVAILABLE_STATUS[e.status]
+    except Exception as e:
+        print(f"Error submitting reference: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/references/lifecycle', methods=['GET'])
+def get_reference_lifecycle_stats():
+    """Get reference expiry sweep metrics and token cache counters (admin only)"""
+    return jsonify({'success': True, 'lifecycle': reference_lifecycle.stats()}), 200
+
+@app.route('/api/admin/references/sweep', methods=['POST'])
+def sweep_references():
+    """Expire overdue reference requests now (admin only)"""
+    try:
+        expired = reference_lifecycle.sweep()
+        return jsonify({'success': True, 'expired': expired, 'lifecycle': reference_lifecycle.stats()}), 200
+    except Exception as e:
+        print(f"Error sweeping references: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ==================== STUDENT DASHBOARD ====================
+
+def student_dashboard_sections(student_id):
+    """Section name -> cache key, tags, version and data statements, and payload builder
+
+    Each section uses the cache key and tags of the endpoint that serves it on
+    its own, so the two share cached bodies and a section's version is that
+    endpoint's ETag.
+    """
+    applications = f'applications:student:{student_id}'
+    references = f'references:student:{student_id}'
+    return {
+        'applications': {
+            'key': applications,
+            'version_key': applications,
+            'tags': (applications,),
+            'version': (STUDENT_APPLICATIONS_VERSION_SQL, (student_id,)),
+            'data': (STUDENT_APPLICATIONS_SQL, (student_id,)),
+            'payload': lambda rows: {'success': True, 'applications': serializers.STUDENT_APPLICATION.many(rows)}
+        },
+        'jobs': {
+            'key': jobs_cache_key(MultiDict(), DEFAULT_PAGE_SIZE),
+            'version_key': 'jobs',
+            'tags': ('jobs', 'jobs:head'),
+            'version': (JOBS_VERSION_SQL, ()),
+            'data': (jobs_page_query('', DEFAULT_PAGE_SIZE), ()),
+            'payload': lambda rows: jobs_page(rows, DEFAULT_PAGE_SIZE)
+        },
+        'references': {
+            'key': references,
+            'version_key': references,
+            'tags': (references,),
+            'version': (STUDENT_REFERENCES_VERSION_SQL, (student_id,)),
+            'data': (STUDENT_REFERENCES_SQL, (student_id,)),
+            'payload': lambda rows: {'success': True, 'references': serializers.STUDENT_REFERENCE.many(rows)}
+        }
+    }
+
+@app.route('/api/students/<int:student_id>/dashboard', methods=['GET'])
+def get_student_dashboard(student_id):
+    """Get a student's first page of jobs, applications and references in one call
+
+    Query parameters: jobs, applications, references - the section version the
+    client already has. A section still at that version is sent as
+    {"unchanged": true} with its version and no data.
+    """
+    try:
+        sections = student_dashboard_sections(student_id)
+        with db_pool.connection() as conn:
+            def batch(keys, statement, build, ttl=None):
+                """Cached values for {cache key: section}; the misses are loaded in one batch on conn"""
+                def load(missing):
+                    results = storage.fetch_batch(conn, [sections[keys[key]][statement] for key in missing])
+                    return {key: build(keys[key], rows) for key, rows in zip(missing, results)}
+                
+                tags = {key: sections[name]['tags'] for key, name in keys.items()}
+                loaded = response_cache.get_or_load_many(list(keys), load, ttl=ttl, tags=tags)
+                return {keys[key]: value for key, (value, _) in loaded.items()}
+            
+            versions = batch({f"version:{section['version_key']}": name for name, section in sections.items()},
+                             'version', lambda name, rows: version_stamp(rows[0]), ttl=VERSION_TTL)
+            etags = {name: version_etag(section['key'], versions[name][0]) for name, section in sections.items()}
+            bodies = batch({f"{section['key']}@{versions[name][0]}": name for name, section in sections.items()
+                            if request.args.get(name) != etags[name]},
+                           'data', lambda name, rows: app.json.dumps(sections[name]['payload'](rows)))
+        
+        # Cached section bodies are already JSON, so the envelope is put together around them
+        parts = [f'"{name}":{{"data":{bodies[name]},"version":"{etags[name]}"}}' if name in bodies
+                 else f'"{name}":{{"unchanged":true,"version":"{etags[name]}"}}' for name in sorted(sections)]
+        body = f'{{"sections":{{{",".join(parts)}}},"student_id":{student_id},"success":true}}'
+        return Response(body, mimetype='application/json', headers={'Cache-Control': 'no-cache'})
+        
+    except Exception as e:
+        print(f"Error getting student dashboard: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ==================== NOTIFICATIONS ====================
+
+@app.route('/api/notifications/<user_type>/<int:user_id>', methods=['GET'])
+def get_notifications(user_type, user_id):
+    """Get one page of a user's notifications, newest first, with the unread count
+
+    Query parameters: page_size, cursor, unread_only
+    """
+    if user_type not in NOTIFICATION_RECIPIENTS:
+        return jsonify({'success': False, 'message': f"Unknown user type '{user_type}'"}), 404
+    
+    try:
+        page_size = parse_page_size(request.args.get('page_size'))
+        unread_only = request.args.get('unread_only', '').lower() in ('1', 'true', 'yes')
+        with db_pool.connection() as conn:
+            notifications, next_cursor = fetch_notifications(conn, user_id, user_type, page_size,
+                                                             request.args.get('cursor'), unread_only)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting notifications: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    try:
+        return jsonify({
+            'success': True,
+            'notifications': notifications,
+            'unread_count': unread_counts.get(user_id, user_type),
+            'page_size': page_size,
+            'next_cursor': next_cursor
+        }), 200
+    except Exception as e:
+        print(f"Error getting notifications: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/notifications/<user_type>/<int:user_id>/unread-count', methods=['GET'])
+def get_unread_notification_count(user_type, user_id):
+    """Get a user's unread notification count"""
+    if user_type not in NOTIFICATION_RECIPIENTS:
+        return jsonify({'success': False, 'message': f"Unknown user type '{user_type}'"}), 404
+    
+    try:
+        return jsonify({'success': True, 'unread_count': unread_counts.get(user_id, user_type)}), 200
+    except Exception as e:
+        print(f"Error getting unread count: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/notifications/<user_type>/<int:user_id>/read', methods=['POST'])
+def mark_notifications_read(user_type, user_id):
+    """Mark a user's notifications read in bulk
+
+    Body: {"ids": [...]} and/or {"before": "<ISO timestamp>"} (everything created up to it)
+    """
+    if user_type not in NOTIFICATION_RECIPIENTS:
+        return jsonify({'success': False, 'message': f"Unknown user type '{user_type}'"}), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        ids = data.get('ids') or []
+        if not isinstance(ids, list) or len(ids) > MAX_MARK_READ_IDS:
+            raise ValueError(f"ids must be a list of at most {MAX_MARK_READ_IDS} notification IDs")
+        ids = [int(i) for i in ids]
+        before = datetime.fromisoformat(data['before']) if data.get('before') else None
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if not ids and before is None:
+        return jsonify({'success': False, 'message': 'Provide ids or before'}), 400
+    
+    try:
+        token = unread_counts.begin_write()
+        with db_pool.connection() as conn:
+            updated = mark_read(conn, user_id, user_type, ids=ids, before=before)
+            conn.commit()
+        unread_counts.adjust(user_id, user_type, -updated, token)
+        
+        return jsonify({
+            'success': True,
+            'updated': updated,
+            'unread_count': unread_counts.get(user_id, user_type)
+        }), 200
+        
+    except Exception as e:
+        print(f"Error marking notifications read: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ==================== ANALYTICS ====================
+
+@app.route('/api/admin/analytics', methods=['GET'])
+def get_analytics_snapshot():
+    """Describe the latest analytics snapshot (admin only)"""
+    snapshot = analytics_store.latest()
+    if snapshot is None:
+        return jsonify({'success': False, 'message': 'No analytics snapshot has been taken'}), 404
+    return jsonify({'success': True, 'snapshot': snapshot.info()}), 200
+
+@app.route('/api/admin/analytics/snapshot', methods=['POST'])
+def take_analytics_snapshot():
+    """Export the tables into a new analytics snapshot (admin only)"""
+    try:
+        with db_pool.connection() as conn:
+            manifest = analytics_store.take(conn)
+        return jsonify({'success': True, 'snapshot': analytics_store.latest().info(),
+                        'export_ms': manifest['export_ms']}), 201
+        
+    except Exception as e:
+        print(f"Error taking analytics snapshot: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/analytics/<table>', methods=['GET'])
+def query_analytics(table):
+    """Group-by query over the latest analytics snapshot (admin only)
+
+    Query parameters: group_by, value, agg (count, sum, avg, min, max); any other
+    parameter is an equality filter, e.g. ?group_by=company&status=Accepted
+    """
+    snapshot = analytics_store.latest()
+    if snapshot is None:
+        return jsonify({'success': False, 'message': 'No analytics snapshot has been taken'}), 404
+    
+    try:
+        started = time.perf_counter()
+        where = {k: v for k, v in request.args.items() if k not in ('group_by', 'value', 'agg')}
+        agg = request.args.get('agg', 'count')
+        if agg not in AGGREGATES:
+            raise ValueError(f"agg must be one of: {', '.join(AGGREGATES)}")
+        groups = snapshot.table(table).aggregate(request.args.get('group_by', ''), request.args.get('value'),
+                                                 agg, where)
+        results = [{'key': key.isoformat() if isinstance(key, datetime) else key,
+                    'value': value.isoformat() if isinstance(value, datetime) else value}
+                   for key, value in groups.items()]
+        results.sort(key=lambda item: item['value'], reverse=True)
+        
+        return jsonify({
+            'success': True,
+            'snapshot': snapshot.manifest['name'],
+            'taken_at': snapshot.manifest['taken_at'],
+            'results': results,
+            'query_ms': round((time.perf_counter() - started) * 1000, 2)
+        }), 200
+        
+    except (KeyError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e).strip('"')}), 400
+    except Exception as e:
+        print(f"Error querying analytics: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/admin/trends/<report>', methods=['GET'])
+def get_trend_report(report):
+    """Time-bucketed trend report (admin only)
+
+    report: applications, conversion or reference-response
+    Query parameters: bucket (day or week), employer_id (applications and conversion)
+    """
+    if report not in ('applications', 'conversion', 'reference-response'):
+        return jsonify({'success': False, 'message': f"Unknown trend report '{report}'"}), 404
+    
+    try:
+        bucket = request.args.get('bucket', 'week')
+        employer_id = request.args.get('employer_id', type=int)
+        with db_pool.connection() as conn:
+            if report == 'applications':
+                rows = trend_reports.applications(conn, bucket, employer_id)
+            elif report == 'conversion':
+                rows = trend_reports.conversion(conn, bucket, employer_id)
+            else:
+                rows = trend_reports.reference_response(conn, bucket)
+        dataset = 'references' if report == 'reference-response' else 'applications'
+        
+        return jsonify({
+            'success': True,
+            'report': report,
+            'bucket': bucket,
+            'rows': rows,
+            'run': trend_reports.last_run.get(f'{dataset}:{bucket}')
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error building trend report: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# ==================== EXPORTS ====================
+
+@app.route('/api/export/<entity>.<fmt>', methods=['GET'])
+def export_entity(entity, fmt):
+    """Stream a whole table as NDJSON or CSV (admin only)
+
+    ?updated_since=<ISO timestamp> exports only rows added since (see export.py: deltas
+    are insert-only); the X-Export-Watermark header holds the value for the next run.
+    """
+    spec = EXPORTS.get(entity)
+    if spec is None or fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': f"Unknown export '{entity}.{fmt}'"}), 404
+    
+    try:
+        since = request.args.get('updated_since')
+        updated_since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'updated_since must be an ISO 8601 timestamp'}), 400
+    
+    try:
+        with db_pool.connection() as conn:
+            watermark = export_watermark(conn, spec)
+    except Exception as e:
+        print(f"Error exporting {entity}: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    def generate():
+        # The pooled connection is held only while the response is being streamed
+        with db_pool.connection() as conn:
+            yield from ENCODERS[fmt](spec, iter_batches(conn, spec, updated_since))
+    
+    headers = {'Content-Disposition': f'attachment; filename={entity}.{fmt}'}
+    if watermark:
+        headers['X-Export-Watermark'] = watermark
+    return Response(generate(), mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
 # ==================== ERROR HANDLERS ====================
 
 @app.errorhandler(404)
@@ -558,6 +1515,7 @@ if __name__ == '__main__':
     print("Server running on: http://localhost:5000")
     print("Student Portal: http://localhost:5000/student")
     print("Admin Portal: http://localhost:5000/admin")
+    print("Development server - for production run: python serve.py app_backend:app")
     print("="*60)
     
     app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
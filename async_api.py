@@ -0,0 +1,481 @@
+# async_api.py - Asyncio API Server for StudentConnect
+"""
+Asyncio entry point for the StudentConnect API
+Every client connection is a coroutine instead of a thread, so thousands of
+open or slow connections cost sockets, not threads. The API is an ASGI
+application (`app`):
+- routes in NATIVE_ROUTES are async. Only GET /api/admin/users is native
+  so far. Its queries go through AsyncDatabase, a bridge that runs DB-API
+  calls on a thread pool sized to the connections the bridge threads leave
+  free, so independent queries run concurrently with asyncio.gather.
+- every other request is passed to the Flask app in app_backend (same
+  handlers, caches and invalidation) and holds one of a bounded pool of
+  bridge threads until its response is built.
+
+The built-in HTTP/1.1 server needs nothing beyond the standard library. The
+ASGI app also runs under any ASGI server (uvicorn async_api:app).
+
+    python async_api.py --port 5000 --threads 16
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote
+
+import app_backend
+import serializers
+from config import SERVER_CONFIG
+
+logger = logging.getLogger('async_api')
+
+# Largest request body accepted (bulk imports are the biggest)
+MAX_BODY = 64 * 1024 * 1024
+
+# Request line plus headers
+MAX_HEADER_LINES = 100
+
+# A bridged response is read in one go up to this size; longer ones (exports) are streamed
+STREAM_AFTER = 64 * 1024
+
+
+class AsyncDatabase:
+    """Awaitable access to a ConnectionPool: blocking DB-API calls run on a bounded executor"""
+
+    def __init__(self, pool, reserved=0):
+        self.pool = pool
+        # The WSGI bridge threads (reserved) take connections from the same pool. The executor gets
+        # the rest, so a query only waits for a connection when bridged requests hold more than one each.
+        if reserved >= pool.max_size:
+            logger.warning(f"{reserved} bridge threads can use all {pool.max_size} pooled connections; "
+                           f"native routes will wait for connections under load")
+        self.executor = ThreadPoolExecutor(max(1, pool.max_size - reserved), thread_name_prefix='async-db')
+
+    async def run(self, fn, *args):
+        """fn(conn, *args) on a pooled connection, off the event loop"""
+        def call():
+            with self.pool.connection() as conn:
+                return fn(conn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def fetchall(self, sql, params=()):
+        def query(conn):
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        return await self.run(query)
+
+    async def fetchone(self, sql, params=()):
+        def query(conn):
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+        return await self.run(query)
+
+
+
+# ==================== NATIVE ROUTES ====================
+
+def json_response(payload, status=200):
+    """(status, headers, body) with the same encoding as Flask's jsonify"""
+    body = (serializers.dumps(payload) + '\n').encode()
+    return status, [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())], body
+
+
+async def get_all_users(scope, db):
+    """Get one page of users (admin only), with the student and employer queries running concurrently"""
+    try:
+        args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        user_type, search, cursor, page_size, count_only = app_backend.parse_user_list_args(args)
+    except ValueError as e:
+        return json_response({'success': False, 'message': str(e)}, 400)
+
+    try:
+        if count_only:
+            return json_response(app_backend.user_counts(
+                await db.fetchall(*app_backend.user_count_query(user_type, search))))
+        queries = app_backend.user_page_queries(user_type, search, cursor, page_size)
+        results = await asyncio.gather(*(db.fetchall(sql, params) for _, sql, params in queries))
+        return json_response(app_backend.user_page([(kind, rows) for (kind, _, _), rows in zip(queries, results)],
+                                                   page_size))
+
+    except Exception as e:
+        print(f"Error getting users: {e}")
+        return json_response({'success': False, 'message': str(e)}, 500)
+
+
+# (method, path) -> async handler(scope, db) returning (status, headers, body)
+NATIVE_ROUTES = {
+    ('GET', '/api/admin/users'): get_all_users,
+}
+
+
+# ==================== ASGI APP ====================
+
+class AsyncAPI:
+    """ASGI app: NATIVE_ROUTES on the event loop, everything else through the WSGI app on bridge threads"""
+
+    def __init__(self, wsgi_app, threads=None, pool=None):
+        self.wsgi_app = wsgi_app
+        threads = threads or SERVER_CONFIG['threads']
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='wsgi-bridge')
+        self.db = AsyncDatabase(pool or app_backend.db_pool, reserved=threads)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+        handler = NATIVE_ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            status, headers, body = await handler(scope, self.db)
+            origin = dict(scope['headers']).get(b'origin')
+            if origin:
+                headers.append((b'access-control-allow-origin', b'*'))  # as flask_cors does for the Flask routes
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        body = b''
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        await self._call_wsgi(scope, body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                self.db.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name != 'CONTENT_LENGTH':
+                key = f'HTTP_{name}'
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    async def _call_wsgi(self, scope, body, send):
+        environ = self._environ(scope, body)
+        loop = asyncio.get_running_loop()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return lambda data: response.setdefault('written', []).append(data)
+
+        def begin():
+            # Call the app and read its body up to STREAM_AFTER bytes in one trip to the executor
+            result = self.wsgi_app(environ, start_response)
+            iterator = iter(result)
+            chunks, size = response.pop('written', []), 0
+            for chunk in iterator:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= STREAM_AFTER:
+                    return result, iterator, chunks, False
+            return result, iterator, chunks, True
+
+        result, iterator, chunks, done = await loop.run_in_executor(self.executor, begin)
+        try:
+            await send({'type': 'http.response.start', 'status': response['status'],
+                        'headers': response['headers']})
+            if done:
+                await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+                return
+            for chunk in chunks:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, result.close)
+
+
+app = AsyncAPI(app_backend.app)
+
+
+# ==================== HTTP SERVER ====================
+
+class _BadRequest(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPServer:
+    """Minimal asyncio HTTP/1.1 server for an ASGI app (keep-alive, chunked bodies, 100-continue)"""
+
+    def __init__(self, asgi_app, host='0.0.0.0', port=5000, keepalive_timeout=None):
+        self.asgi_app = asgi_app
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout or SERVER_CONFIG['keepalive_timeout']
+        self._connections = set()
+        self._idle = set()  # connections waiting for their next request
+        self._stopping = False
+        self.requests = 0
+
+    async def serve(self, stop_event):
+        """Serve until stop_event is set, then let open requests finish"""
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=2048)
+        logger.info(f"Async API listening on http://{self.host}:{self.port}")
+        async with server:
+            await stop_event.wait()
+            self._stopping = True
+            server.close()
+            # Idle keep-alive connections are waiting for a request line: close them now
+            for task in list(self._idle):
+                task.cancel()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=SERVER_CONFIG['graceful_timeout'])
+        logger.info("Async API stopped")
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        peer = writer.get_extra_info('peername') or ('', 0)
+        sock = writer.get_extra_info('sockname') or (self.host, self.port)
+        try:
+            while not self._stopping:
+                self._idle.add(task)
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+                except (asyncio.TimeoutError, ConnectionError):
+                    return
+                finally:
+                    self._idle.discard(task)
+                if not request_line:
+                    return
+                try:
+                    keep_alive = await self._handle_request(request_line, reader, writer, peer, sock)
+                except _BadRequest as e:
+                    await self._write_error(writer, e.status, str(e))
+                    return
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_headers(self, reader):
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            if len(headers) >= MAX_HEADER_LINES:
+                raise _BadRequest(431, 'Too many headers')
+            name, sep, value = line.decode('latin-1').partition(':')
+            if not sep:
+                raise _BadRequest(400, 'Malformed header')
+            headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+
+    async def _read_body(self, reader, writer, headers):
+        values = dict(headers)
+        if values.get(b'expect', b'').lower() == b'100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+        if values.get(b'transfer-encoding', b'').lower() == b'chunked':
+            body = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    await self._read_headers(reader)  # trailers
+                    return bytes(body)
+                if len(body) + size > MAX_BODY:
+                    raise _BadRequest(413, 'Request body too large')
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+        length = int(values.get(b'content-length', b'0') or 0)
+        if length > MAX_BODY:
+            raise _BadRequest(413, 'Request body too large')
+        return await reader.readexactly(length) if length else b''
+
+    async def _handle_request(self, request_line, reader, writer, peer, sock):
+        """Run one request through the app; returns whether the connection stays open"""
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise _BadRequest(400, 'Malformed request line')
+        if version not in ('HTTP/1.0', 'HTTP/1.1'):
+            raise _BadRequest(505, 'HTTP version not supported')
+        headers = await self._read_headers(reader)
+        try:
+            body = await self._read_body(reader, writer, headers)
+        except ValueError:
+            raise _BadRequest(400, 'Malformed body')
+
+        connection = dict(headers).get(b'connection', b'').lower()
+        keep_alive = connection != b'close' if version == 'HTTP/1.1' else connection == b'keep-alive'
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': version[5:],
+            'method': method.upper(),
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': peer[:2],
+            'server': sock[:2],
+        }
+        received = False
+
+        async def receive():
+            nonlocal received
+            if received:
+                return {'type': 'http.disconnect'}
+            received = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        state = {'started': False, 'chunked': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                state['status'] = message['status']
+                state['headers'] = list(message.get('headers', []))
+                return
+            chunk = message.get('body', b'')
+            more = message.get('more_body', False)
+            if not state['started']:
+                state['started'] = True
+                response_headers = state['headers']
+                names = {name.lower() for name, _ in response_headers}
+                if b'content-length' not in names:
+                    if more and version == 'HTTP/1.1':
+                        state['chunked'] = True
+                        response_headers.append((b'transfer-encoding', b'chunked'))
+                    elif more:
+                        state['close'] = True
+                    else:
+                        response_headers.append((b'content-length', str(len(chunk)).encode()))
+                writer.write(self._head(state['status'], response_headers, keep_alive and not state.get('close')))
+            if state['chunked']:
+                if chunk:
+                    writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                if not more:
+                    writer.write(b'0\r\n\r\n')
+            elif chunk and method.upper() != 'HEAD':
+                writer.write(chunk)
+            await writer.drain()
+
+        try:
+            await self.asgi_app(scope, receive, send)
+        except Exception:
+            logger.exception(f"Error handling {method} {target}")
+            if state['started']:
+                return False
+            await self._write_error(writer, 500, 'Internal server error')
+            return False
+        self.requests += 1
+        return keep_alive and not state.get('close') and not self._stopping
+
+    @staticmethod
+    def _head(status, headers, keep_alive):
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ''
+        lines = [f'HTTP/1.1 {status} {reason}'.encode('latin-1'),
+                 b'date: ' + formatdate(time.time(), usegmt=True).encode(),
+                 b'connection: keep-alive' if keep_alive else b'connection: close']
+        lines.extend(name + b': ' + value for name, value in headers)
+        return b'\r\n'.join(lines) + b'\r\n\r\n'
+
+    async def _write_error(self, writer, status, message):
+        body = (serializers.dumps({'success': False, 'message': message}) + '\n').encode()
+        writer.write(self._head(status, [(b'content-type', b'application/json'),
+                                         (b'content-length', str(len(body)).encode())], False) + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+async def _main(api, host, port):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, AttributeError):
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+    await HTTPServer(api, host, port).serve(stop)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Asyncio API server for StudentConnect')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=SERVER_CONFIG['threads'],
+                        help='threads for requests passed to the Flask app')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s')
+    api = AsyncAPI(app_backend.app, args.threads)
+    try:
+        asyncio.run(_main(api, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.executor.shutdown(wait=True)
+        api.db.executor.shutdown(wait=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# auth.py - Authentication for StudentConnect
+"""
+Login checks for students and employers
+A single indexed lookup by email fetches the account together with its
+password hash, which is then verified in Python by the PasswordHasher.
+Unknown emails are remembered in a small negative cache, and failed
+attempts are counted per email and per client IP in sliding time windows,
+so credential-stuffing traffic is turned away before it reaches the
+database or the KDF.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+# kind -> (table, id column, columns returned to the caller)
+ACCOUNTS = {
+    'student': ('Students', 'student_id', [
+        'student_id', 'full_name', 'email', 'phone', 'university', 'major', 'gpa', 'skills', 'created_at'
+    ]),
+    'employer': ('Employers', 'employer_id', [
+        'employer_id', 'company_name', 'email', 'phone', 'contact_person', 'created_at'
+    ]),
+}
+
+
+class LoginThrottled(Exception):
+    """Raised when an email or IP has too many recent failed logins"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Too many failed login attempts, try again in {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+class AttemptCounter:
+    """Failed attempts per key within a sliding time window, with bounded memory"""
+
+    def __init__(self, limit, window, max_keys=100000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        # key -> recent failure times; ordered by latest failure, so stale keys sit at the front
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def __len__(self):
+        return len(self._attempts)
+
+    def _evict_locked(self, now):
+        while self._attempts:
+            key, times = next(iter(self._attempts.items()))
+            if times[-1] > now - self.window:
+                break
+            del self._attempts[key]
+
+    def retry_after(self, key):
+        """Seconds until the key may try again, 0 when it is not blocked"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_locked(now)
+            times = self._attempts.get(key)
+            if not times:
+                return 0
+            while times and times[0] <= now - self.window:
+                times.popleft()
+            if len(times) < self.limit:
+                return 0
+            self.blocked += 1
+            return max(1, math.ceil(times[0] + self.window - now))
+
+    def record(self, key):
+        """Count one failed attempt"""
+        now = time.monotonic()
+        with self._lock:
+            times = self._attempts.get(key)
+            if times is None:
+                times = self._attempts[key] = deque(maxlen=self.limit)
+            times.append(now)
+            self._attempts.move_to_end(key)
+            self._evict_locked(now)
+            while len(self._attempts) > self.max_keys:
+                self._attempts.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+class Authenticator:
+    """Email/password authentication through a ConnectionPool and PasswordHasher"""
+
+    def __init__(self, pool, hasher, email_max_failures=5, email_window=900.0, ip_max_failures=50,
+                 ip_window=300.0, unknown_email_ttl=60.0, unknown_email_max=10000):
+        self.pool = pool
+        self.hasher = hasher
+        self.email_failures = AttemptCounter(email_max_failures, email_window)
+        self.ip_failures = AttemptCounter(ip_max_failures, ip_window)
+        # Negative cache of emails with no account (disabled when unknown_email_ttl is 0)
+        self.unknown_emails = (LRUTTLCache(max_entries=unknown_email_max, default_ttl=unknown_email_ttl)
+                               if unknown_email_ttl else None)
+
+    def authenticate(self, kind, email, password, ip=None):
+        """Return the account as a dict, or None for bad credentials
+
+        Raises LoginThrottled when the email or IP is over its failure limit.
+        """
+        table, id_column, columns = ACCOUNTS[kind]
+        email = (email or '').strip()
+        email_key = f'{kind}:{normalize_email(email)}'
+        retry_after = max(self.ip_failures.retry_after(ip) if ip else 0, self.email_failures.retry_after(email_key))
+        if retry_after:
+            raise LoginThrottled(retry_after)
+
+        if self.unknown_emails is not None and self.unknown_emails.get(email_key):
+            # Still pay for the dummy hash, so unknown emails take as long as wrong passwords
+            self.hasher.verify(password, None)
+            self._failed(None, ip)
+            return None
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {', '.join(columns)}, password_hash FROM {table} WHERE email = ?", (email,))
+            row = cursor.fetchone()
+        stored = row[-1] if row else None
+
+        # The KDF runs without holding a pooled connection
+        ok, new_hash = self.hasher.verify_and_update(password, stored)
+        if row is None and self.unknown_emails is not None:
+            self.unknown_emails.set(email_key, True)
+        if not ok:
+            self._failed(email_key if row else None, ip)
+            return None
+
+        self.email_failures.reset(email_key)
+        if new_hash:
+            with self.pool.connection() as conn:
+                self._upgrade_hash(conn, table, id_column, row[0], stored, new_hash)
+        return dict(zip(columns, row[:-1]))
+
+    def _failed(self, email_key, ip):
+        if email_key:
+            self.email_failures.record(email_key)
+        if ip:
+            self.ip_failures.record(ip)
+
+    @staticmethod
+    def _upgrade_hash(conn, table, id_column, user_id, old_hash, new_hash):
+        """Store a rehashed password (skipped if the hash changed meanwhile)"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'UPDATE {table} SET password_hash = ? WHERE {id_column} = ? AND password_hash = ?',
+                           (new_hash, user_id, old_hash))
+            conn.commit()
+        except Exception as e:
+            # The login itself succeeded; the upgrade is retried next time
+            conn.rollback()
+            logger.warning(f"Password rehash failed for {table} {user_id}: {e}")
+
+    def account_created(self, kind=None, email=None):
+        """Forget a cached unknown email after registration (everything when no email is given)"""
+        if self.unknown_emails is None:
+            return
+        if email is None:
+            self.unknown_emails.clear()
+        else:
+            self.unknown_emails.delete(f'{kind}:{normalize_email(email)}')
+
+    def stats(self):
+        return {
+            'unknown_email_cache': self.unknown_emails.stats() if self.unknown_emails is not None else None,
+            'tracked_emails': len(self.email_failures),
+            'tracked_ips': len(self.ip_failures),
+            'blocked_by_email': self.email_failures.blocked,
+            'blocked_by_ip': self.ip_failures.blocked
+        }
@@ -0,0 +1,152 @@
+# autocomplete.py - Type-ahead Suggestions for StudentConnect
+"""
+In-memory autocomplete for university, major, company and location values
+Values are normalized (trimmed, single spaces, lower-case) so that
+"Trinity College  Dublin" and "trinity college dublin" count as one value,
+shown in its most common spelling. Each field keeps a sorted array of the
+word-start suffixes of its values ("college dublin", "dublin", ...), so a
+prefix is found with bisect and matches any word of a value. Suggestions are
+ranked by how often a value is used, and the answers for recent prefixes are
+kept until the field next changes. The index is loaded once with grouped
+queries and then updated as rows are inserted, so suggestions never touch
+the database. With refresh_interval set, the values are reloaded that
+often to pick up rows inserted by other server processes.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Answers kept per field between changes to it
+MAX_CACHED_PREFIXES = 5000
+
+# field -> [(table, column)] the values come from
+FIELDS = {
+    'university': [('Students', 'university')],
+    'major': [('Students', 'major')],
+    'company': [('Employers', 'company_name'), ('Jobs', 'company')],
+    'location': [('Jobs', 'location')],
+}
+
+
+def normalize_value(value):
+    """Matching key for a value: trimmed, lower-case, single spaces"""
+    return ' '.join(value.split()).lower() if value else ''
+
+
+class _FieldValues:
+    """Distinct values of one field with usage counts, plus their sorted word-start suffixes"""
+
+    def __init__(self):
+        self.values = {}    # key -> [count, {spelling: count}]
+        self.suffixes = []  # sorted (suffix, key)
+        self.cache = {}     # (prefix, limit) -> suggestions
+
+    def add(self, value, count=1):
+        key = normalize_value(value)
+        if not key:
+            return
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = [0, {}]
+            words = key.split(' ')
+            for i in range(len(words)):
+                bisect.insort(self.suffixes, (' '.join(words[i:]), key))
+        entry[0] += count
+        self.cache.clear()
+        spelling = ' '.join(value.split())
+        entry[1][spelling] = entry[1].get(spelling, 0) + count
+
+    def display(self, key):
+        spellings = self.values[key][1]
+        return max(spellings, key=lambda s: (spellings[s], s))
+
+    def suggest(self, prefix, limit):
+        """[(display value, count)] for values with a word starting with prefix, most used first"""
+        prefix = normalize_value(prefix)
+        cached = self.cache.get((prefix, limit))
+        if cached is not None:
+            return cached
+        if prefix:
+            start = bisect.bisect_left(self.suffixes, (prefix,))
+            end = bisect.bisect_left(self.suffixes, (prefix + '\uffff',), start)
+            keys = {key for _, key in self.suffixes[start:end]}
+        else:
+            keys = self.values.keys()
+        # Most used first; values that start with the prefix before ones matching a later word
+        top = heapq.nsmallest(limit, keys, key=lambda k: (-self.values[k][0], not k.startswith(prefix), k))
+        suggestions = [(self.display(key), self.values[key][0]) for key in top]
+        if len(self.cache) >= MAX_CACHED_PREFIXES:
+            self.cache.clear()
+        self.cache[(prefix, limit)] = suggestions
+        return suggestions
+
+
+class Autocomplete:
+    """Suggestions for every field in FIELDS, loaded from the database once"""
+
+    def __init__(self, refresh_interval=None):
+        self._fields = {field: _FieldValues() for field in FIELDS}
+        self._lock = threading.Lock()
+        self.loaded = False
+        # Seconds between reloads that pick up values added by other processes (None: never)
+        self.refresh_interval = refresh_interval
+        self._loaded_at = 0.0
+
+    def load(self, pool):
+        """(Re)load every field with one grouped query per source column"""
+        fields = {field: _FieldValues() for field in FIELDS}
+        started = time.monotonic()
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            for field, sources in FIELDS.items():
+                for table, column in sources:
+                    cursor.execute(f'''
+                        SELECT {column}, COUNT(*) FROM {table}
+                        WHERE {column} IS NOT NULL
+                        GROUP BY {column}
+                    ''')
+                    for value, count in cursor.fetchall():
+                        fields[field].add(value, int(count))
+        with self._lock:
+            self._fields = fields
+            self._loaded_at = started
+            self.loaded = True
+        logger.info("Autocomplete loaded: " + ', '.join(f"{len(values.values)} {field} values"
+                                                         for field, values in fields.items()))
+
+    def ensure_fresh(self, pool):
+        """Reload the values once they are older than refresh_interval"""
+        if self.refresh_interval is not None and time.monotonic() - self._loaded_at >= self.refresh_interval:
+            self._loaded_at = time.monotonic()  # one caller reloads, the others use the current values
+            try:
+                self.load(pool)
+            except Exception as e:
+                logger.warning(f"Autocomplete reload failed: {e}")
+
+    def add(self, field, value):
+        """Count one more use of a value (call after inserting a row that has it)"""
+        with self._lock:
+            self._fields[field].add(value)
+
+    def canonical(self, field, value):
+        """The most common spelling of an already known value, else the value with whitespace tidied"""
+        if not value or not value.strip():
+            return value
+        key = normalize_value(value)
+        with self._lock:
+            values = self._fields[field]
+            return values.display(key) if key in values.values else ' '.join(value.split())
+
+    def suggest(self, field, prefix, limit=10):
+        """[{'value', 'count'}] for values of field matching prefix; raises KeyError for unknown fields"""
+        with self._lock:
+            return [{'value': value, 'count': count} for value, count in self._fields[field].suggest(prefix, limit)]
+
+    def stats(self):
+        with self._lock:
+            return {field: len(values.values) for field, values in self._fields.items()}
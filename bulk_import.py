@@ -0,0 +1,365 @@
+# bulk_import.py - Bulk Import for StudentConnect
+"""
+Streaming bulk import of students, employers and jobs from CSV or JSONL
+Records are read one at a time, passwords are hashed in a worker pool while
+the previous batch is being written, and student and employer batches are
+inserted with multi-row INSERT ... OUTPUT INSERTED statements (jobs, which
+have no unique column to match new IDs on, one row at a time). Invalid rows
+and duplicate emails are reported per row without aborting the rest of the
+import.
+
+Usage: python bulk_import.py students cohort.csv [--batch-size 500] [--workers 4]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+
+# SQL Server limits: 2100 parameters per statement, 1000 rows per VALUES list
+MAX_STATEMENT_PARAMS = 2100
+MAX_VALUES_ROWS = 1000
+
+FORMATS = {
+    '.csv': 'csv', 'text/csv': 'csv',
+    '.jsonl': 'jsonl', '.ndjson': 'jsonl',
+    'application/x-ndjson': 'jsonl', 'application/jsonl': 'jsonl', 'application/x-jsonlines': 'jsonl'
+}
+
+
+# ==================== IMPORT SPECIFICATIONS ====================
+
+def _text(value):
+    return str(value).strip() if value not in (None, '') else None
+
+
+def _skills(value):
+    if isinstance(value, list):
+        return ','.join(str(s).strip() for s in value) or None
+    return _text(value)
+
+
+def _float(value):
+    return float(value) if value not in (None, '') else None
+
+
+def _int(value):
+    return int(value) if value not in (None, '') else None
+
+
+class ImportSpec:
+    """How input records map onto one table
+
+    columns is a list of (column, accepted input keys, converter).
+    """
+
+    def __init__(self, table, id_column, columns, required, unique=None, password=False, defaults=None):
+        self.table = table
+        self.id_column = id_column
+        self.columns = columns
+        self.required = required
+        self.unique = unique
+        self.password = password
+        self.defaults = defaults or {}
+        self.insert_columns = [c[0] for c in columns] + (['password_hash'] if password else [])
+
+
+IMPORT_SPECS = {
+    'students': ImportSpec('Students', 'student_id', [
+        ('full_name', ('full_name', 'name'), _text),
+        ('email', ('email',), _text),
+        ('phone', ('phone',), _text),
+        ('university', ('university',), _text),
+        ('major', ('major',), _text),
+        ('gpa', ('gpa',), _float),
+        ('skills', ('skills',), _skills),
+    ], required=('full_name', 'email'), unique='email', password=True),
+    'employers': ImportSpec('Employers', 'employer_id', [
+        ('company_name', ('company_name', 'company'), _text),
+        ('contact_person', ('contact_person',), _text),
+        ('email', ('email',), _text),
+        ('phone', ('phone',), _text),
+        ('industry', ('industry',), _text),
+        ('company_size', ('company_size',), _text),
+    ], required=('company_name', 'email'), unique='email', password=True, defaults={'contact_person': ''}),
+    'jobs': ImportSpec('Jobs', 'job_id', [
+        ('title', ('title',), _text),
+        ('company', ('company',), _text),
+        ('job_type', ('job_type', 'type'), _text),
+        ('location', ('location',), _text),
+        ('salary', ('salary',), _text),
+        ('hours', ('hours',), _text),
+        ('description', ('description',), _text),
+        ('required_skills', ('required_skills', 'skills'), _skills),
+        ('posted', ('posted',), _text),
+        ('employer_id', ('employer_id',), _int),
+    ], required=('title', 'company'), defaults={'posted': 'Just now'}),
+}
+
+
+# ==================== READERS ====================
+
+def detect_format(filename=None, content_type=None):
+    """Work out 'csv' or 'jsonl' from a file name or content type (None if unknown)"""
+    if filename:
+        fmt = FORMATS.get(os.path.splitext(filename)[1].lower())
+        if fmt:
+            return fmt
+    if content_type:
+        return FORMATS.get(content_type.split(';')[0].strip().lower())
+    return None
+
+
+def read_records(stream, fmt):
+    """Yield records one by one from a text stream of CSV or JSONL
+
+    Lines that cannot be parsed are yielded as ValueError instances so they
+    can be reported against their row number.
+    """
+    if fmt == 'csv':
+        for record in csv.DictReader(stream):
+            yield {(k or '').strip().lower(): v for k, v in record.items()}
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield ValueError(f"Invalid JSON: {e.msg}")
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}'. Use csv or jsonl")
+
+
+# ==================== IMPORTER ====================
+
+class BulkImporter:
+    """Batched importer writing through a ConnectionPool"""
+
+    def __init__(self, pool, hash_password, integrity_errors=(), batch_size=DEFAULT_BATCH_SIZE,
+                 workers=DEFAULT_WORKERS):
+        self.pool = pool
+        self.hash_password = hash_password
+        self.integrity_errors = integrity_errors
+        self.batch_size = batch_size
+        self.workers = workers
+
+    def import_records(self, kind, records):
+        """Import an iterable of records; rows are numbered from 1 in input order"""
+        if kind not in IMPORT_SPECS:
+            raise ValueError(f"Unknown import type '{kind}'. Choose one of: {', '.join(IMPORT_SPECS)}")
+        spec = IMPORT_SPECS[kind]
+        result = {'kind': kind, 'processed': 0, 'inserted': 0, 'failed': 0, 'ids': [], 'errors': []}
+        started = time.perf_counter()
+
+        numbered = enumerate(records, 1)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, self.pool.connection() as conn:
+            pending = None
+            while True:
+                batch = list(islice(numbered, self.batch_size))
+                if not batch:
+                    break
+                rows = self._prepare(spec, batch, result)
+                # Hashing for this batch runs in the pool while the previous batch is written
+                hashes = executor.map(self._hash, [r[2] for r in rows]) if spec.password else None
+                if pending:
+                    self._write(conn, spec, *pending, result)
+                pending = (rows, hashes)
+            if pending:
+                self._write(conn, spec, *pending, result)
+
+        result['errors'].sort(key=lambda e: e['row'])
+        result['failed'] = len(result['errors'])
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Imported {result['inserted']}/{result['processed']} {kind} "
+                    f"({result['failed']} failed) in {result['elapsed_ms']} ms")
+        return result
+
+    def _prepare(self, spec, batch, result):
+        """Validate and convert a batch into (row_no, values, password) tuples"""
+        rows = []
+        for row_no, record in batch:
+            result['processed'] += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Record must be an object")
+                values = {}
+                for column, keys, convert in spec.columns:
+                    raw = next((record[k] for k in keys if record.get(k) not in (None, '')), None)
+                    try:
+                        values[column] = convert(raw) if raw is not None else spec.defaults.get(column)
+                    except (ValueError, TypeError):
+                        raise ValueError(f"Invalid value for {column}: {raw!r}")
+                missing = [c for c in spec.required if not values.get(c)]
+                password = record.get('password') if spec.password else None
+                if spec.password and not password:
+                    missing.append('password')
+                if missing:
+                    raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+                if spec.password and not isinstance(password, str):
+                    raise ValueError("Password must be a string")
+            except (ValueError, TypeError) as e:
+                self._error(result, spec, row_no, record, str(e))
+                continue
+            rows.append((row_no, tuple(values[c[0]] for c in spec.columns), password))
+        return rows
+
+    def _hash(self, password):
+        """Password hash, or the exception so that one bad row does not fail the whole import"""
+        try:
+            return self.hash_password(password)
+        except Exception as e:
+            return e
+
+    def _error(self, result, spec, row_no, record, message):
+        error = {'row': row_no, 'error': message}
+        if spec.unique and isinstance(record, dict) and record.get(spec.unique):
+            error[spec.unique] = record[spec.unique]
+        result['errors'].append(error)
+
+    def _write(self, conn, spec, rows, hashes, result):
+        """Insert one prepared batch, skipping duplicates and recording the new IDs"""
+        if hashes is not None:
+            hashed = []
+            for (row_no, values, _), password_hash in zip(rows, hashes):
+                if isinstance(password_hash, Exception):
+                    result['errors'].append({'row': row_no, 'error': f"Could not hash password: {password_hash}"})
+                else:
+                    hashed.append((row_no, values + (password_hash,), None))
+            rows = hashed
+        if spec.unique:
+            rows = self._drop_duplicates(conn, spec, rows, result)
+
+        per_statement = max(1, min(MAX_VALUES_ROWS, MAX_STATEMENT_PARAMS // len(spec.insert_columns)))
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            try:
+                inserted = self._insert(conn, spec, chunk)
+                conn.commit()
+            except self.integrity_errors:
+                # Someone else inserted a clashing row meanwhile: retry row by row
+                conn.rollback()
+                inserted = []
+                for row in chunk:
+                    try:
+                        inserted.extend(self._insert(conn, spec, [row]))
+                        conn.commit()
+                    except self.integrity_errors as e:
+                        conn.rollback()
+                        if spec.unique:
+                            key = row[1][spec.insert_columns.index(spec.unique)]
+                            result['errors'].append({'row': row[0], spec.unique: key,
+                                                     'error': f"{spec.unique.capitalize()} already exists"})
+                        else:
+                            result['errors'].append({'row': row[0], 'error': str(e)})
+            result['inserted'] += len(inserted)
+            result['ids'].extend({'row': row_no, 'id': new_id} for row_no, new_id in inserted)
+
+    def _drop_duplicates(self, conn, spec, rows, result):
+        """Report rows whose unique key repeats within the batch or already exists
+
+        Keys are compared ignoring case, like the email columns (case-insensitive
+        collation on SQL Server, COLLATE NOCASE on SQLite).
+        """
+        key_index = spec.insert_columns.index(spec.unique)
+        unique_rows, seen = [], set()
+        for row in rows:
+            key = row[1][key_index].lower()
+            if key in seen:
+                result['errors'].append({'row': row[0], spec.unique: row[1][key_index],
+                                         'error': f"Duplicate {spec.unique} in import"})
+            else:
+                seen.add(key)
+                unique_rows.append(row)
+
+        existing = set()
+        keys = [row[1][key_index] for row in unique_rows]
+        cursor = conn.cursor()
+        for start in range(0, len(keys), MAX_STATEMENT_PARAMS - 100):
+            chunk = keys[start:start + MAX_STATEMENT_PARAMS - 100]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'SELECT {spec.unique} FROM {spec.table} WHERE {spec.unique} IN ({placeholders})', chunk)
+            existing.update(row[0].lower() for row in cursor.fetchall())
+        if not existing:
+            return unique_rows
+
+        remaining = []
+        for row in unique_rows:
+            if row[1][key_index].lower() in existing:
+                result['errors'].append({'row': row[0], spec.unique: row[1][key_index],
+                                         'error': f"{spec.unique.capitalize()} already exists"})
+            else:
+                remaining.append(row)
+        return remaining
+
+    def _insert(self, conn, spec, rows):
+        """Insert rows with INSERT ... OUTPUT INSERTED and return [(row_no, new_id)]
+
+        Rows with a unique key go in one multi-row INSERT and the new IDs are
+        matched back on that key. The order of OUTPUT rows (and of identity
+        values) is not guaranteed, so rows without one are inserted one by one.
+        """
+        columns = ', '.join(spec.insert_columns)
+        cursor = conn.cursor()
+        if not spec.unique:
+            placeholders = '(' + ', '.join('?' * len(spec.insert_columns)) + ')'
+            inserted = []
+            for row in rows:
+                cursor.execute(f'INSERT INTO {spec.table} ({columns}) OUTPUT INSERTED.{spec.id_column} '
+                               f'VALUES {placeholders}', row[1])
+                inserted.append((row[0], int(cursor.fetchone()[0])))
+            return inserted
+
+        placeholders = ', '.join(['(' + ', '.join('?' * len(spec.insert_columns)) + ')'] * len(rows))
+        cursor.execute(f'INSERT INTO {spec.table} ({columns}) OUTPUT INSERTED.{spec.id_column}, '
+                       f'INSERTED.{spec.unique} VALUES {placeholders}',
+                       [value for row in rows for value in row[1]])
+        by_key = {str(r[1]).lower(): int(r[0]) for r in cursor.fetchall()}
+        key_index = spec.insert_columns.index(spec.unique)
+        return [(row[0], by_key[row[1][key_index].lower()]) for row in rows]
+
+
+# ==================== COMMAND LINE ====================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk import StudentConnect records from CSV or JSONL')
+    parser.add_argument('kind', choices=sorted(IMPORT_SPECS))
+    parser.add_argument('file', help='CSV or JSONL file')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='defaults to the file extension')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='password hashing threads')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.file)
+    if not fmt:
+        parser.error('cannot tell the file format from its name; pass --format')
+
+    from app_backend import db_pool, storage
+    from passwords import hash_password
+    importer = BulkImporter(db_pool, hash_password, storage.integrity_errors,
+                            batch_size=args.batch_size, workers=args.workers)
+    with open(args.file, encoding='utf-8-sig', newline='') as f:
+        result = importer.import_records(args.kind, read_records(f, fmt))
+
+    for error in result['errors']:
+        print(f"  row {error['row']}: {error['error']}")
+    print(f"\n✓ Imported {result['inserted']} of {result['processed']} {args.kind} "
+          f"in {result['elapsed_ms']} ms ({result['failed']} failed)")
+    return 0 if not result['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
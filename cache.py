@@ -0,0 +1,208 @@
+# cache.py - Caching Layer for StudentConnect
+"""
+Read-through cache for hot API responses
+CacheBackend defines the interface; LRUTTLCache is the in-process
+implementation (least-recently-used eviction plus per-entry expiry).
+Entries carry tags so writes can invalidate exactly the keys they affect.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from config import CACHE_BACKEND
+
+
+class CacheBackend:
+    """Interface for cache backends"""
+
+    name = None
+
+    def get(self, key):
+        """Return the cached value or None"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None, tags=()):
+        """Store a value, optionally with its own TTL and invalidation tags"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove one key"""
+        raise NotImplementedError
+
+    def invalidate_tags(self, *tags):
+        """Remove every key stored with any of the given tags"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove everything"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Return a dict of cache counters"""
+        raise NotImplementedError
+
+    def get_or_load(self, key, loader, ttl=None, tags=()):
+        """Return (value, hit), calling loader() and caching its result on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = loader()
+        self.set(key, value, ttl=ttl, tags=tags)
+        return value, False
+
+    def get_or_load_many(self, keys, loader, ttl=None, tags=None):
+        """Return {key: (value, hit)}, loading all the missing keys with one loader(missing) call
+
+        loader returns {key: value} for the keys it is given; tags maps a key to its tags.
+        """
+        results = {key: (self.get(key), True) for key in keys}
+        missing = [key for key, (value, _) in results.items() if value is None]
+        if missing:
+            for key, value in loader(missing).items():
+                self.set(key, value, ttl=ttl, tags=(tags or {}).get(key, ()))
+                results[key] = (value, False)
+        return results
+
+
+class LRUTTLCache(CacheBackend):
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=1024, default_ttl=60.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags)
+        self._tags = {}                # tag -> set of keys
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so loads that raced with a write are not cached
+        self._epoch = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove_locked(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None, tags=()):
+        with self._lock:
+            self._set_locked(key, value, ttl, tags)
+
+    def _set_locked(self, key, value, ttl, tags):
+        self._remove_locked(key)
+        expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires, tuple(tags))
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove_locked(oldest)
+            self._evictions += 1
+
+    def _remove_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._epoch += 1
+            if self._remove_locked(key):
+                self._invalidations += 1
+
+    def invalidate_tags(self, *tags):
+        with self._lock:
+            self._epoch += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove_locked(key)
+                    self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def get_or_load(self, key, loader, ttl=None, tags=()):
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        with self._lock:
+            epoch = self._epoch
+        value = loader()
+        with self._lock:
+            # A write landed while loading; the value may already be stale, so don't keep it
+            if epoch == self._epoch:
+                self._set_locked(key, value, ttl, tags)
+        return value, False
+
+    def get_or_load_many(self, keys, loader, ttl=None, tags=None):
+        results = {key: (self.get(key), True) for key in keys}
+        missing = [key for key, (value, _) in results.items() if value is None]
+        if not missing:
+            return results
+        with self._lock:
+            epoch = self._epoch
+        loaded = loader(missing)
+        with self._lock:
+            keep = epoch == self._epoch
+            for key, value in loaded.items():
+                if keep:
+                    self._set_locked(key, value, ttl, (tags or {}).get(key, ()))
+                results[key] = (value, False)
+        return results
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': self.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'default_ttl': self.default_ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations
+            }
+
+
+CACHE_BACKENDS = {
+    'memory': LRUTTLCache
+}
+
+
+def create_cache_backend(name=None, **options):
+    """Create a cache backend by name"""
+    name = (name or CACHE_BACKEND).lower()
+    if name not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend '{name}'. Choose one of: {', '.join(CACHE_BACKENDS)}")
+    return CACHE_BACKENDS[name](**options)
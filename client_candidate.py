@@ -14,13 +14,30 @@ class StudentConnectClient:
         self.base_url = base_url
         self.session = requests.Session()
         self.current_user = None
+        # Conditional GET cache: request -> (ETag, Last-Modified, parsed body)
+        self._response_cache = {}
     
     def _make_request(self, method, endpoint, data=None, params=None):
         """Make HTTP request to the API"""
         url = f"{self.base_url}{endpoint}"
         try:
             if method == 'GET':
-                response = self.session.get(url, params=params)
+                cache_key = (url, tuple(sorted((params or {}).items())))
+                cached = self._response_cache.get(cache_key)
+                headers = {}
+                if cached:
+                    if cached[0]:
+                        headers['If-None-Match'] = cached[0]
+                    if cached[1]:
+                        headers['If-Modified-Since'] = cached[1]
+                response = self.session.get(url, params=params, headers=headers)
+                if response.status_code == 304 and cached:
+                    return cached[2]
+                if response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+                    body = response.json()
+                    self._response_cache[cache_key] = (response.headers.get('ETag'),
+                                                       response.headers.get('Last-Modified'), body)
+                    return body
             elif method == 'POST':
                 response = self.session.post(url, json=data)
             elif method == 'DELETE':
@@ -81,11 +98,32 @@ class StudentConnectClient:
             self.current_user = response.get('user')
         return response
     
+    # ==================== AUTOCOMPLETE ====================
+    
+    def suggest_values(self, field, prefix, limit=5):
+        """Values already in use for university, major, company or location that match prefix"""
+        return self._make_request('GET', f'/api/autocomplete/{field}', params={'q': prefix, 'limit': limit})
+    
     # ==================== JOBS ====================
     
-    def get_jobs(self):
-        """Get all jobs"""
-        return self._make_request('GET', '/api/jobs')
+    def get_jobs(self, cursor=None, page_size=20, **filters):
+        """Get one page of jobs (filters: job_type, location, employer_id, skill, search)"""
+        params = {'page_size': page_size, **{k: v for k, v in filters.items() if v}}
+        if cursor:
+            params['cursor'] = cursor
+        return self._make_request('GET', '/api/jobs', params=params)
+    
+    def find_job(self, job_id):
+        """Find a job by ID, following next_cursor through the pages"""
+        cursor = None
+        while True:
+            result = self.get_jobs(cursor=cursor, page_size=100)
+            if not result.get('success'):
+                return None
+            job = next((j for j in result.get('jobs', []) if j['id'] == job_id), None)
+            if job or not result.get('next_cursor'):
+                return job
+            cursor = result['next_cursor']
     
     def create_job(self, title, company, **kwargs):
         """Create a new job"""
@@ -211,8 +249,8 @@ class StudentConnectClient:
         email = input("Email: ")
         password = input("Password: ")
         phone = input("Phone (optional): ")
-        university = input("University: ")
-        major = input("Major: ")
+        university = self._cli_input_value("University: ", 'university')
+        major = self._cli_input_value("Major: ", 'major')
         year = input("Year of Study (1-4): ")
         
         result = self.register_student(
@@ -234,7 +272,7 @@ class StudentConnectClient:
     def _cli_register_employer(self):
         """CLI: Register employer"""
         print("\n=== EMPLOYER REGISTRATION ===")
-        company = input("Company Name: ")
+        company = self._cli_input_value("Company Name: ", 'company')
         email = input("Email: ")
         password = input("Password: ")
         phone = input("Phone (optional): ")
@@ -252,6 +290,22 @@ class StudentConnectClient:
         else:
             print(f"\n✗ Error: {result.get('message', 'Registration failed')}")
     
+    def _cli_input_value(self, prompt, field):
+        """CLI: Read a free-text value, offering matching values that are already in use"""
+        value = input(prompt).strip()
+        if not value:
+            return value
+        suggestions = [s['value'] for s in self.suggest_values(field, value).get('suggestions', [])]
+        if not suggestions or value in suggestions:
+            return value
+        print("  Did you mean:")
+        for i, suggestion in enumerate(suggestions, 1):
+            print(f"    {i}. {suggestion}")
+        choice = input(f"  Choose 1-{len(suggestions)} or press Enter to keep '{value}': ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(suggestions):
+            return suggestions[int(choice) - 1]
+        return value
+    
     def _cli_login_student(self):
         """CLI: Student login"""
         print("\n=== STUDENT LOGIN ===")
@@ -279,24 +333,34 @@ class StudentConnectClient:
             print(f"\n✗ Error: {result.get('message', 'Invalid credentials')}")
     
     def _cli_view_jobs(self):
-        """CLI: View all jobs"""
-        result = self.get_jobs()
-        
-        if result.get('success'):
+        """CLI: View jobs one page at a time"""
+        cursor = None
+        shown = 0
+        while True:
+            result = self.get_jobs(cursor=cursor)
+            
+            if not result.get('success'):
+                print(f"\n✗ Error: {result.get('message', 'Failed to load jobs')}")
+                return
+            
             jobs = result.get('jobs', [])
-            if not jobs:
+            if not jobs and not shown:
                 print("\n📭 No jobs available")
                 return
             
-            print("\n=== AVAILABLE JOBS ===")
-            print(f"\n{'ID':<5} {'Title':<30} {'Company':<25} {'Type':<15} {'Location':<20}")
-            print("-" * 100)
+            if not shown:
+                print("\n=== AVAILABLE JOBS ===")
+                print(f"\n{'ID':<5} {'Title':<30} {'Company':<25} {'Type':<15} {'Location':<20}")
+                print("-" * 100)
             for job in jobs:
                 print(f"{job['id']:<5} {job['title']:<30} {job['company']:<25} "
                       f"{job['type'] or 'N/A':<15} {job['location'] or 'N/A':<20}")
-            print(f"\nTotal Jobs: {len(jobs)}")
-        else:
-            print(f"\n✗ Error: {result.get('message', 'Failed to load jobs')}")
+            shown += len(jobs)
+            
+            cursor = result.get('next_cursor')
+            if not cursor or input("\nShow more jobs? (yes/no): ").lower() != 'yes':
+                break
+        print(f"\nJobs shown: {shown}")
     
     def _cli_student_menu(self):
         """CLI: Student menu"""
@@ -351,12 +415,7 @@ class StudentConnectClient:
             print("✗ Invalid Job ID")
             return
         
-        jobs_result = self.get_jobs()
-        if not jobs_result.get('success'):
-            print(f"\n✗ Error: {jobs_result.get('message')}")
-            return
-        
-        job = next((j for j in jobs_result.get('jobs', []) if j['id'] == int(job_id)), None)
+        job = self.find_job(int(job_id))
         if not job:
             print("\n✗ Job not found")
             return
@@ -442,7 +501,7 @@ class StudentConnectClient:
         print("\n=== POST NEW JOB ===")
         title = input("Job Title: ")
         job_type = input("Type (part-time/internship/contract): ")
-        location = input("Location: ")
+        location = self._cli_input_value("Location: ", 'location')
         salary = input("Salary (e.g., €15-20/hr): ")
         hours = input("Hours per week: ")
         description = input("Description: ")
@@ -0,0 +1,71 @@
+# config.py - Configuration for StudentConnect
+"""
+Central configuration for StudentConnect
+Values can be overridden with STUDENTCONNECT_* environment variables
+"""
+
+import os
+
+# Storage backend: 'sqlserver' (production) or 'sqlite' (local / benchmarks)
+DB_BACKEND = os.environ.get('STUDENTCONNECT_DB_BACKEND', 'sqlserver')
+
+# SQL Server Configuration
+DB_CONFIG = {
+    'driver': os.environ.get('STUDENTCONNECT_DB_DRIVER', '{ODBC Driver 17 for SQL Server}'),
+    'server': os.environ.get('STUDENTCONNECT_DB_SERVER', 'localhost'),
+    'database': os.environ.get('STUDENTCONNECT_DB_NAME', 'StudentConnectDB'),
+    'trusted_connection': 'yes'
+}
+
+# SQLite Configuration (path ':memory:' keeps the database in RAM)
+SQLITE_CONFIG = {
+    'path': os.environ.get('STUDENTCONNECT_SQLITE_PATH', 'studentconnect.sqlite3'),
+    'seed_file': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'StudentConnectDB.sql')
+}
+
+# Response cache backend: 'memory' (in-process LRU with TTL)
+CACHE_BACKEND = os.environ.get('STUDENTCONNECT_CACHE_BACKEND', 'memory')
+
+# Legacy salt, only used to verify old salted SHA-256 hashes
+PASSWORD_SALT = os.environ.get('STUDENTCONNECT_PASSWORD_SALT', 'studentconnect-salt-2025')
+
+# Password hashing: scheme 'scrypt' or 'pbkdf2-sha256'; tune costs with 'python passwords.py'
+PASSWORD_HASH_CONFIG = {
+    'scheme': os.environ.get('STUDENTCONNECT_PASSWORD_SCHEME', 'scrypt'),
+    'scrypt_ln': int(os.environ.get('STUDENTCONNECT_SCRYPT_LN', 14)),
+    'scrypt_r': 8,
+    'scrypt_p': 1,
+    'pbkdf2_iterations': int(os.environ.get('STUDENTCONNECT_PBKDF2_ITERATIONS', 600000)),
+    'workers': int(os.environ.get('STUDENTCONNECT_HASH_WORKERS', os.cpu_count() or 2)),
+    'max_queue': int(os.environ.get('STUDENTCONNECT_HASH_MAX_QUEUE', 64))
+}
+
+# Days a referee has to answer a reference request before it expires
+REFERENCE_EXPIRY_DAYS = int(os.environ.get('STUDENTCONNECT_REFERENCE_EXPIRY_DAYS', 30))
+
+# Analytics snapshots (python analytics.py snapshot) and other data derived from the
+# database, such as trend buckets and the job search index, are written here
+ANALYTICS_DIR = os.environ.get('STUDENTCONNECT_ANALYTICS_DIR',
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analytics_snapshots'))
+
+# Production server (python serve.py): worker processes, request threads per worker, seconds a
+# stopping worker gets to finish in-flight requests, and seconds an idle keep-alive connection is kept
+SERVER_CONFIG = {
+    'workers': int(os.environ.get('STUDENTCONNECT_WORKERS', os.cpu_count() or 2)),
+    'threads': int(os.environ.get('STUDENTCONNECT_THREADS', 8)),
+    'graceful_timeout': float(os.environ.get('STUDENTCONNECT_GRACEFUL_TIMEOUT', 30)),
+    'keepalive_timeout': float(os.environ.get('STUDENTCONNECT_KEEPALIVE_TIMEOUT', 5))
+}
+
+# Number of processes serving the app; serve.py sets it for its workers. Caches that only the
+# process handling a write can invalidate are turned off when there is more than one.
+SERVER_PROCESSES = int(os.environ.get('STUDENTCONNECT_SERVER_PROCESSES', 1))
+
+def get_connection_string():
+    """Build the ODBC connection string for SQL Server"""
+    return (
+        f"DRIVER={DB_CONFIG['driver']};"
+        f"SERVER={DB_CONFIG['server']};"
+        f"DATABASE={DB_CONFIG['database']};"
+        f"Trusted_Connection={DB_CONFIG['trusted_connection']};"
+    )
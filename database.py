@@ -4,27 +4,29 @@ Database operations module for StudentConnect
 Handles all database connections and queries
 """
 
-import pyodbc
 import logging
-from datetime import datetime, timedelta
-import hashlib
-import uuid
-from config import get_connection_string, PASSWORD_SALT
+import reference_stats
+from notifications import mark_read
+from references import expiry_from, new_token
+from passwords import hash_password, needs_rehash, verify_password
+from storage import get_storage_backend
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DatabaseHandler:
-    def __init__(self):
+    def __init__(self, storage=None, notifier=None):
+        self.storage = storage or get_storage_backend()
+        self.notifier = notifier  # optional NotificationDispatcher for background inserts
         self.connection = None
         self.connect()
     
     def connect(self):
         """Establish database connection"""
         try:
-            conn_str = get_connection_string()
-            self.connection = pyodbc.connect(conn_str)
-            logger.info("Database connection established")
+            self.connection = self.storage.connect()
+            reference_stats.ensure_built(self.connection)
+            logger.info(f"Database connection established ({self.storage.name})")
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
             raise
@@ -55,9 +57,8 @@ class DatabaseHandler:
             raise
     
     def hash_password(self, password):
-        """Hash password with salt"""
-        salted = password + PASSWORD_SALT
-        return hashlib.sha256(salted.encode()).hexdigest()
+        """Hash password with the configured KDF"""
+        return hash_password(password)
     
     def verify_connection(self):
         """Verify database connection is active"""
@@ -92,15 +93,19 @@ class DatabaseHandler:
     def authenticate_student(self, email, password):
         """Authenticate student login"""
         query = '''
-            SELECT student_id, full_name, email, university, major
+            SELECT student_id, full_name, email, university, major, password_hash
             FROM Students
-            WHERE email = ? AND password_hash = ?
+            WHERE email = ?
         '''
-        password_hash = self.hash_password(password)
-        results = self.execute_query(query, (email, password_hash), fetch=True)
+        results = self.execute_query(query, (email,), fetch=True)
         
-        if results:
+        if results and verify_password(password, results[0][5]):
             row = results[0]
+            if needs_rehash(row[5]):
+                self.execute_query(
+                    'UPDATE Students SET password_hash = ? WHERE student_id = ?',
+                    (self.hash_password(password), row[0])
+                )
             return {
                 'student_id': int(row[0]),
                 'full_name': row[1],
@@ -129,14 +134,15 @@ class DatabaseHandler:
     
     # Reference Operations
     def create_reference_request(self, reference_data):
-        """Create a new reference request"""
-        token = str(uuid.uuid4())
-        expiry = datetime.now() + timedelta(days=30)
+        """Create a new reference request and count it in the reference stats"""
+        token = new_token()
+        expiry = expiry_from()
         
         query = '''
             INSERT INTO StudentReferences 
             (student_id, referee_name, referee_email, referee_phone, 
              relationship, company, token, expiry_date)
+            OUTPUT INSERTED.reference_id
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         '''
         params = (
@@ -149,9 +155,16 @@ class DatabaseHandler:
             token,
             expiry
         )
-        cursor = self.execute_query(query, params)
-        cursor.execute('SELECT @@IDENTITY')
-        reference_id = int(cursor.fetchone()[0])
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            reference_id = int(cursor.fetchone()[0])
+            reference_stats.apply_deltas(cursor, {int(reference_data['student_id']): reference_stats.CREATED})
+            self.connection.commit()
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            self.connection.rollback()
+            raise
         return reference_id, token
     
     def get_student_references(self, student_id):
@@ -181,41 +194,46 @@ class DatabaseHandler:
         return references
     
     def submit_reference_response(self, reference_id, reference_text, rating):
-        """Submit a reference response"""
+        """Submit a response to a pending reference request; False if it is not pending"""
         query = '''
             UPDATE StudentReferences
             SET status = 'completed',
                 response_date = GETDATE(),
                 reference_text = ?,
                 rating = ?
-            WHERE reference_id = ?
+            OUTPUT INSERTED.student_id
+            WHERE reference_id = ? AND status = 'pending'
         '''
-        self.execute_query(query, (reference_text, rating, reference_id))
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, (reference_text, rating, reference_id))
+            row = cursor.fetchone()
+            if row is not None:
+                reference_stats.apply_deltas(cursor, {int(row[0]): reference_stats.completed(rating)})
+            self.connection.commit()
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            self.connection.rollback()
+            raise
+        return row is not None
     
     def get_reference_stats(self, student_id):
-        """Get reference statistics for a student"""
-        query = '''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                AVG(CAST(rating AS FLOAT)) as avg_rating
-            FROM StudentReferences
-            WHERE student_id = ?
-        '''
-        results = self.execute_query(query, (student_id,), fetch=True)
-        row = results[0]
+        """Get reference statistics for a student (one lookup in ReferenceStats)"""
+        stats = reference_stats.get_stats(self.connection.cursor(), student_id)
         
         return {
-            'total': int(row[0]) if row[0] else 0,
-            'completed': int(row[1]) if row[1] else 0,
-            'pending': int(row[2]) if row[2] else 0,
-            'avg_rating': round(float(row[3]), 2) if row[3] else 0.0
+            'total': stats['total'],
+            'completed': stats['completed'],
+            'pending': stats['pending'],
+            'avg_rating': stats['avg_rating']
         }
     
     # Notification Operations
     def create_notification(self, recipient_id, recipient_type, message, notification_type):
-        """Create a new notification"""
+        """Create a new notification (queued when a NotificationDispatcher is attached)"""
+        if self.notifier is not None:
+            self.notifier.enqueue(recipient_id, recipient_type, message, notification_type)
+            return
         query = '''
             INSERT INTO Notifications (recipient_id, recipient_type, message, notification_type)
             VALUES (?, ?, ?, ?)
@@ -246,4 +264,15 @@ class DatabaseHandler:
     def mark_notification_read(self, notification_id):
         """Mark a notification as read"""
         query = 'UPDATE Notifications SET is_read = 1 WHERE notification_id = ?'
-        self.execute_query(query, (notification_id,))
\ No newline at end of file
+        self.execute_query(query, (notification_id,))
+    
+    def mark_notifications_read(self, user_id, user_type, ids=None, before=None):
+        """Mark a user's notifications read by ID list and/or up to a timestamp; returns the number changed"""
+        try:
+            updated = mark_read(self.connection, user_id, user_type, ids=ids, before=before)
+            self.connection.commit()
+            return updated
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            self.connection.rollback()
+            raise
\ No newline at end of file
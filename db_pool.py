@@ -0,0 +1,223 @@
+# db_pool.py - Database Connection Pool for StudentConnect
+"""
+Thread-safe connection pool for StudentConnect
+Keeps a bounded set of open database connections that are shared by all
+Flask worker threads instead of opening a new connection per request
+A forked child process (serve.py workers) starts with an empty pool and
+opens its own connections.
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable database connections"""
+
+    def __init__(self, connect, max_size=10, checkout_timeout=5.0,
+                 max_idle=300.0, health_check_interval=30.0):
+        """
+        connect                - callable that opens a new DB-API connection
+        max_size               - maximum number of open connections
+        checkout_timeout       - seconds to wait for a free connection
+        max_idle               - seconds an unused connection is kept open
+        health_check_interval  - idle seconds after which a connection is
+                                 pinged with SELECT 1 before being handed out
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()  # (connection, returned_at), most recent on the right
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Metrics
+        self._checkouts = 0
+        self._checkout_failures = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._evicted = 0
+        self._health_check_failures = 0
+
+        # Connections inherited from the parent process are never used or closed by a forked child
+        self._inherited = []
+        if hasattr(os, 'register_at_fork'):
+            reset = weakref.WeakMethod(self._reset_after_fork)
+            os.register_at_fork(after_in_child=lambda: reset() and reset()())
+
+    # ==================== CHECKOUT / RETURN ====================
+
+    def acquire(self):
+        """Check out a connection, waiting up to checkout_timeout seconds"""
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        conn, returned_at = None, None
+
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._evict_idle_locked(time.monotonic())
+
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._checkout_failures += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.checkout_timeout}s "
+                        f"({self._in_use} in use, max {self.max_size})"
+                    )
+                self._waits += 1
+                self._available.wait(remaining)
+
+            self._in_use += 1
+
+        # Connecting and pinging happen outside the lock so other threads are not blocked
+        try:
+            if conn is not None and time.monotonic() - returned_at >= self.health_check_interval:
+                if not self._is_healthy(conn):
+                    with self._lock:
+                        self._health_check_failures += 1
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._available:
+                self._size -= 1
+                self._in_use -= 1
+                self._checkout_failures += 1
+                self._available.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it if it is no longer usable"""
+        if not discard:
+            try:
+                # Never hand the next caller a connection with an open transaction
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding pooled connection after failed rollback: {e}")
+                discard = True
+
+        with self._available:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                to_close = conn
+            else:
+                self._idle.append((conn, time.monotonic()))
+                to_close = None
+            self._available.notify()
+
+        if to_close is not None:
+            self._close_quietly(to_close)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that always returns the connection to the pool"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    # ==================== MAINTENANCE ====================
+
+    def _is_healthy(self, conn):
+        """Verify a pooled connection is still alive"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self, now):
+        """Close connections idle for longer than max_idle (caller holds the lock)"""
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _reset_after_fork(self):
+        """Start a forked child with fresh locks and no connections (the parent keeps using its own)"""
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        # Closing a socket shared with the parent could end the parent's session, so only drop them
+        self._inherited.extend(conn for conn, _ in self._idle)
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+
+    def close_all(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._available:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+        logger.info("Connection pool closed")
+
+    # ==================== METRICS ====================
+
+    def stats(self):
+        """Return a snapshot of pool usage metrics"""
+        with self._lock:
+            self._evict_idle_locked(time.monotonic())
+            return {
+                'max_size': self.max_size,
+                'open': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'checkout_failures': self._checkout_failures,
+                'waits': self._waits,
+                'wait_time_total_ms': round(self._wait_total * 1000, 3),
+                'wait_time_avg_ms': round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                'wait_time_max_ms': round(self._wait_max * 1000, 3),
+                'evicted_idle': self._evicted,
+                'health_check_failures': self._health_check_failures
+            }
@@ -0,0 +1,144 @@
+# export.py - Streaming Exports for StudentConnect
+"""
+Streams whole tables as NDJSON or CSV in constant memory
+Rows are read from the cursor with fetchmany and encoded batch by batch,
+so the first byte goes out straight away whatever the table size. An optional
+updated_since timestamp limits the export to rows whose change timestamps
+(ExportSpec.changed_columns) are later; the response carries a watermark to
+pass as updated_since next time. The watermark is the latest change in a
+second that has already ended, so changes made later in the current second
+are not skipped (they may be sent twice, so consumers upsert by ID).
+
+Deltas are insert-only: the tables have no updated_at column, so a delta holds
+new rows (and, for references, newly answered ones). Profile edits, status
+changes, references expired by the sweeper and read flags only show up in a
+full export.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+FETCH_SIZE = 1000
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+class ExportSpec:
+    """Columns of one exported table and the timestamps that mark a row as changed"""
+
+    def __init__(self, table, id_column, columns, changed_columns):
+        self.table = table
+        self.id_column = id_column
+        self.columns = columns
+        self.changed_columns = changed_columns
+
+
+# Password hashes and reference tokens are never exported
+EXPORTS = {
+    'students': ExportSpec('Students', 'student_id', [
+        'student_id', 'full_name', 'email', 'phone', 'university', 'major', 'gpa', 'skills', 'created_at'
+    ], ['created_at']),
+    'employers': ExportSpec('Employers', 'employer_id', [
+        'employer_id', 'company_name', 'contact_person', 'email', 'phone', 'industry', 'company_size',
+        'website', 'created_at'
+    ], ['created_at']),
+    'jobs': ExportSpec('Jobs', 'job_id', [
+        'job_id', 'title', 'company', 'job_type', 'location', 'salary', 'hours', 'description',
+        'required_skills', 'posted', 'employer_id', 'created_at'
+    ], ['created_at']),
+    'applications': ExportSpec('Applications', 'application_id', [
+        'application_id', 'job_id', 'student_id', 'job_title', 'company', 'applied_date', 'status', 'cover_letter'
+    ], ['applied_date']),
+    'references': ExportSpec('StudentReferences', 'reference_id', [
+        'reference_id', 'student_id', 'referee_name', 'referee_email', 'referee_phone', 'relationship',
+        'company', 'position', 'request_date', 'status', 'response_date', 'reference_text', 'rating',
+        'expiry_date'
+    ], ['request_date', 'response_date']),
+    'notifications': ExportSpec('Notifications', 'notification_id', [
+        'notification_id', 'recipient_id', 'recipient_type', 'message', 'notification_type', 'is_read',
+        'created_at'
+    ], ['created_at']),
+}
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def export_watermark(conn, spec):
+    """Latest change timestamp in a second that has ended, taken before the rows are read
+
+    Timestamps only have whole seconds, and a row can still be inserted or
+    answered in the current one, so the current second stays open for the
+    next export. The database clock decides what "current" is.
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT GETDATE()')
+    current_second = _as_datetime(cursor.fetchone()[0]).replace(microsecond=0)
+    parts = ' UNION ALL '.join(f'SELECT MAX({c}) AS ts FROM {spec.table} WHERE {c} < ?'
+                               for c in spec.changed_columns)
+    cursor.execute(f'SELECT MAX(ts) FROM ({parts}) AS changes', [current_second] * len(spec.changed_columns))
+    value = _as_datetime(cursor.fetchone()[0])
+    return value.isoformat() if value else None
+
+
+def iter_batches(conn, spec, updated_since=None, fetch_size=FETCH_SIZE):
+    """Yield lists of row tuples in ID order, optionally only rows changed after updated_since"""
+    sql = f"SELECT {', '.join(spec.columns)} FROM {spec.table}"
+    params = []
+    if updated_since is not None:
+        sql += ' WHERE ' + ' OR '.join(f'{c} > ?' for c in spec.changed_columns)
+        params = [updated_since] * len(spec.changed_columns)
+    sql += f' ORDER BY {spec.id_column}'
+
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def ndjson_chunks(spec, batches):
+    """Encode batches of rows as one JSON object per line, one chunk per batch"""
+    columns = spec.columns
+    for rows in batches:
+        yield ''.join(
+            json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, ensure_ascii=False) + '\n'
+            for row in rows
+        )
+
+
+def csv_chunks(spec, batches):
+    """Encode batches of rows as CSV, header first, one chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(spec.columns)
+    for rows in batches:
+        writer.writerows([_json_value(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+ENCODERS = {
+    'ndjson': ndjson_chunks,
+    'csv': csv_chunks
+}
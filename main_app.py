@@ -6,33 +6,28 @@ Command Line Interface for Admin Operations
 
 import sys
 import os
-import pyodbc
+import time
 from datetime import datetime
+import reference_stats
+from storage import get_storage_backend
+
+# Report aggregates are reused for this many seconds before being queried again
+REPORT_SNAPSHOT_TTL = 60
 
 class StudentConnectApp:
     """Main application class for CLI interface"""
     
     def __init__(self):
         """Initialize the application with database connection"""
-        self.db_config = {
-            'driver': '{ODBC Driver 17 for SQL Server}',
-            'server': 'localhost',
-            'database': 'StudentConnectDB',
-            'trusted_connection': 'yes'
-        }
+        self.storage = get_storage_backend()
         self.conn = None
+        self.report_snapshot = None
         self.initialize_database()
     
     def get_connection(self):
         """Get database connection"""
         if not self.conn:
-            conn_str = (
-                f"DRIVER={self.db_config['driver']};"
-                f"SERVER={self.db_config['server']};"
-                f"DATABASE={self.db_config['database']};"
-                f"Trusted_Connection={self.db_config['trusted_connection']};"
-            )
-            self.conn = pyodbc.connect(conn_str)
+            self.conn = self.storage.connect()
         return self.conn
     
     def initialize_database(self):
@@ -40,12 +35,13 @@ class StudentConnectApp:
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM Users")
+            cursor.execute("SELECT COUNT(*) FROM Students")
+            reference_stats.ensure_built(conn)
             print("✓ Database connected successfully!")
         except Exception as e:
             print(f"✗ Database connection error: {e}")
             print("\nPlease ensure:")
-            print("  1. SQL Server is running")
+            print(f"  1. The '{self.storage.name}' database is reachable (see config.py)")
             print("  2. StudentConnectDB database exists")
             print("  3. Tables are created (run StudentConnectDB.sql)")
             sys.exit(1)
@@ -606,7 +602,8 @@ class StudentConnectApp:
             print("1. System Overview")
             print("2. Application Statistics")
             print("3. Reference Statistics")
-            print("4. Back to Main Menu")
+            print("4. Refresh Report Data")
+            print("5. Back to Main Menu")
             
             choice = input("\nEnter your choice: ")
             
@@ -617,93 +614,107 @@ class StudentConnectApp:
             elif choice == '3':
                 self.reference_statistics()
             elif choice == '4':
+                self.get_report_snapshot(refresh=True)
+                self.print_snapshot_info()
+            elif choice == '5':
                 break
             else:
                 print("Invalid choice! Please try again.")
     
-    def system_overview(self):
-        """Display system overview statistics"""
-        print("\n--- SYSTEM OVERVIEW ---")
+    def get_report_snapshot(self, refresh=False):
+        """All report aggregates from one batched query, reused for REPORT_SNAPSHOT_TTL seconds"""
+        if not refresh and self.report_snapshot and time.monotonic() < self.report_snapshot['expires']:
+            return self.report_snapshot
+        
         conn = self.get_connection()
         cursor = conn.cursor()
+        started = time.perf_counter()
+        
+        # Each branch yields (section, label, count); reference counts come from the
+        # ReferenceStats global row instead of a scan of StudentReferences
+        reference_branches = ''.join(
+            f"UNION ALL SELECT 'references', '{counter}', {counter} FROM ReferenceStats "
+            f"WHERE student_id = {reference_stats.GLOBAL_ID} "
+            for counter in reference_stats.COUNTERS
+        )
+        cursor.execute(f"""
+            SELECT 'totals' AS section, 'students' AS label, COUNT(*) AS total FROM Students
+            UNION ALL SELECT 'totals', 'employers', COUNT(*) FROM Employers
+            UNION ALL SELECT 'totals', 'jobs', COUNT(*) FROM Jobs
+            UNION ALL SELECT 'totals', 'applications', COUNT(*) FROM Applications
+            UNION ALL SELECT 'application_status', status, COUNT(*) FROM Applications GROUP BY status
+            {reference_branches}
+        """)
         
-        # Students count
-        cursor.execute("SELECT COUNT(*) FROM Users WHERE type = 'student'")
-        students = cursor.fetchone()[0]
-        
-        # Employers count
-        cursor.execute("SELECT COUNT(*) FROM Users WHERE type = 'employer'")
-        employers = cursor.fetchone()[0]
-        
-        # Jobs count
-        cursor.execute("SELECT COUNT(*) FROM Jobs")
-        jobs = cursor.fetchone()[0]
-        
-        # Applications count
-        cursor.execute("SELECT COUNT(*) FROM Applications")
-        apps = cursor.fetchone()[0]
+        snapshot = {
+            'totals': {'students': 0, 'employers': 0, 'jobs': 0, 'applications': 0},
+            'application_status': {},
+            'references': dict.fromkeys(reference_stats.COUNTERS, 0)
+        }
+        for section, label, total in cursor.fetchall():
+            snapshot[section][label] = int(total or 0)
         
-        # References count
-        cursor.execute("SELECT COUNT(*) FROM [References]")
-        refs = cursor.fetchone()[0]
+        snapshot['as_of'] = datetime.now()
+        snapshot['query_ms'] = (time.perf_counter() - started) * 1000
+        snapshot['expires'] = time.monotonic() + REPORT_SNAPSHOT_TTL
+        self.report_snapshot = snapshot
+        return snapshot
+    
+    def print_snapshot_info(self):
+        """Show when the report data was taken and what the query cost"""
+        snapshot = self.report_snapshot
+        print(f"\nAs of {snapshot['as_of'].strftime('%Y-%m-%d %H:%M:%S')} "
+              f"(report query took {snapshot['query_ms']:.1f} ms)")
+    
+    def system_overview(self):
+        """Display system overview statistics"""
+        print("\n--- SYSTEM OVERVIEW ---")
+        snapshot = self.get_report_snapshot()
+        totals = snapshot['totals']
         
-        print(f"\nTotal Students:      {students}")
-        print(f"Total Employers:     {employers}")
-        print(f"Total Jobs:          {jobs}")
-        print(f"Total Applications:  {apps}")
-        print(f"Total References:    {refs}")
+        print(f"\nTotal Students:      {totals['students']}")
+        print(f"Total Employers:     {totals['employers']}")
+        print(f"Total Jobs:          {totals['jobs']}")
+        print(f"Total Applications:  {totals['applications']}")
+        print(f"Total References:    {snapshot['references']['total']}")
+        self.print_snapshot_info()
     
     def application_statistics(self):
         """Display application statistics"""
         print("\n--- APPLICATION STATISTICS ---")
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM Applications
-            GROUP BY status
-            ORDER BY count DESC
-        """)
-        
-        stats = cursor.fetchall()
+        snapshot = self.get_report_snapshot()
+        stats = sorted(snapshot['application_status'].items(), key=lambda item: item[1], reverse=True)
         
         if stats:
             print(f"\n{'Status':<20} {'Count':<10}")
             print("-"*30)
-            for stat in stats:
-                print(f"{stat[0]:<20} {stat[1]:<10}")
+            for status, count in stats:
+                print(f"{status:<20} {count:<10}")
         else:
             print("No application data available.")
+        self.print_snapshot_info()
     
     def reference_statistics(self):
         """Display reference statistics"""
         print("\n--- REFERENCE STATISTICS ---")
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM [References]
-            GROUP BY status
-            ORDER BY count DESC
-        """)
-        
-        stats = cursor.fetchall()
+        stats = self.get_report_snapshot()['references']
         
-        if stats:
+        if stats['total']:
+            counts = [('completed', stats['completed']), ('pending', stats['pending']), ('expired', stats['expired'])]
+            other = stats['total'] - sum(count for _, count in counts)
+            if other:
+                counts.append(('other', other))
+            
             print(f"\n{'Status':<20} {'Count':<10}")
             print("-"*30)
-            for stat in stats:
-                print(f"{stat[0]:<20} {stat[1]:<10}")
+            for status, count in sorted(counts, key=lambda item: item[1], reverse=True):
+                print(f"{status:<20} {count:<10}")
             
-            # Average rating
-            cursor.execute("SELECT AVG(CAST(rating AS FLOAT)) FROM [References] WHERE rating IS NOT NULL")
-            avg_rating = cursor.fetchone()[0]
-            if avg_rating:
-                print(f"\nAverage Rating: {avg_rating:.2f}/5")
+            if stats['rating_count']:
+                print(f"\nAverage Rating: {stats['rating_sum'] / stats['rating_count']:.2f}/5")
         else:
             print("No reference data available.")
+        self.print_snapshot_info()
     
     # ==================== MAIN LOOP ====================
     
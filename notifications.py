@@ -0,0 +1,322 @@
+# notifications.py - Notification Dispatch for StudentConnect
+"""
+Notifications for StudentConnect
+NotificationDispatcher is a background pipeline for Notifications inserts:
+request handlers enqueue notifications and return straight away; a worker
+thread collects them into batches, drops duplicates within a batch and
+writes each batch with one executemany and one commit. A batch is flushed
+when it is full or when its oldest notification has waited flush_interval
+seconds. On shutdown the queue is drained before the worker exits.
+
+fetch_notifications() pages through a user's notifications with a keyset
+cursor, mark_read() marks them read in one UPDATE per call, and
+UnreadCounts keeps per-user unread counts in memory, adjusted as
+notifications are written and read instead of recounted on every request.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from cache import LRUTTLCache
+from pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# SQL Server accepts at most 2100 parameters per statement
+MAX_IDS_PER_STATEMENT = 2000
+
+_STOP = object()
+
+
+class NotificationDispatcher:
+    """Batches Notifications inserts on a background thread"""
+
+    def __init__(self, pool, batch_size=100, flush_interval=0.5, max_queue=10000, on_writing=None,
+                 on_written=None):
+        self.pool = pool
+        self.on_writing = on_writing  # called before each batch; its result is passed to on_written
+        self.on_written = on_written  # called with the rows of every committed batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._enqueued = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._inserted = 0
+        self._failed = 0
+        self._batches = 0
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+        self._delay_ms_max = 0.0
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+        self._worker.start()
+
+    def enqueue(self, recipient_id, recipient_type, message, notification_type=None):
+        """Queue a notification without waiting for the database; False if it was dropped"""
+        if self._stopped:
+            return False
+        try:
+            self._queue.put_nowait(((int(recipient_id), recipient_type, message, notification_type),
+                                    time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            logger.warning("Notification queue full, notification dropped")
+            return False
+        with self._lock:
+            self._enqueued += 1
+        return True
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been written (or timeout); True when drained"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=10.0):
+        """Stop accepting notifications, write what is queued and stop the worker"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.warning(f"Notification dispatcher still busy after {timeout}s; "
+                           f"{self._queue.qsize()} notifications not written")
+
+    # ==================== WORKER ====================
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = item[1] + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self._drain()
+                self._queue.task_done()
+                return
+
+    def _drain(self):
+        """Write whatever is still queued after shutdown was requested"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch):
+        # Identical notifications queued close together are written once
+        rows = list(dict.fromkeys(row for row, _ in batch))
+        started = time.monotonic()
+        token = None
+        try:
+            if self.on_writing is not None:
+                token = self.on_writing()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO Notifications (recipient_id, recipient_type, message, notification_type)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+            ok = True
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} notifications: {e}")
+            ok = False
+        finished = time.monotonic()
+        if ok and self.on_written is not None:
+            try:
+                self.on_written(rows, token)
+            except Exception as e:
+                logger.error(f"Notification on_written callback failed: {e}")
+
+        with self._lock:
+            self._batches += 1
+            self._coalesced += len(batch) - len(rows)
+            if ok:
+                self._inserted += len(rows)
+            else:
+                self._failed += len(rows)
+            self._flush_ms_last = (finished - started) * 1000
+            self._flush_ms_max = max(self._flush_ms_max, self._flush_ms_last)
+            self._delay_ms_max = max(self._delay_ms_max, (finished - min(t for _, t in batch)) * 1000)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'enqueued': self._enqueued,
+                'inserted': self._inserted,
+                'coalesced': self._coalesced,
+                'dropped': self._dropped,
+                'failed': self._failed,
+                'batches': self._batches,
+                'flush_ms_last': round(self._flush_ms_last, 2),
+                'flush_ms_max': round(self._flush_ms_max, 2),
+                'enqueue_to_commit_ms_max': round(self._delay_ms_max, 2),
+                'running': self._worker.is_alive()
+            }
+
+
+# ==================== QUERIES ====================
+
+def fetch_notifications(conn, recipient_id, recipient_type, page_size, cursor_token=None, unread_only=False):
+    """One page of a user's notifications, newest first; returns (notifications, next_cursor)"""
+    conditions = ['recipient_id = ?', 'recipient_type = ?']
+    params = [recipient_id, recipient_type]
+    if unread_only:
+        conditions.append('is_read = 0')
+    if cursor_token:
+        # Keyset condition on (created_at, notification_id) - matches the ORDER BY below
+        last_created, last_id = decode_cursor(cursor_token, (datetime, int))
+        conditions.append('(created_at < ? OR (created_at = ? AND notification_id < ?))')
+        params.extend([last_created, last_created, last_id])
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT TOP {page_size + 1} notification_id, message, notification_type, is_read, created_at
+        FROM Notifications
+        WHERE {' AND '.join(conditions)}
+        ORDER BY created_at DESC, notification_id DESC
+    ''', params)
+    rows = cursor.fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    notifications = [{
+        'id': int(row[0]),
+        'message': row[1],
+        'type': row[2],
+        'is_read': bool(row[3]),
+        'created_at': row[4].isoformat() if row[4] else None
+    } for row in rows]
+    next_cursor = encode_cursor(rows[-1][4], int(rows[-1][0])) if has_more else None
+    return notifications, next_cursor
+
+
+def mark_read(conn, recipient_id, recipient_type, ids=None, before=None):
+    """Mark a user's notifications read by ID and/or everything created up to before
+
+    Returns how many unread notifications changed; the caller commits.
+    """
+    sql = 'UPDATE Notifications SET is_read = 1 WHERE recipient_id = ? AND recipient_type = ? AND is_read = 0'
+    cursor = conn.cursor()
+    updated = 0
+    if before is not None:
+        cursor.execute(sql + ' AND created_at <= ?', (recipient_id, recipient_type, before))
+        updated += max(cursor.rowcount, 0)
+    ids = sorted({int(i) for i in ids or ()})
+    for start in range(0, len(ids), MAX_IDS_PER_STATEMENT):
+        chunk = ids[start:start + MAX_IDS_PER_STATEMENT]
+        cursor.execute(sql + f" AND notification_id IN ({', '.join('?' * len(chunk))})",
+                       [recipient_id, recipient_type] + chunk)
+        updated += max(cursor.rowcount, 0)
+    return updated
+
+
+# ==================== UNREAD COUNTS ====================
+
+class UnreadCounts:
+    """Per-user unread notification counts, counted once and then adjusted in memory
+
+    Entries expire after ttl seconds, so changes made by other processes are
+    picked up within that time. Writers call begin_write() before changing
+    Notifications and pass its token to adjust(), which only adjusts counts
+    cached before the write started (later ones may already include it).
+    """
+
+    def __init__(self, pool, max_entries=10000, ttl=300.0):
+        self.pool = pool
+        self._cache = LRUTTLCache(max_entries=max_entries, default_ttl=ttl)
+        self._lock = threading.Lock()
+        # Bumped by every begin_write() so a count that raced with a write is not cached
+        self._generation = 0
+
+    def get(self, recipient_id, recipient_type):
+        key = (int(recipient_id), recipient_type)
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry[0]
+        with self._lock:
+            generation = self._generation
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM Notifications
+                WHERE recipient_id = ? AND recipient_type = ? AND is_read = 0
+            ''', key)
+            count = int(cursor.fetchone()[0])
+        with self._lock:
+            if generation == self._generation:
+                # Cached with the generation it was counted at, for adjust() to compare against
+                self._cache.set(key, (count, generation))
+        return count
+
+    def begin_write(self):
+        """Call before changing Notifications; returns the token to pass to adjust()"""
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def adjust(self, recipient_id, recipient_type, delta, token):
+        """Add delta to a count cached before the write with this token began
+
+        A count cached after begin_write() may already include the write, so it
+        is dropped and counted again on the next read instead.
+        """
+        key = (int(recipient_id), recipient_type)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return
+            count, generation = entry
+            if generation < token:
+                self._cache.set(key, (max(0, count + delta), generation))
+            else:
+                self._cache.delete(key)
+
+    def record_inserted(self, rows, token):
+        """NotificationDispatcher on_written callback (token comes from begin_write as on_writing)"""
+        per_user = {}
+        for recipient_id, recipient_type, _, _ in rows:
+            per_user[(recipient_id, recipient_type)] = per_user.get((recipient_id, recipient_type), 0) + 1
+        for (recipient_id, recipient_type), delta in per_user.items():
+            self.adjust(recipient_id, recipient_type, delta, token)
+
+    def stats(self):
+        return self._cache.stats()
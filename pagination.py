@@ -0,0 +1,51 @@
+# pagination.py - Keyset Pagination Helpers for StudentConnect
+"""
+Helpers for cursor (keyset) pagination and LIKE filters
+A cursor is an opaque URL-safe token holding the sort key of the last row
+of a page, so the next page is fetched with an indexed range condition
+instead of OFFSET scanning.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a requested page size to 1..maximum"""
+    try:
+        size = int(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        raise ValueError("page_size must be an integer")
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(*values):
+    """Encode a row's sort key (datetimes, ints, strings) as a cursor token"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, types):
+    """Decode a cursor token into a tuple, converting each value with types[i]"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(values, types)
+        )
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def like_pattern(value):
+    """Build a '%value%' LIKE pattern with wildcards escaped (use with ESCAPE '\\')"""
+    escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('[', '\\[')
+    return f'%{escaped}%'
@@ -0,0 +1,303 @@
+# passwords.py - Password Hashing for StudentConnect
+"""
+Password hashing with versioned, self-describing hash formats
+New hashes use a slow KDF:
+    $scrypt$ln=14,r=8,p=1$<salt>$<hash>
+    $pbkdf2-sha256$i=600000$<salt>$<hash>
+Legacy SHA-256 hex digests (unsalted from app_backend.py, salted from
+database.py) still verify and are reported by needs_rehash(), so they are
+upgraded the next time the user logs in.
+
+PasswordHasher runs the KDF in a bounded thread pool (hashlib releases the
+GIL while hashing) so slow hashes cannot pile up on the web server's
+request threads; when the queue is full new work is refused.
+
+Benchmark cost settings: python passwords.py --rate 20 --budget-ms 250
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PASSWORD_HASH_CONFIG, PASSWORD_SALT
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+# ==================== HASH FORMATS ====================
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _parse_params(text):
+    return {key: int(value) for key, value in (item.split('=') for item in text.split(','))}
+
+
+def _scrypt(password, salt, ln, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=1 << ln, r=r, p=p,
+                          maxmem=256 * r * (1 << ln) + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def _pbkdf2(password, salt, i):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, i, dklen=KEY_BYTES)
+
+
+def _legacy_hashes(password):
+    yield hashlib.sha256(password.encode()).hexdigest()
+    yield hashlib.sha256((password + PASSWORD_SALT).encode()).hexdigest()
+
+
+def current_params(scheme=None, config=None):
+    """Cost parameters for newly created hashes"""
+    config = config or PASSWORD_HASH_CONFIG
+    scheme = scheme or config['scheme']
+    if scheme == 'scrypt':
+        return scheme, {'ln': config['scrypt_ln'], 'r': config['scrypt_r'], 'p': config['scrypt_p']}
+    if scheme == 'pbkdf2-sha256':
+        return scheme, {'i': config['pbkdf2_iterations']}
+    raise ValueError(f"Unknown password hash scheme '{scheme}'")
+
+
+def hash_password(password, scheme=None, params=None):
+    """Hash a password with the configured (or given) scheme and cost"""
+    if params is None:
+        scheme, params = current_params(scheme)
+    salt = os.urandom(SALT_BYTES)
+    if scheme == 'scrypt':
+        key = _scrypt(password, salt, **params)
+    elif scheme == 'pbkdf2-sha256':
+        key = _pbkdf2(password, salt, **params)
+    else:
+        raise ValueError(f"Unknown password hash scheme '{scheme}'")
+    encoded = ','.join(f'{k}={v}' for k, v in params.items())
+    return f'${scheme}${encoded}${_b64(salt)}${_b64(key)}'
+
+
+def verify_password(password, stored):
+    """Check a password against any supported stored hash"""
+    if not stored:
+        return False
+    if not stored.startswith('$'):
+        return any(hmac.compare_digest(candidate, stored.lower()) for candidate in _legacy_hashes(password))
+    try:
+        _, scheme, encoded, salt, key = stored.split('$')
+        params = _parse_params(encoded)
+        if scheme == 'scrypt':
+            computed = _scrypt(password, _unb64(salt), **params)
+        elif scheme == 'pbkdf2-sha256':
+            computed = _pbkdf2(password, _unb64(salt), **params)
+        else:
+            return False
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(computed, _unb64(key))
+
+
+def needs_rehash(stored):
+    """True when a stored hash is legacy or weaker than the current settings"""
+    if not stored or not stored.startswith('$'):
+        return True
+    try:
+        _, scheme, encoded, _, _ = stored.split('$')
+        params = _parse_params(encoded)
+    except ValueError:
+        return True
+    current_scheme, current = current_params()
+    return scheme != current_scheme or any(params.get(k, 0) < v for k, v in current.items())
+
+
+# Verified when an account does not exist, so unknown emails take as long as wrong passwords
+_dummy_hash = None
+
+
+def _get_dummy_hash():
+    global _dummy_hash
+    if _dummy_hash is None or needs_rehash(_dummy_hash):
+        _dummy_hash = hash_password(os.urandom(8).hex())
+    return _dummy_hash
+
+
+# ==================== BOUNDED HASHING POOL ====================
+
+class PasswordHasher:
+    """Runs KDF work on a fixed number of threads with a bounded queue"""
+
+    def __init__(self, workers=None, max_queue=None):
+        self.workers = workers or PASSWORD_HASH_CONFIG['workers']
+        self.max_queue = PASSWORD_HASH_CONFIG['max_queue'] if max_queue is None else max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hasher')
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=1000)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy("Too many password operations in progress, try again shortly")
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._latencies.append((time.perf_counter() - submitted) * 1000)
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(task)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+        return future.result()
+
+    def hash(self, password):
+        """Hash a new password"""
+        return self._run(hash_password, password)
+
+    def verify(self, password, stored):
+        """Verify a password; a missing hash is checked against a dummy to keep timing uniform"""
+        if stored and not stored.startswith('$'):
+            return verify_password(password, stored)  # legacy digests are cheap
+        return self._run(verify_password, password, stored or _get_dummy_hash()) and bool(stored)
+
+    def verify_and_update(self, password, stored):
+        """Verify a password and return (ok, new_hash), new_hash set when it should be upgraded"""
+        if not self.verify(password, stored):
+            return False, None
+        return True, (self.hash(password) if needs_rehash(stored) else None)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'queue_depth': self._queued,
+                'running': self._running,
+                'peak_queue_depth': self._peak_queued,
+                'completed': self._completed,
+                'rejected': self._rejected
+            }
+        stats['latency_p50_ms'] = round(latencies[len(latencies) // 2], 2) if latencies else 0.0
+        stats['latency_p99_ms'] = round(latencies[int(len(latencies) * 0.99)], 2) if latencies else 0.0
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+# ==================== BENCHMARK ====================
+
+def _candidates(scheme):
+    if scheme == 'scrypt':
+        return [{'ln': ln, 'r': 8, 'p': 1} for ln in range(12, 18)]
+    return [{'i': i} for i in (100_000, 200_000, 400_000, 600_000, 900_000, 1_200_000)]
+
+
+def benchmark(scheme, rate, duration, budget_ms, workers, max_queue):
+    """Replay logins at a fixed rate for each cost setting and report latency percentiles"""
+    print(f"{scheme}: {rate} logins/s for {duration}s on {workers} worker(s), p99 budget {budget_ms} ms\n")
+    print(f"{'params':<22}{'single ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'rejected':>10}")
+    best = None
+    for params in _candidates(scheme):
+        label = ','.join(f'{k}={v}' for k, v in params.items())
+        stored = hash_password('benchmark-password', scheme, params)
+        single = statistics.median(
+            _timed(verify_password, 'benchmark-password', stored) for _ in range(3)
+        )
+
+        hasher = PasswordHasher(workers=workers, max_queue=max_queue)
+        latencies, rejected, threads = [], 0, []
+        lock = threading.Lock()
+
+        def login():
+            nonlocal rejected
+            started = time.perf_counter()
+            try:
+                hasher._run(verify_password, 'benchmark-password', stored)
+            except PasswordHasherBusy:
+                with lock:
+                    rejected += 1
+                return
+            with lock:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        # Open-loop load: arrivals keep coming whether or not earlier logins have finished
+        start = time.perf_counter()
+        for n in range(int(rate * duration)):
+            delay = start + n / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            thread = threading.Thread(target=login)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        hasher.shutdown()
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] if latencies else float('nan')
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else float('nan')
+        print(f"{label:<22}{single:>10.1f}{p50:>10.1f}{p99:>10.1f}{rejected:>10}")
+        if p99 <= budget_ms and not rejected:
+            best = label
+        elif best is not None:
+            break
+    print(f"\nRecommended: {best}" if best else "\nNo setting met the budget; add workers or lower the rate")
+    return best
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark password hashing cost settings')
+    parser.add_argument('--scheme', choices=['scrypt', 'pbkdf2-sha256'], default=PASSWORD_HASH_CONFIG['scheme'])
+    parser.add_argument('--rate', type=float, default=20.0, help='peak logins per second')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per setting')
+    parser.add_argument('--budget-ms', type=float, default=250.0, help='login p99 budget')
+    parser.add_argument('--workers', type=int, default=PASSWORD_HASH_CONFIG['workers'])
+    parser.add_argument('--max-queue', type=int, default=PASSWORD_HASH_CONFIG['max_queue'])
+    args = parser.parse_args(argv)
+    benchmark(args.scheme, args.rate, args.duration, args.budget_ms, args.workers, args.max_queue)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# reference_stats.py - Materialized Reference Statistics for StudentConnect
+"""
+Per-student and global reference counters kept in the ReferenceStats table
+Each row holds total, pending, completed and expired counts plus the rating
+sum and count for one student; student_id 0 is the global row. Writers apply
+deltas in the same transaction as the reference change, so reading stats is
+one primary-key lookup however many references exist.
+
+Check the table against StudentReferences, or rebuild it from there:
+    python reference_stats.py
+    python reference_stats.py --rebuild
+"""
+
+import argparse
+import sys
+
+GLOBAL_ID = 0
+
+COUNTERS = ['total', 'pending', 'completed', 'expired', 'rating_sum', 'rating_count']
+
+# Deltas for each lifecycle step
+CREATED = {'total': 1, 'pending': 1}
+EXPIRED = {'pending': -1, 'expired': 1}
+
+
+def completed(rating=None):
+    """Deltas for a pending request being answered"""
+    deltas = {'pending': -1, 'completed': 1}
+    if rating is not None:
+        deltas.update(rating_sum=int(rating), rating_count=1)
+    return deltas
+
+
+def apply_deltas(cursor, deltas_by_student):
+    """Add {student_id: {counter: delta}} to the student rows and the global row; the caller commits"""
+    totals = dict.fromkeys(COUNTERS, 0)
+    for deltas in deltas_by_student.values():
+        for counter, delta in deltas.items():
+            totals[counter] += delta
+    update = f'''
+        UPDATE ReferenceStats SET {', '.join(f'{c} = {c} + ?' for c in COUNTERS)}
+        WHERE student_id = ?
+    '''
+    for student_id, deltas in list(deltas_by_student.items()) + [(GLOBAL_ID, totals)]:
+        values = [deltas.get(counter, 0) for counter in COUNTERS]
+        cursor.execute(update, values + [student_id])
+        if cursor.rowcount == 0:
+            try:
+                cursor.execute(f'''
+                    INSERT INTO ReferenceStats (student_id, {', '.join(COUNTERS)})
+                    VALUES (?, {', '.join('?' * len(COUNTERS))})
+                ''', [student_id] + values)
+            except Exception:
+                # A concurrent writer inserted the row first (primary key violation): add to it instead
+                cursor.execute(update, values + [student_id])
+                if cursor.rowcount == 0:
+                    raise
+
+
+def _as_dict(row):
+    values = dict(zip(COUNTERS, (int(v or 0) for v in row))) if row else dict.fromkeys(COUNTERS, 0)
+    values['avg_rating'] = round(values['rating_sum'] / values['rating_count'], 2) if values['rating_count'] else 0.0
+    return values
+
+
+def get_stats(cursor, student_id=GLOBAL_ID):
+    """Counters and average rating for one student (or everyone with GLOBAL_ID)"""
+    cursor.execute(f"SELECT {', '.join(COUNTERS)} FROM ReferenceStats WHERE student_id = ?", (student_id,))
+    return _as_dict(cursor.fetchone())
+
+
+_AGGREGATE = '''
+    SELECT student_id, COUNT(*),
+           SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'expired' THEN 1 ELSE 0 END),
+           ISNULL(SUM(rating), 0), COUNT(rating)
+    FROM StudentReferences
+    GROUP BY student_id
+'''
+
+
+def rebuild(conn):
+    """Recompute every row from StudentReferences; returns the number of student rows"""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM ReferenceStats')
+    cursor.execute(f"INSERT INTO ReferenceStats (student_id, {', '.join(COUNTERS)}) {_AGGREGATE}")
+    cursor.execute(f'''
+        INSERT INTO ReferenceStats (student_id, {', '.join(COUNTERS)})
+        SELECT {GLOBAL_ID}, {', '.join(f'ISNULL(SUM({c}), 0)' for c in COUNTERS)}
+        FROM ReferenceStats
+    ''')
+    cursor.execute(f'SELECT COUNT(*) FROM ReferenceStats WHERE student_id <> {GLOBAL_ID}')
+    students = int(cursor.fetchone()[0])
+    conn.commit()
+    return students
+
+
+def ensure_built(conn):
+    """Build the table on first use (no global row yet)"""
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT COUNT(*) FROM ReferenceStats WHERE student_id = {GLOBAL_ID}')
+    if cursor.fetchone()[0] == 0:
+        rebuild(conn)
+
+
+def verify(conn):
+    """Compare the table with a fresh aggregate; returns [(student_id, stored, expected)] that differ"""
+    cursor = conn.cursor()
+    cursor.execute(_AGGREGATE)
+    expected = {int(row[0]): [int(v or 0) for v in row[1:]] for row in cursor.fetchall()}
+    expected[GLOBAL_ID] = [sum(values) for values in zip(*expected.values())] or [0] * len(COUNTERS)
+
+    cursor.execute(f"SELECT student_id, {', '.join(COUNTERS)} FROM ReferenceStats")
+    stored = {int(row[0]): [int(v or 0) for v in row[1:]] for row in cursor.fetchall()}
+
+    zeros = [0] * len(COUNTERS)
+    mismatches = []
+    for student_id in sorted(expected.keys() | stored.keys()):
+        have, want = stored.get(student_id, zeros), expected.get(student_id, zeros)
+        if have != want:
+            mismatches.append((student_id, dict(zip(COUNTERS, have)), dict(zip(COUNTERS, want))))
+    return mismatches
+
+
+def main(argv=None):
+    from storage import get_storage_backend
+
+    parser = argparse.ArgumentParser(description='Verify or rebuild the ReferenceStats table')
+    parser.add_argument('--rebuild', action='store_true', help='recompute the table from StudentReferences')
+    args = parser.parse_args(argv)
+
+    conn = get_storage_backend().connect()
+    try:
+        if args.rebuild:
+            print(f"Rebuilt reference stats for {rebuild(conn)} students")
+        else:
+            ensure_built(conn)
+        mismatches = verify(conn)
+        for student_id, have, want in mismatches:
+            label = 'global' if student_id == GLOBAL_ID else f'student {student_id}'
+            print(f"{label}: stored {have}, expected {want}")
+        print(f"{len(mismatches)} mismatched rows")
+        return 1 if mismatches else 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# references.py - Reference Request Lifecycle for StudentConnect
+"""
+Lifecycle of reference requests: pending -> completed or expired
+Every request gets a random token and an expiry date. Referees answer
+through the token, which is resolved with one indexed lookup and then
+kept in a small in-memory cache. A background sweeper marks overdue
+pending requests as expired in set-based batches (one UPDATE per batch)
+and records how many rows each sweep changed and how long it took.
+Every transition also updates the ReferenceStats counters (reference_stats.py)
+in the same transaction.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import reference_stats
+from cache import LRUTTLCache
+from config import REFERENCE_EXPIRY_DAYS
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceUnavailable(Exception):
+    """Raised when a token is unknown or its request is no longer pending"""
+
+    def __init__(self, status):
+        super().__init__(f"Reference request is {status.replace('_', ' ')}")
+        self.status = status  # 'not_found', 'expired' or 'completed'
+
+
+def new_token():
+    return str(uuid.uuid4())
+
+
+def expiry_from(now=None):
+    """Expiry date for a request made at now"""
+    return (now or datetime.now()) + timedelta(days=REFERENCE_EXPIRY_DAYS)
+
+
+class ReferenceLifecycle:
+    """Creates reference requests, resolves referee tokens and expires overdue requests"""
+
+    def __init__(self, pool, cache_max=10000, cache_ttl=300.0, sweep_interval=300.0, sweep_batch=500,
+                 on_expired=None):
+        self.pool = pool
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self.on_expired = on_expired  # called with [(reference_id, student_id, referee_name)] after each batch
+        # token -> reference dict, or False for unknown tokens
+        self._tokens = LRUTTLCache(max_entries=cache_max, default_ttl=cache_ttl)
+        self._lock = threading.Lock()
+        self._sweeps = 0
+        self._swept = 0
+        self._last_swept = 0
+        self._last_sweep_at = None
+        self._sweep_ms_last = 0.0
+        self._sweep_ms_max = 0.0
+        self._stop = threading.Event()
+        self._worker = None
+
+    # ==================== REQUESTS ====================
+
+    def create_request(self, data):
+        """Insert a pending reference request; returns (reference_id, token, expiry_date)"""
+        token = new_token()
+        expiry = expiry_from()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO StudentReferences (student_id, referee_name, referee_email, referee_phone,
+                                        relationship, company, position, token, expiry_date)
+                OUTPUT INSERTED.reference_id
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (data['student_id'], data['referee_name'], data['referee_email'],
+                  data.get('referee_phone'), data.get('relationship'), data.get('company'),
+                  data.get('position'), token, expiry))
+            reference_id = int(cursor.fetchone()[0])
+            reference_stats.apply_deltas(cursor, {int(data['student_id']): reference_stats.CREATED})
+            conn.commit()
+        return reference_id, token, expiry
+
+    def lookup(self, token):
+        """Resolve a referee token to its reference, or None when it is unknown"""
+        reference = self._tokens.get(token)
+        if reference is None:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT r.reference_id, r.student_id, s.full_name, r.referee_name, r.relationship,
+                           r.company, r.status, r.request_date, r.expiry_date
+                    FROM StudentReferences r
+                    JOIN Students s ON r.student_id = s.student_id
+                    WHERE r.token = ?
+                ''', (token,))
+                row = cursor.fetchone()
+            reference = False if row is None else {
+                'id': int(row[0]),
+                'student_id': int(row[1]),
+                'student_name': row[2],
+                'referee_name': row[3],
+                'relationship': row[4],
+                'company': row[5],
+                'status': row[6],
+                'request_date': row[7],
+                'expiry_date': row[8]
+            }
+            self._tokens.set(token, reference)
+        if not reference:
+            return None
+        reference = dict(reference)
+        # Overdue requests count as expired even before the sweeper reaches them
+        if reference['status'] == 'pending' and reference['expiry_date'] and reference['expiry_date'] <= datetime.now():
+            reference['status'] = 'expired'
+        return reference
+
+    def respond(self, token, reference_text, rating=None):
+        """Record a referee's answer; raises ReferenceUnavailable unless the request is pending"""
+        reference = self.lookup(token)
+        if reference is None:
+            raise ReferenceUnavailable('not_found')
+        if reference['status'] != 'pending':
+            raise ReferenceUnavailable(reference['status'])
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            # Compare-and-set, so a concurrent answer or sweep wins cleanly
+            cursor.execute('''
+                UPDATE StudentReferences
+                SET status = 'completed', response_date = GETDATE(), reference_text = ?, rating = ?
+                WHERE reference_id = ? AND status = 'pending' AND (expiry_date IS NULL OR expiry_date > ?)
+            ''', (reference_text, rating, reference['id'], datetime.now()))
+            updated = cursor.rowcount
+            if updated == 1:
+                reference_stats.apply_deltas(cursor, {reference['student_id']: reference_stats.completed(rating)})
+            conn.commit()
+        self._tokens.delete(token)
+        if updated != 1:
+            current = self.lookup(token)
+            raise ReferenceUnavailable(current['status'] if current else 'not_found')
+        reference['status'] = 'completed'
+        return reference
+
+    # ==================== EXPIRY SWEEPER ====================
+
+    def sweep(self, now=None):
+        """Expire every overdue pending request, one batch per UPDATE; returns the number expired"""
+        now = now or datetime.now()
+        started = time.monotonic()
+        swept = 0
+        while True:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    UPDATE StudentReferences
+                    SET status = 'expired'
+                    OUTPUT INSERTED.reference_id, INSERTED.student_id, INSERTED.referee_name, INSERTED.token
+                    WHERE reference_id IN (
+                        SELECT TOP {int(self.sweep_batch)} reference_id FROM StudentReferences
+                        WHERE status = 'pending' AND expiry_date <= ?
+                        ORDER BY expiry_date
+                    )
+                ''', (now,))
+                rows = cursor.fetchall()
+                per_student = {}
+                for row in rows:
+                    per_student[int(row[1])] = per_student.get(int(row[1]), 0) + 1
+                reference_stats.apply_deltas(cursor, {
+                    student_id: {counter: delta * count for counter, delta in reference_stats.EXPIRED.items()}
+                    for student_id, count in per_student.items()
+                })
+                conn.commit()
+            if not rows:
+                break
+            swept += len(rows)
+            for row in rows:
+                if row[3]:
+                    self._tokens.delete(row[3])
+            if self.on_expired is not None:
+                try:
+                    self.on_expired([(int(row[0]), int(row[1]), row[2]) for row in rows])
+                except Exception as e:
+                    logger.error(f"Reference on_expired callback failed: {e}")
+            if len(rows) < self.sweep_batch:
+                break
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._sweeps += 1
+            self._swept += swept
+            self._last_swept = swept
+            self._last_sweep_at = datetime.now()
+            self._sweep_ms_last = elapsed_ms
+            self._sweep_ms_max = max(self._sweep_ms_max, elapsed_ms)
+        if swept:
+            logger.info(f"Expired {swept} reference requests in {elapsed_ms:.1f} ms")
+        return swept
+
+    def start(self):
+        """Run sweep() every sweep_interval seconds on a daemon thread"""
+        if self._worker is None or not self._worker.is_alive():
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='reference-sweeper', daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Reference sweep failed: {e}")
+            self._stop.wait(self.sweep_interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sweeps': self._sweeps,
+                'expired_total': self._swept,
+                'expired_last': self._last_swept,
+                'last_sweep_at': self._last_sweep_at.isoformat() if self._last_sweep_at else None,
+                'sweep_ms_last': round(self._sweep_ms_last, 2),
+                'sweep_ms_max': round(self._sweep_ms_max, 2),
+                'sweep_interval': self.sweep_interval,
+                'sweep_batch': self.sweep_batch,
+                'running': bool(self._worker and self._worker.is_alive()),
+                'token_cache': self._tokens.stats()
+            }
@@ -0,0 +1,560 @@
+# search_index.py - Full-Text Job Search for StudentConnect
+"""
+In-process inverted index over job titles, companies, skills and descriptions
+Jobs are ranked with BM25 (title and company/skill matches weigh more than
+description matches) and must contain every query word; the last word also
+matches as a prefix, for type-ahead. Each term's per-job BM25 factor is
+worked out when the job is indexed, so a query only multiplies in the term
+IDFs, and every term keeps a posting list sorted by that factor, so the top
+results are read from the front of the lists instead of scoring every match.
+
+New jobs are added as they are created. The index is saved to a snapshot
+file and reloaded at startup, catching up on jobs added since it was saved.
+
+    python search_index.py "python developer"
+    python search_index.py --benchmark 100000
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import logging
+import marshal
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from operator import add, mul
+
+logger = logging.getLogger(__name__)
+
+# Term frequencies count each occurrence once per field weight
+FIELD_WEIGHTS = {'title': 3, 'company': 2, 'skills': 2, 'description': 1}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Per-job term factors are stored as integers in 1..220 (factor * 100)
+SCALE = 100
+
+# Prefixes shorter than this only match whole words
+MIN_PREFIX = 2
+# A prefix expands to at most this many words (the ones in the most jobs)
+MAX_PREFIX_TERMS = 50
+# Jobs that only match the prefix through a longer word score slightly lower
+PREFIX_DISCOUNT = 0.9
+
+# Multi-word queries with at most this many matches are scored directly
+DIRECT_SCORE_LIMIT = 5000
+
+# Snapshots hold plain dicts, tuples, ints and strings in marshal format, which (unlike pickle) cannot
+# run code when a planted file is loaded
+SNAPSHOT_VERSION = 2
+
+STOPWORDS = frozenset('a an and are as at be by for from in is of on or the to with'.split())
+
+# Words, plus the forms job ads use for technologies: c++, c#, node.js, asp.net
+_TOKEN = re.compile(r'[a-z0-9]+(?:[+#]+|(?:\.[a-z0-9]+)+)?')
+
+
+def tokenize(text):
+    """Lower-case search terms in text, without stopwords"""
+    if not text:
+        return []
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class JobSearchIndex:
+    """Inverted index: term -> {job_id: BM25 term factor}"""
+
+    def __init__(self, snapshot_file=None, impact_cache=4096, refresh_interval=None):
+        self.snapshot_file = snapshot_file
+        # Seconds between catch-ups with jobs added by other processes (None: only on refresh())
+        self.refresh_interval = refresh_interval
+        self._refreshed_at = 0.0
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._docs = {}       # job_id -> (weighted length, terms)
+        self._vocab = []      # sorted terms, for prefix lookups
+        self._total_length = 0
+        self._avgdl = 0.0     # fixed when the index is built, so stored factors stay comparable
+        self._max_job_id = 0
+        # term -> [(factor, job_id)] ascending, built on first use and kept up to date
+        self._impacts = OrderedDict()
+        self._impact_cache = impact_cache
+        self._dirty = False
+        self.loaded = False
+        self.last_load = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ==================== MAINTENANCE ====================
+
+    @staticmethod
+    def _weighted_terms(fields):
+        counts = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                counts[term] = counts.get(term, 0) + weight
+        return counts, sum(counts.values())
+
+    @staticmethod
+    def _factors(counts, length, avgdl):
+        norm = K1 * (1 - B + B * length / (avgdl or length or 1))
+        return {term: max(1, round(SCALE * tf * (K1 + 1) / (tf + norm))) for term, tf in counts.items()}
+
+    def add_job(self, job_id, fields):
+        """Index (or re-index) one job; fields has title, company, skills and description"""
+        job_id = int(job_id)
+        counts, length = self._weighted_terms(fields)
+        with self._lock:
+            self._remove_locked(job_id)
+            factors = self._factors(counts, length, self._avgdl)
+            for term, factor in factors.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocab, term)
+                postings[job_id] = factor
+                impacts = self._impacts.get(term)
+                if impacts is not None:
+                    bisect.insort(impacts, (factor, job_id))
+            self._docs[job_id] = (length, tuple(factors))
+            self._total_length += length
+            self._max_job_id = max(self._max_job_id, job_id)
+            self._dirty = True
+
+    def remove_job(self, job_id):
+        """Drop a job from the index"""
+        with self._lock:
+            self._remove_locked(int(job_id))
+
+    def _remove_locked(self, job_id):
+        doc = self._docs.pop(job_id, None)
+        if doc is None:
+            return
+        length, terms = doc
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            factor = postings.pop(job_id)
+            impacts = self._impacts.get(term)
+            if impacts is not None:
+                del impacts[bisect.bisect_left(impacts, (factor, job_id))]
+            if not postings:
+                del self._postings[term]
+                del self._vocab[bisect.bisect_left(self._vocab, term)]
+                self._impacts.pop(term, None)
+        self._dirty = True
+
+    def build(self, jobs):
+        """Replace the index with [(job_id, fields)]"""
+        weighted = []
+        total_length = 0
+        for job_id, fields in jobs:
+            counts, length = self._weighted_terms(fields)
+            weighted.append((int(job_id), counts, length))
+            total_length += length
+        avgdl = total_length / len(weighted) if weighted else 0.0
+
+        postings, docs = {}, {}
+        for job_id, counts, length in weighted:
+            factors = self._factors(counts, length, avgdl)
+            for term, factor in factors.items():
+                postings.setdefault(term, {})[job_id] = factor
+            docs[job_id] = (length, tuple(factors))
+
+        with self._lock:
+            self._postings, self._docs = postings, docs
+            self._vocab = sorted(postings)
+            self._total_length, self._avgdl = total_length, avgdl
+            self._max_job_id = max(docs, default=0)
+            self._impacts.clear()
+            self._dirty = True
+            self.loaded = True
+
+    def load(self, pool, batch_size=5000):
+        """Load the snapshot and catch up with the Jobs table, or rebuild from the table"""
+        started = time.perf_counter()
+        with self._lock:
+            source = 'snapshot' if self._load_snapshot(pool) else 'database'
+            if source == 'database':
+                self.build(self._read_jobs(pool, batch_size=batch_size))
+                added = len(self._docs)
+            else:
+                added = self.refresh(pool, batch_size)
+            if self._dirty:
+                self.save()
+            self._refreshed_at = time.monotonic()
+            self.last_load = {
+                'source': source,
+                'jobs': len(self._docs),
+                'jobs_added': added,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+        logger.info(f"Job search index loaded from {source}: {len(self._docs)} jobs, "
+                    f"{len(self._postings)} terms in {self.last_load['elapsed_ms']} ms")
+
+    def ensure_loaded(self, pool):
+        """Build the index on first use, then catch up with new jobs every refresh_interval seconds"""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(pool)
+        elif self.refresh_interval is not None and time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self._refreshed_at = time.monotonic()  # one caller catches up, the others search as they are
+            try:
+                self.refresh(pool)
+            except Exception as e:
+                logger.warning(f"Job search index refresh failed: {e}")
+
+    def warm(self, pool):
+        """Load the index on a daemon thread so the first search does not wait for it"""
+        def run():
+            try:
+                self.ensure_loaded(pool)
+            except Exception as e:
+                logger.error(f"Job search index load failed: {e}")
+        threading.Thread(target=run, name='job-search-index', daemon=True).start()
+
+    def refresh(self, pool, batch_size=5000):
+        """Index jobs added since the newest indexed job (e.g. after a bulk import); returns how many"""
+        with self._lock:
+            jobs = self._read_jobs(pool, 'WHERE job_id > ?', (self._max_job_id,), batch_size)
+            added = 0
+            for job_id, fields in jobs:
+                self.add_job(job_id, fields)
+                added += 1
+            self._refreshed_at = time.monotonic()
+            return added
+
+    @staticmethod
+    def _read_jobs(pool, where='', params=(), batch_size=5000):
+        jobs = []
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'SELECT job_id, title, company, required_skills, description FROM Jobs {where}', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for job_id, title, company, skills, description in rows:
+                    jobs.append((int(job_id), {
+                        'title': title, 'company': company, 'skills': skills, 'description': description
+                    }))
+        return jobs
+
+    # ==================== SNAPSHOT ====================
+
+    def save(self):
+        """Write the index to snapshot_file (no-op without one)"""
+        if not self.snapshot_file:
+            return
+        with self._lock:
+            state = {
+                'version': SNAPSHOT_VERSION,
+                'postings': self._postings,
+                'docs': self._docs,
+                'total_length': self._total_length,
+                'avgdl': self._avgdl,
+                'max_job_id': self._max_job_id
+            }
+            os.makedirs(os.path.dirname(self.snapshot_file) or '.', exist_ok=True)
+            temp = f'{self.snapshot_file}.{os.getpid()}.tmp'  # every server process saves on exit
+            with open(temp, 'wb') as f:
+                marshal.dump(state, f)
+            os.replace(temp, self.snapshot_file)
+            self._dirty = False
+
+    def save_if_changed(self):
+        """Write the snapshot when jobs were indexed since it was last written (run at shutdown)"""
+        if self._dirty and self.loaded:
+            self.save()
+
+    def _load_snapshot(self, pool):
+        """Load snapshot_file if it still matches the Jobs table up to its newest job"""
+        if not self.snapshot_file:
+            return False
+        try:
+            with open(self.snapshot_file, 'rb') as f:
+                state = marshal.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable job search snapshot {self.snapshot_file}: {e}")
+            return False
+        if not isinstance(state, dict) or state.get('version') != SNAPSHOT_VERSION:
+            return False
+
+        # Jobs are only ever appended, so the same count up to the same newest job means nothing changed
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM Jobs WHERE job_id <= ?', (state['max_job_id'],))
+            if int(cursor.fetchone()[0]) != len(state['docs']):
+                logger.info("Job search snapshot is out of date, rebuilding")
+                return False
+
+        self._postings, self._docs = state['postings'], state['docs']
+        self._vocab = sorted(self._postings)
+        self._total_length, self._avgdl = state['total_length'], state['avgdl']
+        self._max_job_id = state['max_job_id']
+        self._impacts.clear()
+        self._dirty = False
+        self.loaded = True
+        return True
+
+    # ==================== SEARCH ====================
+
+    def idf(self, term):
+        df = len(self._postings.get(term, ()))
+        n = len(self._docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _impact_list(self, term):
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            impacts = sorted((factor, job_id) for job_id, factor in self._postings[term].items())
+            self._impacts[term] = impacts
+            if len(self._impacts) > self._impact_cache:
+                self._impacts.popitem(last=False)
+        else:
+            self._impacts.move_to_end(term)
+        return impacts
+
+    def _groups(self, query, prefix):
+        """[{term: weight}] - one group per query word, which a job must match through any of its terms"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        last = terms.pop() if prefix and query[-1:].isalnum() and len(terms[-1]) >= MIN_PREFIX else None
+
+        groups = []
+        for term in terms:
+            if term not in self._postings:
+                return []
+            groups.append({term: self.idf(term) / SCALE})
+        if last is not None:
+            start = bisect.bisect_left(self._vocab, last)
+            end = bisect.bisect_left(self._vocab, last + '\uffff', start)
+            matches = heapq.nlargest(MAX_PREFIX_TERMS, self._vocab[start:end], key=lambda t: len(self._postings[t]))
+            if not matches:
+                return []
+            groups.append({t: self.idf(t) / SCALE * (1.0 if t == last else PREFIX_DISCOUNT) for t in matches})
+        return groups
+
+    def _stream(self, group):
+        """(score, job_id) for a group's jobs, best first (a job may repeat with lower scores)"""
+        streams = [((factor * weight, job_id) for factor, job_id in reversed(self._impact_list(term)))
+                   for term, weight in group.items()]
+        return streams[0] if len(streams) == 1 else heapq.merge(*streams, reverse=True)
+
+    def _group_score(self, group, job_id):
+        return max(self._postings[term].get(job_id, 0) * weight for term, weight in group.items())
+
+    def _scorer(self, group):
+        """job_id -> the group's score, for jobs known to match the group"""
+        if len(group) == 1:
+            (term, weight), = group.items()
+            factors = self._postings[term]
+            return lambda job_id: factors[job_id] * weight
+        return lambda job_id: self._group_score(group, job_id)
+
+    def search(self, query, limit=10, prefix=True):
+        """Rank jobs containing every query word; returns (total_matches, [(job_id, score)])
+
+        With prefix, the last word also matches longer words, unless the query
+        ends with a space or punctuation (the user finished typing it).
+        """
+        with self._lock:
+            groups = self._groups(query, prefix)
+            if not groups:
+                return 0, []
+
+            # Jobs matching every group, smallest group first
+            key_sets = sorted(
+                (self._postings[next(iter(g))].keys() if len(g) == 1
+                 else set().union(*(self._postings[t].keys() for t in g)) for g in groups),
+                key=len)
+            matches = key_sets[0]
+            for keys in key_sets[1:]:
+                matches = keys & matches
+            total = len(matches)
+            if not total:
+                return 0, []
+
+            if len(groups) == 1:
+                top, seen = [], set()
+                for score, job_id in self._stream(groups[0]):
+                    if job_id not in seen:
+                        seen.add(job_id)
+                        top.append((score, job_id))
+                        if len(top) == limit:
+                            break
+            elif total <= DIRECT_SCORE_LIMIT:
+                top = self._score_all(groups, matches, limit)
+            else:
+                top = self._threshold_top(groups, matches, limit)
+            return total, [(job_id, round(score, 4)) for score, job_id in top]
+
+    def _score_all(self, groups, matches, limit):
+        """Top matches by scoring all of them, one column of weighted factors per group"""
+        job_ids = list(matches)
+        totals = None
+        for group in groups:
+            columns = [map(mul, map(self._postings[term].get, job_ids, itertools.repeat(0)), itertools.repeat(weight))
+                       for term, weight in group.items()]
+            column = columns[0] if len(columns) == 1 else map(max, *columns)
+            totals = list(column) if totals is None else list(map(add, totals, column))
+        return heapq.nlargest(limit, zip(totals, job_ids))
+
+    def _threshold_top(self, groups, matches, limit):
+        """Top matches by reading every group's stream best first, round-robin, and scoring
+        each new match in full; stops once no unseen job can beat the current k-th best"""
+        streams = [self._stream(g) for g in groups]
+        frontier = [max(g.values()) * (K1 + 1) * SCALE for g in groups]
+        scorers = [self._scorer(g) for g in groups]
+        seen, heap = set(), []
+        while streams:
+            for i, stream in enumerate(streams):
+                item = next(stream, None)
+                if item is None:
+                    frontier[i] = 0.0
+                    continue
+                frontier[i], job_id = item
+                if job_id in seen or job_id not in matches:
+                    continue
+                seen.add(job_id)
+                entry = (sum([score(job_id) for score in scorers]), job_id)
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            if len(heap) == limit and heap[0][0] >= sum(frontier):
+                break
+            if not any(frontier):
+                break
+        return sorted(heap, reverse=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'loaded': self.loaded,
+                'jobs': len(self._docs),
+                'terms': len(self._postings),
+                'postings': sum(len(p) for p in self._postings.values()),
+                'cached_impact_lists': len(self._impacts),
+                'snapshot_file': self.snapshot_file,
+                'unsaved_changes': self._dirty,
+                'last_load': dict(self.last_load)
+            }
+
+
+# ==================== BENCHMARK ====================
+
+_WORDS = ('software developer engineer data analyst python java javascript react node.js sql cloud aws '
+          'marketing sales finance accounting design graphic ux research intern graduate junior senior '
+          'support customer service operations logistics warehouse retail barista teaching tutor health '
+          'nurse care assistant manager team remote hybrid dublin cork galway limerick part time full '
+          'weekend evening students learn build test deploy maintain systems reports clients projects').split()
+
+
+def _synthetic_jobs(count, seed=42):
+    """Jobs whose words follow a Zipf-like distribution: the listed words are the most common"""
+    rng = random.Random(seed)
+    vocabulary = list(_WORDS) + [f'word{i}' for i in range(5000)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** 0.9 for rank in range(len(vocabulary))))
+    companies = [f'{rng.choice(_WORDS).title()} {rng.choice(("Ltd", "Group", "Labs", "Solutions"))}'
+                 for _ in range(2000)]
+    for job_id in range(1, count + 1):
+        words = rng.choices(vocabulary, cum_weights=cumulative, k=47)
+        yield job_id, {
+            'title': ' '.join(words[:3]),
+            'company': rng.choice(companies),
+            'skills': ' '.join(words[3:7]),
+            'description': ' '.join(words[7:])
+        }
+
+
+def benchmark(count, queries=500):
+    """Build an index over count synthetic jobs and time snapshot round trips and queries"""
+    index = JobSearchIndex()
+    started = time.perf_counter()
+    index.build(_synthetic_jobs(count))
+    print(f"Built index over {count} jobs in {time.perf_counter() - started:.2f} s: {index.stats()['terms']} terms, "
+          f"{index.stats()['postings']} postings")
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'.search_benchmark-{os.getpid()}.marshal')
+    index.snapshot_file = path
+    try:
+        started = time.perf_counter()
+        index.save()
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            marshal.load(f)
+        print(f"Snapshot: {os.path.getsize(path) / 1e6:.1f} MB, saved in {saved:.2f} s, "
+              f"loaded in {time.perf_counter() - started:.2f} s")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    rng = random.Random(7)
+    samples = {
+        'one word': lambda: rng.choice(_WORDS),
+        'two words': lambda: ' '.join(rng.sample(_WORDS, 2)),
+        'three words': lambda: ' '.join(rng.sample(_WORDS, 3)),
+        'type-ahead': lambda: f'{rng.choice(_WORDS)} {rng.choice(_WORDS)[:3]}'
+    }
+    for label, make in samples.items():
+        texts = [make() for _ in range(queries)]
+        for text in texts:
+            index.search(text)  # builds the sorted posting lists the timed run reuses
+        timings = []
+        for text in texts:
+            started = time.perf_counter()
+            index.search(text)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"{label:>12}: p50 {timings[len(timings) // 2]:.2f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)]:.2f} ms, max {timings[-1]:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search jobs, or benchmark the job search index')
+    parser.add_argument('query', nargs='?')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--benchmark', type=int, metavar='JOBS', help='time the index on synthetic jobs')
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return 0
+    if not args.query:
+        parser.error('give a query or --benchmark JOBS')
+
+    from db_pool import ConnectionPool
+    from storage import derived_data_file, get_storage_backend
+
+    storage = get_storage_backend()
+    pool = ConnectionPool(storage.connect)
+    index = JobSearchIndex(derived_data_file(storage, 'job_search', 'marshal'))
+    index.load(pool)
+    print(f"Loaded {len(index)} jobs from {index.last_load['source']} in {index.last_load['elapsed_ms']} ms")
+
+    started = time.perf_counter()
+    total, results = index.search(args.query, args.limit)
+    print(f"{total} matches in {(time.perf_counter() - started) * 1000:.2f} ms")
+    for job_id, score in results:
+        print(f"  job {job_id}: {score}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,490 @@
+# serve.py - Production Server for StudentConnect
+"""
+Pre-forking HTTP server for app_backend and server_RefHub
+The master process binds the port once and forks the worker processes.
+Each worker imports the application after the fork, so it opens its own
+database connections, caches and background threads. It then serves the
+shared socket with a bounded pool of request threads. The debugger, the
+reloader and per-request logging of the development server are off.
+
+Signals to the master:
+    SIGHUP           graceful reload: start workers with freshly imported code, then retire the old ones
+    SIGTERM, SIGINT  graceful shutdown: workers stop accepting and finish their in-flight requests
+
+    python serve.py app_backend:app --workers 4 --threads 8 --port 5000
+    python serve.py server_RefHub:app --port 8080
+    python serve.py app_backend:app --benchmark
+"""
+
+import argparse
+import atexit
+import http.client
+import importlib
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+import config
+from config import SERVER_CONFIG
+
+logger = logging.getLogger('serve')
+
+# A worker that dies is replaced after this many seconds (so a crashing app does not spin)
+RESPAWN_DELAY = 1.0
+
+# Seconds new workers get to import the app and start listening during a reload
+STARTUP_TIMEOUT = 60.0
+
+# Signals the master handles itself and forwards to workers as SIGTERM
+WORKER_SIGNALS = {getattr(signal, name) for name in ('SIGHUP', 'SIGTERM', 'SIGINT') if hasattr(signal, name)}
+
+
+def load_app(spec):
+    """The WSGI app named by 'module:attribute' (attribute defaults to app)"""
+    module_name, _, attribute = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attribute or 'app')
+
+
+class RequestHandler(WSGIRequestHandler):
+    """Werkzeug's request handler with keep-alive and optional access log"""
+
+    protocol_version = 'HTTP/1.1'
+    access_log = False
+
+    def log_request(self, code='-', size='-'):
+        if self.access_log:
+            super().log_request(code, size)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that runs each connection on a bounded pool of request threads
+    A connection is only accepted when a thread is free; until then it waits in the
+    listen backlog, where another worker can accept it."""
+
+    multithread = True
+
+    def __init__(self, host, port, app, fd, threads, handler=RequestHandler):
+        super().__init__(host, port, app, handler=handler, fd=fd)
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='request')
+        self._slots = threading.BoundedSemaphore(threads)
+
+    def serve_forever(self, poll_interval=0.5):
+        """Accept until shutdown(), then close the socket and wait for in-flight requests"""
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def get_request(self):
+        self._slots.acquire()
+        try:
+            return super().get_request()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+
+# ==================== WORKER ====================
+
+def run_worker(listener, app_spec, threads, keepalive_timeout=5.0, access_log=False, ready_fd=None):
+    """Body of a worker process: import the app, serve until SIGTERM, finish in-flight requests"""
+    stopping = threading.Event()
+    server = None
+
+    def stop(signum, frame):
+        stopping.set()
+        if server is not None:
+            # shutdown() waits for the accept loop, which runs on this (the main) thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if ready_fd is not None:  # forked by a Master
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches every process; the master decides
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, WORKER_SIGNALS)
+
+    app = load_app(app_spec)
+    handler = type('WorkerRequestHandler', (RequestHandler,), {
+        'access_log': access_log, 'timeout': keepalive_timeout
+    })
+    host, port = listener.getsockname()[:2]
+    server = PooledWSGIServer(host, port, app, listener.fileno(), threads, handler)
+    if ready_fd is not None:
+        os.write(ready_fd, b'.')
+        os.close(ready_fd)
+    logger.info(f"Worker {os.getpid()} serving {app_spec} with {threads} threads")
+    if not stopping.is_set():
+        server.serve_forever()
+    else:
+        server.server_close()
+    logger.info(f"Worker {os.getpid()} stopped")
+
+
+# ==================== MASTER ====================
+
+class _Worker:
+    def __init__(self, pid, generation, ready_fd):
+        self.pid = pid
+        self.generation = generation
+        self.ready_fd = ready_fd
+        self.ready = False
+        self.kill_at = None  # set once the worker has been asked to stop
+
+
+class Master:
+    """Binds the listening socket and keeps `workers` worker processes of the current generation running"""
+
+    def __init__(self, app_spec, host='0.0.0.0', port=5000, workers=None, threads=None,
+                 graceful_timeout=None, keepalive_timeout=None, access_log=False):
+        self.app_spec = app_spec
+        self.host = host
+        self.port = port
+        self.worker_count = workers or SERVER_CONFIG['workers']
+        self.threads = threads or SERVER_CONFIG['threads']
+        self.graceful_timeout = graceful_timeout if graceful_timeout is not None else SERVER_CONFIG['graceful_timeout']
+        self.keepalive_timeout = keepalive_timeout or SERVER_CONFIG['keepalive_timeout']
+        self.access_log = access_log
+        self.generation = 0
+        self.workers = {}  # pid -> _Worker
+        self._reload_requested = False
+        self._stop_requested = False
+        self._reloading = None  # generation being started by a reload
+        self._reload_started = 0.0
+        self._respawn_at = None
+        self._started = False  # a worker has come up at least once
+
+    def listen(self):
+        self.listener = socket.create_server((self.host, self.port), backlog=2048)
+        # Every worker waits on the same socket; the ones that lose the race must not block in accept()
+        self.listener.setblocking(False)
+
+    def run(self):
+        """Serve until SIGTERM/SIGINT; returns the exit status"""
+        self.listen()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        signal.set_wakeup_fd(self._wake_w)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        logger.info(f"Master {os.getpid()} listening on http://{self.host}:{self.port} "
+                    f"({self.worker_count} workers x {self.threads} threads)")
+
+        # Workers import the app after the fork and see this through config
+        config.SERVER_PROCESSES = self.worker_count
+        self.generation = 1
+        for _ in range(self.worker_count):
+            self._spawn(self.generation)
+
+        while not self._stop_requested:
+            self._wait_for_events(1.0)
+            self._reap()
+            if not self.workers and not self._started:
+                logger.error("Every worker exited during startup; check the application import")
+                return 1
+            if self._reload_requested:
+                self._reload_requested = False
+                self._start_reload()
+            self._check_reload()
+            self._maintain()
+        self._shutdown()
+        return 0
+
+    def _on_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _on_stop(self, signum, frame):
+        self._stop_requested = True
+
+    def _spawn(self, generation):
+        ready_r, ready_w = os.pipe()
+        # Signals stay blocked until the child has installed its own handlers
+        signal.pthread_sigmask(signal.SIG_BLOCK, WORKER_SIGNALS)
+        pid = os.fork()
+        if pid != 0:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, WORKER_SIGNALS)
+        else:
+            status = 1
+            try:
+                signal.set_wakeup_fd(-1)
+                for fd in [self._wake_r, self._wake_w, ready_r] + [w.ready_fd for w in self.workers.values()
+                                                                   if w.ready_fd is not None]:
+                    os.close(fd)
+                run_worker(self.listener, self.app_spec, self.threads, self.keepalive_timeout,
+                           self.access_log, ready_w)
+                status = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                # os._exit skips atexit, which the app uses to flush notifications and save its indexes
+                atexit._run_exitfuncs()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        os.close(ready_w)
+        self.workers[pid] = _Worker(pid, generation, ready_r)
+
+    def _wait_for_events(self, timeout):
+        fds = [self._wake_r] + [w.ready_fd for w in self.workers.values() if w.ready_fd is not None]
+        try:
+            readable, _, _ = select.select(fds, [], [], timeout)
+        except InterruptedError:
+            return
+        for fd in readable:
+            if fd == self._wake_r:
+                os.read(self._wake_r, 512)
+                continue
+            worker = next(w for w in self.workers.values() if w.ready_fd == fd)
+            os.read(fd, 1)
+            os.close(fd)
+            worker.ready_fd = None
+            worker.ready = True
+            self._started = True
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            if worker.ready_fd is not None:
+                os.close(worker.ready_fd)
+            if worker.kill_at is None and not self._stop_requested:
+                logger.warning(f"Worker {pid} exited unexpectedly (status {status})")
+                if worker.generation == self._reloading:
+                    self._abort_reload()
+                elif worker.generation == self.generation and self._started:
+                    self._respawn_at = self._respawn_at or time.monotonic() + RESPAWN_DELAY
+
+    def _maintain(self):
+        """Replace dead workers and force-stop workers that outlived the graceful timeout"""
+        now = time.monotonic()
+        if self._respawn_at is not None and now >= self._respawn_at:
+            self._respawn_at = None
+            running = sum(1 for w in self.workers.values() if w.generation == self.generation and w.kill_at is None)
+            for _ in range(self.worker_count - running):
+                self._spawn(self.generation)
+        for worker in self.workers.values():
+            if worker.kill_at is not None and now >= worker.kill_at:
+                logger.warning(f"Worker {worker.pid} did not stop within {self.graceful_timeout}s; killing it")
+                self._signal(worker, signal.SIGKILL)
+                worker.kill_at = float('inf')
+
+    def _start_reload(self):
+        if self._reloading is not None:
+            return
+        self._reloading = self.generation + 1
+        self._reload_started = time.monotonic()
+        logger.info(f"Reloading: starting {self.worker_count} workers with fresh code")
+        for _ in range(self.worker_count):
+            self._spawn(self._reloading)
+
+    def _check_reload(self):
+        if self._reloading is None:
+            return
+        new = [w for w in self.workers.values() if w.generation == self._reloading]
+        if len(new) == self.worker_count and all(w.ready for w in new):
+            old = [w for w in self.workers.values() if w.generation != self._reloading]
+            self.generation, self._reloading = self._reloading, None
+            for worker in old:
+                self._retire(worker)
+            logger.info(f"Reload complete: retired {len(old)} old workers")
+        elif time.monotonic() - self._reload_started > STARTUP_TIMEOUT:
+            self._abort_reload()
+
+    def _abort_reload(self):
+        logger.error("Reload failed: new workers did not start; keeping the current workers")
+        for worker in list(self.workers.values()):
+            if worker.generation == self._reloading:
+                self._retire(worker)
+        self._reloading = None
+
+    def _retire(self, worker):
+        if worker.kill_at is None:
+            worker.kill_at = time.monotonic() + self.graceful_timeout
+            self._signal(worker, signal.SIGTERM)
+
+    def _signal(self, worker, signum):
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _shutdown(self):
+        logger.info(f"Shutting down {len(self.workers)} workers")
+        for worker in self.workers.values():
+            self._retire(worker)
+        self.listener.close()
+        while self.workers:
+            self._wait_for_events(0.2)
+            self._reap()
+            self._maintain()
+        logger.info("Master stopped")
+
+
+def serve(app_spec, host='0.0.0.0', port=5000, workers=None, threads=None, graceful_timeout=None,
+          keepalive_timeout=None, access_log=False):
+    """Run the pre-forking server; without os.fork (Windows) one process serves with threads only"""
+    if hasattr(os, 'fork'):
+        return Master(app_spec, host, port, workers, threads, graceful_timeout, keepalive_timeout,
+                      access_log).run()
+    logger.warning("os.fork is not available: serving from a single process")
+    listener = socket.create_server((host, port), backlog=2048)
+    try:
+        run_worker(listener, app_spec, threads or SERVER_CONFIG['threads'],
+                   keepalive_timeout or SERVER_CONFIG['keepalive_timeout'], access_log)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# ==================== BENCHMARK ====================
+
+def _wait_until_up(port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _load(port, paths, clients, duration):
+    """Requests/second and latency percentiles for `clients` keep-alive clients over `duration` seconds"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine, failed, i = [], 0, offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                else:
+                    mine.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {'requests': len(latencies), 'errors': errors[0], 'req_per_s': len(latencies) / elapsed,
+            'p50_ms': percentile(0.50), 'p99_ms': percentile(0.99)}
+
+
+def benchmark(app_spec, paths, port=5099, workers=None, threads=None, clients=16, duration=10.0):
+    """Compare the development server (app.run(debug=True, threaded=True)) with serve.py"""
+    module_name, _, attribute = app_spec.partition(':')
+    here = os.path.dirname(os.path.abspath(__file__))
+    modes = {
+        'dev server': [sys.executable, '-c', f"import {module_name}; "
+                       f"{module_name}.{attribute or 'app'}.run(debug=True, port={port}, threaded=True)"],
+        'serve.py': [sys.executable, os.path.abspath(__file__), app_spec, '--port', str(port),
+                     '--workers', str(workers or SERVER_CONFIG['workers']),
+                     '--threads', str(threads or SERVER_CONFIG['threads'])],
+    }
+    print(f"{app_spec}: {clients} keep-alive clients for {duration:.0f}s on {', '.join(paths)} "
+          f"({os.cpu_count()} CPUs)")
+    for name, command in modes.items():
+        process = subprocess.Popen(command, cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
+        try:
+            if not _wait_until_up(port):
+                print(f"{name}: did not start")
+                continue
+            _load(port, paths, clients, 2.0)  # warm caches and indexes
+            result = _load(port, paths, clients, duration)
+            print(f"{name:>10}: {result['req_per_s']:8,.0f} req/s  p50 {result['p50_ms']:6.1f} ms  "
+                  f"p99 {result['p99_ms']:6.1f} ms  errors {result['errors']}")
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(30)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-forking production server for StudentConnect')
+    parser.add_argument('app', nargs='?', default='app_backend:app', help='module:attribute of the WSGI app')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=SERVER_CONFIG['workers'])
+    parser.add_argument('--threads', type=int, default=SERVER_CONFIG['threads'])
+    parser.add_argument('--graceful-timeout', type=float, default=SERVER_CONFIG['graceful_timeout'])
+    parser.add_argument('--keepalive-timeout', type=float, default=SERVER_CONFIG['keepalive_timeout'])
+    parser.add_argument('--access-log', action='store_true', help='log every request')
+    parser.add_argument('--benchmark', action='store_true', help='compare req/s with the development server')
+    parser.add_argument('--path', action='append', help='benchmark path (repeatable)')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(process)d] %(message)s')
+    if args.benchmark:
+        paths = args.path or ['/api/jobs', '/api/jobs/search?q=developer']
+        benchmark(args.app, paths, workers=args.workers, threads=args.threads,
+                  clients=args.clients, duration=args.duration)
+        return 0
+    return serve(args.app, args.host, args.port, args.workers, args.threads, args.graceful_timeout,
+                 args.keepalive_timeout, args.access_log)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -56,6 +56,7 @@ if __name__ == '__main__':
     print("   Admin Dashboard:         http://localhost:8080/admin")
     print("\n⚠️  Important: Backend API must be running on port 5000")
     print("   Start it with: python app_backend.py")
+    print("\n🚀 Production: python serve.py server_RefHub:app --port 8080")
     print("\n⌨️  Press CTRL+C to stop this server")
     print("="*70 + "\n")
     
@@ -0,0 +1,169 @@
+# skill_index.py - Skill Index and Job Matching for StudentConnect
+"""
+In-process inverted index from normalized skill to job IDs
+Ranks jobs for a student by IDF-weighted skill overlap, touching only the
+jobs that share at least one skill with the student instead of scanning
+the whole Jobs table.
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_skill(skill):
+    """Normalize a skill for matching: trimmed, lower-case, single spaces"""
+    return ' '.join(skill.split()).lower()
+
+
+def parse_skills(skills):
+    """Turn a comma-separated string (or list) of skills into a set of normalized skills"""
+    if not skills:
+        return set()
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    return {normalize_skill(s) for s in skills if s and s.strip()}
+
+
+class SkillIndex:
+    """Inverted index: normalized skill -> set of job IDs"""
+
+    def __init__(self, refresh_interval=None):
+        self._postings = {}
+        self._job_skills = {}
+        self._max_job_id = 0
+        self._lock = threading.RLock()
+        self.loaded = False
+        # Seconds between catch-ups with jobs added by other processes (None: never)
+        self.refresh_interval = refresh_interval
+        self._refreshed_at = 0.0
+
+    def __len__(self):
+        return len(self._job_skills)
+
+    # ==================== MAINTENANCE ====================
+
+    def add_job(self, job_id, skills):
+        """Index (or re-index) a single job"""
+        tokens = frozenset(parse_skills(skills))
+        with self._lock:
+            self._remove_locked(job_id)
+            self._job_skills[job_id] = tokens
+            self._max_job_id = max(self._max_job_id, job_id)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(job_id)
+
+    def remove_job(self, job_id):
+        """Drop a job from the index"""
+        with self._lock:
+            self._remove_locked(job_id)
+
+    def _remove_locked(self, job_id):
+        for token in self._job_skills.pop(job_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(job_id)
+                if not postings:
+                    del self._postings[token]
+
+    def load(self, pool, batch_size=5000):
+        """(Re)build the index from the Jobs table"""
+        postings, job_skills = {}, {}
+        started = time.monotonic()
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT job_id, required_skills FROM Jobs')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for job_id, skills in rows:
+                    tokens = frozenset(parse_skills(skills))
+                    job_skills[int(job_id)] = tokens
+                    for token in tokens:
+                        postings.setdefault(token, set()).add(int(job_id))
+        with self._lock:
+            self._postings, self._job_skills = postings, job_skills
+            self._max_job_id = max(job_skills, default=0)
+            self._refreshed_at = started
+            self.loaded = True
+        logger.info(f"Skill index built: {len(job_skills)} jobs, {len(postings)} distinct skills")
+
+    def ensure_loaded(self, pool):
+        """Build the index on first use, then catch up with new jobs every refresh_interval seconds"""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(pool)
+        elif self.refresh_interval is not None and time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self._refreshed_at = time.monotonic()  # one caller catches up, the others match as they are
+            try:
+                self.refresh(pool)
+            except Exception as e:
+                logger.warning(f"Skill index refresh failed: {e}")
+
+    def refresh(self, pool):
+        """Index jobs added since the newest indexed job (e.g. by another server process); returns how many"""
+        with self._lock:
+            after = self._max_job_id
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT job_id, required_skills FROM Jobs WHERE job_id > ?', (after,))
+            rows = cursor.fetchall()
+        for job_id, skills in rows:
+            self.add_job(int(job_id), skills)
+        return len(rows)
+
+    def invalidate(self):
+        """Drop the index so it is rebuilt on next use (e.g. after a bulk import)"""
+        with self._lock:
+            self._postings, self._job_skills = {}, {}
+            self._max_job_id = 0
+            self.loaded = False
+
+    # ==================== MATCHING ====================
+
+    def idf(self, token):
+        """Inverse document frequency of a skill (rare skills weigh more)"""
+        df = len(self._postings.get(token, ()))
+        return math.log((len(self._job_skills) + 1) / (df + 1)) + 1.0
+
+    def recommend(self, skills, limit=10):
+        """Rank jobs by IDF-weighted overlap with the given skills
+
+        Returns a list of (job_id, score, matched_skills) with score in 0..1,
+        the share of the student's weighted skills that the job asks for.
+        """
+        tokens = parse_skills(skills)
+        with self._lock:
+            weights = {t: self.idf(t) for t in tokens if t in self._postings}
+            if not weights:
+                return []
+            total_weight = sum(self.idf(t) for t in tokens)
+
+            # Rare skills first. Once the current k-th best score beats everything the
+            # remaining skills could add, new jobs can no longer reach the top, so the big
+            # posting lists of common skills only update the existing candidates.
+            ordered = sorted(weights.items(), key=lambda item: len(self._postings[item[0]]))
+            remaining = sum(weights.values())
+            scores = {}
+            for token, weight in ordered:
+                postings = self._postings[token]
+                if len(scores) >= limit and heapq.nlargest(limit, scores.values())[-1] > remaining:
+                    for job_id in (scores.keys() & postings):
+                        scores[job_id] += weight
+                else:
+                    for job_id in postings:
+                        scores[job_id] = scores.get(job_id, 0.0) + weight
+                remaining -= weight
+
+            # Ties go to the newest job (highest ID)
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+            return [
+                (job_id, round(score / total_weight, 4), sorted(self._job_skills[job_id] & weights.keys()))
+                for job_id, score in top
+            ]
@@ -0,0 +1,528 @@
+# storage.py - Storage Backends for StudentConnect
+"""
+Pluggable storage layer for StudentConnect
+SqlServerBackend talks to the production SQL Server database through pyodbc.
+SqliteBackend is an embedded engine that creates the StudentConnect schema,
+loads the StudentConnectDB.sql seed and translates the T-SQL used by the
+application, so the system can be run and benchmarked without SQL Server.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime
+from functools import lru_cache
+
+from config import ANALYTICS_DIR, DB_BACKEND, SQLITE_CONFIG, get_connection_string
+
+logger = logging.getLogger(__name__)
+
+
+# Secondary indexes backing the application's hot queries: (name, table, columns)
+INDEXES = [
+    ('IX_Students_email', 'Students', 'email'),
+    ('IX_Employers_email', 'Employers', 'email'),
+    ('IX_Jobs_created_at', 'Jobs', 'created_at DESC, job_id DESC'),
+    ('IX_Applications_applied_date', 'Applications', 'applied_date'),
+    ('IX_StudentReferences_request_date', 'StudentReferences', 'request_date'),
+    ('IX_StudentReferences_response_date', 'StudentReferences', 'response_date'),
+    ('IX_StudentReferences_token', 'StudentReferences', 'token'),
+    ('IX_StudentReferences_status_expiry', 'StudentReferences', 'status, expiry_date'),
+    ('IX_Notifications_recipient', 'Notifications', 'recipient_id, recipient_type, created_at DESC, notification_id DESC'),
+    ('IX_Notifications_unread', 'Notifications', 'recipient_id, recipient_type, is_read'),
+]
+
+# Tables added by the application on top of the StudentConnect schema: (name, SQL Server DDL)
+SQLSERVER_TABLES = [
+    ('ReferenceStats', '''
+        CREATE TABLE ReferenceStats (
+            student_id   INT PRIMARY KEY,
+            total        INT NOT NULL DEFAULT 0,
+            pending      INT NOT NULL DEFAULT 0,
+            completed    INT NOT NULL DEFAULT 0,
+            expired      INT NOT NULL DEFAULT 0,
+            rating_sum   INT NOT NULL DEFAULT 0,
+            rating_count INT NOT NULL DEFAULT 0
+        )
+    '''),
+]
+
+
+# ==================== STORAGE BACKENDS ====================
+
+class StorageBackend:
+    """Base class for storage backends"""
+
+    name = None
+    integrity_errors = ()
+
+    def connect(self):
+        """Open a new DB-API connection"""
+        raise NotImplementedError
+
+    def initialize(self):
+        """Prepare the database before first use"""
+
+    def fetch_batch(self, conn, statements):
+        """Rows of each (sql, params) statement, all run on one connection"""
+        cursor = conn.cursor()
+        results = []
+        for sql, params in statements:
+            cursor.execute(sql, params)
+            results.append(cursor.fetchall())
+        return results
+
+
+class SqlServerBackend(StorageBackend):
+    """Production backend using SQL Server through pyodbc"""
+
+    name = 'sqlserver'
+
+    def __init__(self, connection_string=None):
+        import pyodbc
+        self._pyodbc = pyodbc
+        self.connection_string = connection_string or get_connection_string()
+        self.integrity_errors = (pyodbc.IntegrityError,)
+        self.initialize()
+
+    def connect(self):
+        return self._pyodbc.connect(self.connection_string)
+
+    def fetch_batch(self, conn, statements):
+        """Send the statements as one batch and read back one result set per statement"""
+        if len(statements) < 2:
+            return super().fetch_batch(conn, statements)
+        cursor = conn.cursor()
+        cursor.execute('SET NOCOUNT ON;\n' + ';\n'.join(sql for sql, _ in statements),
+                       [param for _, params in statements for param in params])
+        results = [cursor.fetchall()]
+        while len(results) < len(statements) and cursor.nextset():
+            results.append(cursor.fetchall())
+        return results
+
+    def initialize(self):
+        """Create any missing application tables and indexes"""
+        try:
+            conn = self.connect()
+            try:
+                cursor = conn.cursor()
+                for name, ddl in SQLSERVER_TABLES:
+                    cursor.execute(f"IF OBJECT_ID('{name}', 'U') IS NULL {ddl}")
+                for name, table, columns in INDEXES:
+                    cursor.execute(
+                        f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{name}') "
+                        f"CREATE INDEX {name} ON {table} ({columns})"
+                    )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            # Missing DDL permissions must not stop the application from starting
+            logger.warning(f"Could not verify database tables and indexes: {e}")
+
+
+# ==================== T-SQL TRANSLATION ====================
+
+_STRING_LITERAL_RE = re.compile(r"N?'(?:[^']|'')*'")
+_BRACKET_IDENT_RE = re.compile(r'\[([^\]\x00]+)\]')
+_TOP_RE = re.compile(r'\bSELECT(\s+DISTINCT)?\s+TOP\s*(?:\(\s*(\d+)\s*\)|(\d+))', re.IGNORECASE)
+_OUTPUT_RE = re.compile(r'\s+OUTPUT\s+(INSERTED\.\w+(?:\s*,\s*INSERTED\.\w+)*)', re.IGNORECASE)
+_SIMPLE_REWRITES = [
+    (re.compile(r'@@IDENTITY', re.IGNORECASE), 'last_insert_rowid()'),
+    (re.compile(r'\bGETDATE\s*\(\s*\)', re.IGNORECASE), "datetime('now', 'localtime')"),
+    (re.compile(r'\bISNULL\s*\(', re.IGNORECASE), 'IFNULL('),
+    (re.compile(r'\bLEN\s*\(', re.IGNORECASE), 'LENGTH('),
+]
+
+
+def _move_top_to_limit(sql):
+    """Rewrite SELECT TOP n ... into SELECT ... LIMIT n, respecting subqueries"""
+    while True:
+        match = _TOP_RE.search(sql)
+        if not match:
+            return sql
+        # The statement ends at the closing parenthesis of its own level, a ';' or the end
+        depth, end = 0, match.end()
+        while end < len(sql):
+            char = sql[end]
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif char == ';' and depth == 0:
+                break
+            end += 1
+        body_end = end
+        while body_end > match.end() and sql[body_end - 1].isspace():
+            body_end -= 1
+        sql = (sql[:match.start()] + 'SELECT' + (match.group(1) or '') + sql[match.end():body_end]
+               + f' LIMIT {match.group(2) or match.group(3)}' + sql[body_end:])
+
+
+def _move_output_to_returning(sql):
+    """Rewrite INSERT/UPDATE ... OUTPUT INSERTED.a, INSERTED.b ... into INSERT/UPDATE ... RETURNING a, b"""
+    match = _OUTPUT_RE.search(sql)
+    if not match:
+        return sql
+    columns = re.sub(r'INSERTED\.', '', match.group(1), flags=re.IGNORECASE)
+    sql = sql[:match.start()] + sql[match.end():]
+    body = sql.rstrip().rstrip(';').rstrip()
+    return f'{body} RETURNING {columns}'
+
+
+@lru_cache(maxsize=1024)
+def translate_sql(sql):
+    """Translate the T-SQL dialect used by StudentConnect into SQLite SQL"""
+    literals = []
+
+    def stash(match):
+        literal = match.group(0)
+        literals.append(literal[1:] if literal[0] in 'Nn' else literal)
+        return f'\x00{len(literals) - 1}\x00'
+
+    # String literals are masked so rewrites never touch quoted data
+    masked = _STRING_LITERAL_RE.sub(stash, sql)
+    for pattern, replacement in _SIMPLE_REWRITES:
+        masked = pattern.sub(replacement, masked)
+    masked = _BRACKET_IDENT_RE.sub(r'"\1"', masked)
+    masked = _move_top_to_limit(masked)
+    masked = _move_output_to_returning(masked)
+    return re.sub(r'\x00(\d+)\x00', lambda m: literals[int(m.group(1))], masked)
+
+
+# ==================== SQLITE ====================
+
+# Emails compare without case, as under SQL Server's default collation
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS Students (
+    student_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name       VARCHAR(100) NOT NULL,
+    email           VARCHAR(100) NOT NULL UNIQUE COLLATE NOCASE,
+    password_hash   VARCHAR(255) NOT NULL,
+    phone           VARCHAR(20),
+    university      VARCHAR(100),
+    major           VARCHAR(100),
+    gpa             DECIMAL(3,2),
+    skills          TEXT,
+    created_at      DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS Employers (
+    employer_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_name    VARCHAR(100) NOT NULL,
+    contact_person  VARCHAR(100),
+    email           VARCHAR(100) NOT NULL UNIQUE COLLATE NOCASE,
+    password_hash   VARCHAR(255) NOT NULL,
+    phone           VARCHAR(20),
+    industry        VARCHAR(50),
+    company_size    VARCHAR(50),
+    website         VARCHAR(200),
+    created_at      DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS Jobs (
+    job_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    title           VARCHAR(200) NOT NULL,
+    company         VARCHAR(100) NOT NULL,
+    job_type        VARCHAR(50),
+    location        VARCHAR(100),
+    salary          VARCHAR(50),
+    hours           VARCHAR(50),
+    description     TEXT,
+    required_skills TEXT,
+    posted          VARCHAR(50),
+    employer_id     INTEGER REFERENCES Employers(employer_id),
+    created_at      DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS Applications (
+    application_id  INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id          INTEGER NOT NULL REFERENCES Jobs(job_id),
+    student_id      INTEGER NOT NULL REFERENCES Students(student_id),
+    job_title       VARCHAR(200),
+    company         VARCHAR(100),
+    applied_date    DATETIME DEFAULT (datetime('now', 'localtime')),
+    status          VARCHAR(20) DEFAULT 'Pending'
+                    CHECK (status IN ('Pending', 'Reviewed', 'Shortlisted', 'Accepted', 'Rejected')),
+    cover_letter    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS StudentReferences (
+    reference_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id      INTEGER NOT NULL REFERENCES Students(student_id),
+    referee_name    VARCHAR(100) NOT NULL,
+    referee_email   VARCHAR(100) NOT NULL,
+    referee_phone   VARCHAR(20),
+    relationship    VARCHAR(50),
+    company         VARCHAR(100),
+    position        VARCHAR(100),
+    request_date    DATETIME DEFAULT (datetime('now', 'localtime')),
+    status          VARCHAR(20) DEFAULT 'pending',
+    response_date   DATETIME,
+    reference_text  TEXT,
+    rating          INTEGER,
+    token           VARCHAR(100),
+    expiry_date     DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS Notifications (
+    notification_id   INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient_id      INTEGER NOT NULL,
+    recipient_type    VARCHAR(20) NOT NULL,
+    message           TEXT NOT NULL,
+    notification_type VARCHAR(50),
+    is_read           BIT DEFAULT 0,
+    created_at        DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS ReferenceStats (
+    student_id   INTEGER PRIMARY KEY,
+    total        INTEGER NOT NULL DEFAULT 0,
+    pending      INTEGER NOT NULL DEFAULT 0,
+    completed    INTEGER NOT NULL DEFAULT 0,
+    expired      INTEGER NOT NULL DEFAULT 0,
+    rating_sum   INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0
+);
+'''
+
+
+def _adapt_datetime(value):
+    return value.isoformat(' ')
+
+
+def _convert_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter('DATETIME', _convert_datetime)
+
+
+def _concat(*values):
+    return ''.join('' if value is None else str(value) for value in values)
+
+
+def _params(params):
+    """Accept both cursor.execute(sql, (a, b)) and pyodbc-style cursor.execute(sql, a, b)"""
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        return params[0]
+    return params
+
+
+class SqliteCursor:
+    """pyodbc-compatible cursor that translates T-SQL before execution"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, *params):
+        self._cursor.execute(translate_sql(sql), _params(params))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(translate_sql(sql), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class SqliteConnection:
+    """pyodbc-compatible connection wrapper around sqlite3"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self):
+        return SqliteCursor(self._connection.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+class SqliteBackend(StorageBackend):
+    """Embedded SQLite backend for local runs, tests and benchmarks"""
+
+    name = 'sqlite'
+    integrity_errors = (sqlite3.IntegrityError,)
+
+    def __init__(self, path=None, seed_file=None):
+        self.path = path or SQLITE_CONFIG['path']
+        self.seed_file = seed_file if seed_file is not None else SQLITE_CONFIG['seed_file']
+        self._keepalive = None
+        if self.path == ':memory:':
+            # A named shared-cache database lets every pooled connection see the same data;
+            # the keepalive connection stops it from disappearing when the pool is empty
+            self._uri = f'file:studentconnect-{uuid.uuid4().hex}?mode=memory&cache=shared'
+        else:
+            self._uri = None
+        self.initialize()
+
+    def _raw_connect(self):
+        if self._uri:
+            conn = sqlite3.connect(self._uri, uri=True, timeout=30,
+                                   detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.path, timeout=30,
+                                   detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        # T-SQL's CONCAT (built into SQLite only from 3.44)
+        conn.create_function('CONCAT', -1, _concat, deterministic=True)
+        return conn
+
+    def connect(self):
+        return SqliteConnection(self._raw_connect())
+
+    def initialize(self):
+        """Create the schema and load the seed data into an empty database"""
+        conn = self._raw_connect()
+        if self._uri:
+            self._keepalive = conn
+        try:
+            conn.executescript(SQLITE_SCHEMA)
+            for name, table, columns in INDEXES:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+            # Holding the write lock while checking means processes starting together (serve.py
+            # workers) seed the database once
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT COUNT(*) FROM Students').fetchone()[0] == 0 and self.seed_file:
+                self.load_seed(conn)
+            else:
+                conn.rollback()
+        finally:
+            if not self._uri:
+                conn.close()
+
+    def load_seed(self, conn):
+        """Load the INSERT statements from StudentConnectDB.sql"""
+        with open(self.seed_file, encoding='utf-8-sig') as f:
+            script = f.read()
+        count = 0
+        with conn:
+            for statement in split_sql_statements(script):
+                if statement.upper().startswith('INSERT INTO'):
+                    conn.execute(translate_sql(statement))
+                    count += 1
+            # Seed dates such as '2024-01-15' are stored as text; widen them to the
+            # 'YYYY-MM-DD HH:MM:SS' form used everywhere else so comparisons sort correctly
+            tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            for table in tables:
+                for column in conn.execute(f'PRAGMA table_info("{table}")').fetchall():
+                    if column[2].upper() == 'DATETIME':
+                        conn.execute(f'UPDATE "{table}" SET {column[1]} = datetime({column[1]}) '
+                                     f'WHERE length({column[1]}) = 10')
+        logger.info(f"Loaded {count} seed statements from {self.seed_file}")
+
+
+def split_sql_statements(script):
+    """Split a T-SQL script into statements, dropping comments and GO separators"""
+    statements, current = [], []
+    i, in_string = 0, False
+    while i < len(script):
+        char = script[i]
+        if in_string:
+            current.append(char)
+            if char == "'":
+                if script[i + 1:i + 2] == "'":
+                    current.append("'")
+                    i += 1
+                else:
+                    in_string = False
+        elif char == "'":
+            in_string = True
+            current.append(char)
+        elif script.startswith('--', i):
+            newline = script.find('\n', i)
+            i = len(script) if newline == -1 else newline
+            continue
+        elif char == ';':
+            statements.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append(''.join(current))
+
+    result = []
+    for statement in statements:
+        lines = [line for line in statement.strip().splitlines() if line.strip().upper() != 'GO']
+        statement = '\n'.join(lines).strip()
+        if statement:
+            result.append(statement)
+    return result
+
+
+# ==================== BACKEND SELECTION ====================
+
+BACKENDS = {
+    'sqlserver': SqlServerBackend,
+    'sqlite': SqliteBackend
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_storage_backend(name=None, **options):
+    """Create a storage backend by name ('sqlserver' or 'sqlite')"""
+    name = (name or DB_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**options)
+
+
+def derived_data_file(storage, prefix, extension):
+    """Per-database file under ANALYTICS_DIR for data derived from it (None for in-memory databases)"""
+    identity = getattr(storage, 'path', None) or getattr(storage, 'connection_string', '')
+    if identity == ':memory:':
+        return None
+    digest = hashlib.sha1(f'{storage.name}|{identity}'.encode()).hexdigest()[:12]
+    return os.path.join(ANALYTICS_DIR, f'{prefix}-{digest}.{extension}')
+
+
+def get_storage_backend():
+    """Return the process-wide storage backend selected in config.py"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_storage_backend()
+            logger.info(f"Using '{_backend.name}' storage backend")
+        return _backend
@@ -0,0 +1,271 @@
+# trends.py - Trend Reports for StudentConnect
+"""
+Time-bucketed trend reports
+- applications per day or week, overall and per employer
+- conversion from application to 'Accepted' per employer
+- time from reference request to the referee's response
+
+Rows are grouped into day or week buckets by date arithmetic on their
+timestamps. A bucket is closed once it ended more than settle_days ago
+(long enough for its applications to be decided or its references answered
+or expired); closed buckets are cached (in memory, and in a per-database
+file when one is given) and never recomputed, so each report only reads
+rows from the open buckets onwards.
+
+    python trends.py applications --bucket week
+    python trends.py conversion --bucket week
+    python trends.py reference-response --bucket week
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from config import REFERENCE_EXPIRY_DAYS
+
+BUCKETS = ('day', 'week')
+
+# Applications are usually decided within this many days of being submitted
+APPLICATION_SETTLE_DAYS = 14
+
+# Read from here when nothing is cached yet
+EARLIEST = date(1900, 1, 1)
+
+
+def default_cache_file(storage):
+    """Bucket cache file for a database (None for in-memory databases, which do not outlive the process)"""
+    from storage import derived_data_file
+    return derived_data_file(storage, 'trend_buckets', 'json')
+
+
+def bucket_start(value, bucket):
+    """First day of the bucket holding a date or datetime (weeks start on Monday)"""
+    day = value.date() if isinstance(value, datetime) else value
+    if bucket == 'week':
+        day -= timedelta(days=day.weekday())
+    return day
+
+
+def _as_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class _Dataset:
+    """One bucketed source query and how its rows are folded into bucket totals"""
+
+    def __init__(self, sql, settle_days, fold):
+        self.sql = sql
+        self.settle_days = settle_days
+        self.fold = fold  # fold(buckets_dict, bucket_key, row)
+
+
+def _fold_application(buckets, key, row):
+    # row: (applied_date, status, employer_id); per employer [applications, accepted]
+    employers = buckets.setdefault(key, {})
+    counts = employers.setdefault(str(row[2]) if row[2] is not None else 'none', [0, 0])
+    counts[0] += 1
+    if row[1] == 'Accepted':
+        counts[1] += 1
+
+
+def _fold_reference(buckets, key, row):
+    # row: (request_date, response_date); [requests, responses, total response hours]
+    counts = buckets.setdefault(key, [0, 0, 0.0])
+    counts[0] += 1
+    if row[1] is not None:
+        counts[1] += 1
+        counts[2] += (_as_datetime(row[1]) - _as_datetime(row[0])).total_seconds() / 3600
+
+
+DATASETS = {
+    'applications': _Dataset('''
+        SELECT a.applied_date, a.status, j.employer_id
+        FROM Applications a
+        LEFT JOIN Jobs j ON a.job_id = j.job_id
+        WHERE a.applied_date >= ?
+    ''', APPLICATION_SETTLE_DAYS, _fold_application),
+    # Requests are answered or expired within REFERENCE_EXPIRY_DAYS
+    'references': _Dataset('''
+        SELECT request_date, response_date
+        FROM StudentReferences
+        WHERE request_date >= ?
+    ''', REFERENCE_EXPIRY_DAYS, _fold_reference),
+}
+
+
+class TrendReports:
+    """Trend reports with closed buckets cached in memory and optionally in cache_file"""
+
+    def __init__(self, cache_file=None):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        # 'dataset:bucket' -> {'closed': {bucket day: totals}, 'open_from': first open bucket day}
+        self._state = self._load()
+        self.last_run = {}
+
+    def _load(self):
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        temp = f'{self.cache_file}.{os.getpid()}.tmp'  # several server processes may save at once
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f)
+        os.replace(temp, self.cache_file)
+
+    def clear(self):
+        """Forget every cached bucket (after historical data was corrected)"""
+        with self._lock:
+            self._state = {}
+            self._save()
+
+    def _buckets(self, conn, name, bucket, today=None):
+        """{bucket day (ISO): totals} for every bucket, reading only rows from open buckets"""
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+        dataset = DATASETS[name]
+        today = today or date.today()
+        open_from = bucket_start(today - timedelta(days=dataset.settle_days), bucket)
+        key = f'{name}:{bucket}'
+
+        with self._lock:
+            state = self._state.get(key, {'closed': {}, 'open_from': None})
+            read_from = date.fromisoformat(state['open_from']) if state['open_from'] else EARLIEST
+
+            started = time.perf_counter()
+            cursor = conn.cursor()
+            cursor.execute(dataset.sql, (datetime.combine(read_from, datetime.min.time()),))
+            fresh, rows = {}, 0
+            for row in cursor.fetchall():
+                if row[0] is None:
+                    continue
+                dataset.fold(fresh, bucket_start(_as_datetime(row[0]), bucket).isoformat(), row)
+                rows += 1
+
+            closed = dict(state['closed'])
+            open_from_key = open_from.isoformat()
+            newly_closed = {k: v for k, v in fresh.items() if k < open_from_key}
+            if newly_closed or state['open_from'] != open_from_key:
+                closed.update(newly_closed)
+                self._state[key] = {'closed': closed, 'open_from': open_from_key}
+                self._save()
+
+            self.last_run[key] = {
+                'rows_read': rows,
+                'read_from': state['open_from'],
+                'buckets_reused': len(state['closed']),
+                'buckets_closed_now': len(newly_closed),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+            }
+
+        result = dict(closed)
+        result.update((k, v) for k, v in fresh.items() if k >= open_from_key)
+        return result
+
+    # ==================== REPORTS ====================
+
+    def applications(self, conn, bucket='week', employer_id=None):
+        """[{bucket, applications}] oldest first, for everyone or one employer"""
+        buckets = self._buckets(conn, 'applications', bucket)
+        report = []
+        for key in sorted(buckets):
+            employers = buckets[key]
+            if employer_id is not None:
+                count = employers.get(str(employer_id), [0, 0])[0]
+            else:
+                count = sum(counts[0] for counts in employers.values())
+            report.append({'bucket': key, 'applications': count})
+        return report
+
+    def conversion(self, conn, bucket='week', employer_id=None):
+        """[{bucket, employer_id, applications, accepted, conversion_rate}] oldest first"""
+        buckets = self._buckets(conn, 'applications', bucket)
+        report = []
+        for key in sorted(buckets):
+            for employer, (applications, accepted) in sorted(buckets[key].items()):
+                if employer_id is not None and employer != str(employer_id):
+                    continue
+                report.append({
+                    'bucket': key,
+                    'employer_id': None if employer == 'none' else int(employer),
+                    'applications': applications,
+                    'accepted': accepted,
+                    'conversion_rate': round(accepted / applications, 4) if applications else 0.0
+                })
+        return report
+
+    def reference_response(self, conn, bucket='week'):
+        """[{bucket, requests, responses, avg_hours_to_response}] by request date, oldest first"""
+        buckets = self._buckets(conn, 'references', bucket)
+        return [{
+            'bucket': key,
+            'requests': requests,
+            'responses': responses,
+            'avg_hours_to_response': round(hours / responses, 1) if responses else None
+        } for key, (requests, responses, hours) in sorted(buckets.items())]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached': {key: len(state['closed']) for key, state in self._state.items()},
+                'last_run': dict(self.last_run)
+            }
+
+
+REPORTS = {
+    'applications': TrendReports.applications,
+    'conversion': TrendReports.conversion,
+    'reference-response': TrendReports.reference_response,
+}
+
+
+def main(argv=None):
+    from storage import get_storage_backend
+
+    parser = argparse.ArgumentParser(description='Time-bucketed trend reports')
+    parser.add_argument('report', choices=list(REPORTS))
+    parser.add_argument('--bucket', choices=BUCKETS, default='week')
+    parser.add_argument('--employer-id', type=int)
+    parser.add_argument('--rebuild', action='store_true', help='discard cached closed buckets first')
+    args = parser.parse_args(argv)
+
+    storage = get_storage_backend()
+    trends = TrendReports(default_cache_file(storage))
+    if args.rebuild:
+        trends.clear()
+    conn = storage.connect()
+    try:
+        if args.report == 'reference-response':
+            rows = trends.reference_response(conn, args.bucket)
+        else:
+            rows = REPORTS[args.report](trends, conn, args.bucket, args.employer_id)
+    finally:
+        conn.close()
+
+    if rows:
+        columns = list(rows[0])
+        print('  '.join(f'{c:>22}' for c in columns))
+        for row in rows:
+            print('  '.join(f"{'' if row[c] is None else row[c]!s:>22}" for c in columns))
+    else:
+        print("No data")
+    for key, run in trends.last_run.items():
+        print(f"\n{key}: read {run['rows_read']} rows in {run['elapsed_ms']} ms, "
+              f"reused {run['buckets_reused']} closed buckets")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
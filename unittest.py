@@ -6,30 +6,19 @@ Run with: python unittest.py
 """
 
 import unittest
-import pyodbc
 import hashlib
+import json
 import requests
 import time
 from datetime import datetime
+from storage import get_storage_backend
 
 # Test Configuration
 API_BASE_URL = 'http://localhost:5000/api'
-DB_CONFIG = {
-    'driver': '{ODBC Driver 17 for SQL Server}',
-    'server': 'localhost',
-    'database': 'StudentConnectDB',
-    'trusted_connection': 'yes'
-}
 
 def get_db_connection():
-    """Create database connection"""
-    conn_str = (
-        f"DRIVER={DB_CONFIG['driver']};"
-        f"SERVER={DB_CONFIG['server']};"
-        f"DATABASE={DB_CONFIG['database']};"
-        f"Trusted_Connection={DB_CONFIG['trusted_connection']};"
-    )
-    return pyodbc.connect(conn_str)
+    """Create database connection using the backend selected in config.py"""
+    return get_storage_backend().connect()
 
 def hash_password(password):
     """Hash password using SHA-256"""
@@ -224,6 +213,440 @@ class TestAPIEndpoints(unittest.TestCase):
         self.assertTrue(data.get('success'))
         self.assertIn('references', data)
         print(f"✓ GET /api/references successful - Found {len(data['references'])} references")
+    
+    def test_28_api_pool_stats(self):
+        """Test GET /api/admin/pool endpoint"""
+        response = requests.get(f"{API_BASE_URL}/admin/pool")
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.json()
+        self.assertTrue(data.get('success'))
+        self.assertIn('in_use', data['pool'])
+        self.assertLessEqual(data['pool']['open'], data['pool']['max_size'])
+        print(f"✓ GET /api/admin/pool successful - {data['pool']['idle']} idle connections")
+    
+    def test_29_api_jobs_pagination(self):
+        """Test cursor pagination on GET /api/jobs"""
+        first = requests.get(f"{API_BASE_URL}/jobs", params={'page_size': 2}).json()
+        self.assertTrue(first.get('success'))
+        self.assertLessEqual(len(first['jobs']), 2)
+        
+        if not first['next_cursor']:
+            self.skipTest("Not enough jobs to test a second page")
+        
+        second = requests.get(f"{API_BASE_URL}/jobs", params={'page_size': 2, 'cursor': first['next_cursor']}).json()
+        first_ids = {j['id'] for j in first['jobs']}
+        self.assertFalse(first_ids & {j['id'] for j in second['jobs']}, "Pages overlap")
+        print("✓ GET /api/jobs pagination successful - pages do not overlap")
+    
+    def test_30_api_admin_summary(self):
+        """Test GET /api/admin/summary endpoint"""
+        response = requests.get(f"{API_BASE_URL}/admin/summary")
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.json()
+        self.assertTrue(data.get('success'))
+        summary = data['summary']
+        self.assertIn('student', summary['users'])
+        self.assertEqual(sum(summary['application_status'].values()), summary['totals']['applications'])
+        print(f"✓ GET /api/admin/summary successful - {summary['totals']['jobs']} jobs")
+    
+    def test_31_api_recommended_jobs(self):
+        """Test GET /api/students/<id>/recommended-jobs endpoint"""
+        response = requests.get(f"{API_BASE_URL}/students/1/recommended-jobs", params={'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        
+        jobs = response.json()['jobs']
+        self.assertLessEqual(len(jobs), 5)
+        scores = [job['score'] for job in jobs]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        for job in jobs:
+            self.assertTrue(job['matched_skills'])
+        
+        response = requests.get(f"{API_BASE_URL}/students/999999/recommended-jobs")
+        self.assertEqual(response.status_code, 404)
+        print(f"✓ GET recommended jobs successful - {len(jobs)} matches")
+    
+    def test_32_api_bulk_import(self):
+        """Test POST /api/admin/import/students with a duplicate email"""
+        stamp = int(time.time() * 1000)
+        csv_body = (
+            "name,email,password,university\n"
+            f"Bulk One,bulk1_{stamp}@test.ie,pass123,Test University\n"
+            f"Bulk Two,BULK1_{stamp}@test.ie,pass123,Test University\n"
+            "Bulk Three,,pass123,Test University\n"
+        )
+        response = requests.post(f"{API_BASE_URL}/admin/import/students", data=csv_body,
+                                 headers={'Content-Type': 'text/csv'})
+        self.assertEqual(response.status_code, 200)
+        
+        result = response.json()
+        self.assertEqual(result['inserted'], 1)
+        self.assertEqual([e['row'] for e in result['errors']], [2, 3])
+        
+        response = requests.post(f"{API_BASE_URL}/auth/login/student",
+                                 json={'email': f"bulk1_{stamp}@test.ie", 'password': 'pass123'})
+        self.assertEqual(response.status_code, 200)
+        
+        # A password that is not a string fails its own row, not the whole import
+        jsonl_body = json.dumps({'name': 'Bulk Four', 'email': f"bulk4_{stamp}@test.ie", 'password': 12345})
+        response = requests.post(f"{API_BASE_URL}/admin/import/students?format=jsonl", data=jsonl_body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['row'] for e in response.json()['errors']], [1])
+        print(f"✓ Bulk import successful - {result['inserted']} inserted, {result['failed']} rejected")
+    
+    def test_33_api_export_stream(self):
+        """Test streaming NDJSON export with an updated_since watermark"""
+        response = requests.get(f"{API_BASE_URL}/export/applications.ndjson", stream=True)
+        self.assertEqual(response.status_code, 200)
+        
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+        self.assertTrue(all('application_id' in row for row in rows))
+        watermark = response.headers.get('X-Export-Watermark')
+        
+        response = requests.get(f"{API_BASE_URL}/export/applications.csv", params={'updated_since': watermark})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.text.startswith('application_id,'))
+        
+        # A row added in the same second as the export is still in the next delta
+        job_id = requests.post(f"{API_BASE_URL}/jobs", json={'title': 'Export Test Job', 'company': 'Test Company',
+                                                             'employer_id': 1}).json()['job_id']
+        application_id = requests.post(f"{API_BASE_URL}/applications",
+                                       json={'job_id': job_id, 'student_id': 1}).json()['application_id']
+        response = requests.get(f"{API_BASE_URL}/export/applications.ndjson", params={'updated_since': watermark})
+        delta = [json.loads(line)['application_id'] for line in response.iter_lines() if line]
+        self.assertIn(application_id, delta)
+        
+        # So is an older (lower ID) reference answered in that second
+        tokens = [requests.post(f"{API_BASE_URL}/references", json={
+            'student_id': 1, 'referee_name': f'Export Referee {i}', 'referee_email': f'export{i}@test.ie',
+            'relationship': 'Lecturer', 'company': 'Test University'
+        }).json() for i in range(2)]
+        watermark = requests.get(f"{API_BASE_URL}/export/references.csv").headers.get('X-Export-Watermark')
+        requests.post(f"{API_BASE_URL}/references/respond/{tokens[0]['token']}",
+                      json={'reference_text': 'Reliable and punctual', 'rating': 5})
+        response = requests.get(f"{API_BASE_URL}/export/references.ndjson", params={'updated_since': watermark})
+        delta = [json.loads(line)['reference_id'] for line in response.iter_lines() if line]
+        self.assertIn(tokens[0]['reference_id'], delta)
+        print(f"✓ Streaming export successful - {len(rows)} applications")
+    
+    def test_34_api_response_cache(self):
+        """Test that job listings are cached and invalidated by new jobs"""
+        params = {'page_size': 3}
+        requests.get(f"{API_BASE_URL}/jobs", params=params)
+        response = requests.get(f"{API_BASE_URL}/jobs", params=params)
+        self.assertEqual(response.headers.get('X-Cache'), 'HIT')
+        
+        requests.post(f"{API_BASE_URL}/jobs", json={'title': 'Cache Test Job', 'company': 'Test Company',
+                                                  'skills': ['Testing'], 'employer_id': 1})
+        response = requests.get(f"{API_BASE_URL}/jobs", params=params)
+        self.assertEqual(response.headers.get('X-Cache'), 'MISS')
+        self.assertEqual(response.json()['jobs'][0]['title'], 'Cache Test Job')
+        
+        stats = requests.get(f"{API_BASE_URL}/admin/cache").json()['cache']
+        self.assertGreater(stats['hits'], 0)
+        print(f"✓ Response cache working - hit rate {stats['hit_rate']}")
+    
+    def test_35_api_conditional_get(self):
+        """Test ETag / 304 Not Modified on the jobs list"""
+        response = requests.get(f"{API_BASE_URL}/jobs")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers.get('ETag')
+        self.assertIsNotNone(etag)
+        self.assertIn('Last-Modified', response.headers)
+        
+        response = requests.get(f"{API_BASE_URL}/jobs", headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        print("✓ Conditional GET successful - 304 Not Modified")
+    
+    def test_36_api_password_rehash_on_login(self):
+        """Test that a legacy SHA-256 password hash is upgraded on login"""
+        email = 'michael.murphy@student.ie'
+        response = requests.post(f"{API_BASE_URL}/auth/login/student",
+                                 json={'email': email, 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT password_hash FROM Students WHERE email = ?", (email,))
+        stored = cursor.fetchone()[0]
+        conn.close()
+        self.assertTrue(stored.startswith('$'), "Password hash was not upgraded")
+        
+        response = requests.post(f"{API_BASE_URL}/auth/login/student",
+                                 json={'email': email, 'password': 'password123'})
+        self.assertEqual(response.status_code, 200)
+        print(f"✓ Password rehashed on login - {stored.split('$')[1]}")
+    
+    def test_37_api_login_throttling(self):
+        """Test that repeated failed logins for one email are throttled"""
+        email = f"throttle_{int(time.time() * 1000)}@test.ie"
+        requests.post(f"{API_BASE_URL}/auth/register/student",
+                      json={'name': 'Throttle Test', 'email': email, 'password': 'right-password'})
+        
+        codes = [requests.post(f"{API_BASE_URL}/auth/login/student",
+                               json={'email': email, 'password': 'wrong-password'}).status_code
+                 for _ in range(6)]
+        self.assertEqual(codes[0], 401)
+        self.assertEqual(codes[-1], 429)
+        
+        response = requests.post(f"{API_BASE_URL}/auth/login/student",
+                                 json={'email': email, 'password': 'right-password'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+        print(f"✓ Login throttling working - locked after {codes.index(429)} failures")
+    
+    def test_38_api_notification_dispatch(self):
+        """Test that a reference request queues a notification that is written in the background"""
+        before = requests.get(f"{API_BASE_URL}/admin/notifications/queue").json()['queue']
+        response = requests.post(f"{API_BASE_URL}/references", json={
+            'student_id': 1, 'referee_name': 'Queue Test', 'referee_email': 'queue.test@test.ie'
+        })
+        self.assertEqual(response.status_code, 201)
+        
+        time.sleep(1.5)
+        after = requests.get(f"{API_BASE_URL}/admin/notifications/queue").json()['queue']
+        self.assertGreater(after['enqueued'], before['enqueued'])
+        self.assertGreater(after['inserted'], before['inserted'])
+        self.assertEqual(after['queue_depth'], 0)
+        print(f"✓ Notification dispatched - {after['batches']} batches written")
+    
+    def test_39_api_notification_bulk_read(self):
+        """Test paging a user's notifications and marking them read in bulk"""
+        for i in range(3):
+            requests.post(f"{API_BASE_URL}/references", json={
+                'student_id': 2, 'referee_name': f'Bulk Read {i}', 'referee_email': f'bulk.read{i}@test.ie'
+            })
+        time.sleep(1.5)
+        
+        response = requests.get(f"{API_BASE_URL}/notifications/student/2", params={'page_size': 2, 'unread_only': 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertGreaterEqual(data['unread_count'], 3)
+        self.assertEqual(len(data['notifications']), 2)
+        self.assertIsNotNone(data['next_cursor'])
+        
+        ids = [n['id'] for n in data['notifications']]
+        data = requests.post(f"{API_BASE_URL}/notifications/student/2/read", json={'ids': ids}).json()
+        self.assertEqual(data['updated'], 2)
+        
+        data = requests.post(f"{API_BASE_URL}/notifications/student/2/read",
+                             json={'before': '2100-01-01T00:00:00'}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['unread_count'], 0)
+        print(f"✓ Notifications marked read in bulk - {len(ids) + data['updated']} updated")
+    
+    def test_40_api_reference_token_lifecycle(self):
+        """Test answering a reference request through its token"""
+        response = requests.post(f"{API_BASE_URL}/references", json={
+            'student_id': 3, 'referee_name': 'Token Test', 'referee_email': 'token.test@test.ie'
+        })
+        self.assertEqual(response.status_code, 201)
+        token = response.json()['token']
+        
+        data = requests.get(f"{API_BASE_URL}/references/respond/{token}").json()
+        self.assertEqual(data['reference']['status'], 'pending')
+        
+        response = requests.post(f"{API_BASE_URL}/references/respond/{token}",
+                                 json={'reference_text': 'Reliable and hard-working.', 'rating': 5})
+        self.assertEqual(response.status_code, 200)
+        response = requests.post(f"{API_BASE_URL}/references/respond/{token}",
+                                 json={'reference_text': 'Second answer', 'rating': 4})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(requests.get(f"{API_BASE_URL}/references/respond/not-a-token").status_code, 404)
+        
+        lifecycle = requests.post(f"{API_BASE_URL}/admin/references/sweep").json()['lifecycle']
+        self.assertGreaterEqual(lifecycle['sweeps'], 1)
+        print(f"✓ Reference answered by token - {lifecycle['expired_total']} requests expired so far")
+    
+    def test_41_api_reference_stats(self):
+        """Test that reference stats follow new requests and match StudentReferences"""
+        before = requests.get(f"{API_BASE_URL}/references/student/4/stats").json()['stats']
+        response = requests.post(f"{API_BASE_URL}/references", json={
+            'student_id': 4, 'referee_name': 'Stats Test', 'referee_email': 'stats.test@test.ie'
+        })
+        self.assertEqual(response.status_code, 201)
+        
+        after = requests.get(f"{API_BASE_URL}/references/student/4/stats").json()['stats']
+        self.assertEqual(after['total'], before['total'] + 1)
+        self.assertEqual(after['pending'], before['pending'] + 1)
+        
+        data = requests.get(f"{API_BASE_URL}/admin/references/stats", params={'verify': 1}).json()
+        self.assertEqual(data['mismatches'], [])
+        print(f"✓ Reference stats consistent - {data['stats']['total']} references in total")
+    
+    def test_42_api_analytics_snapshot(self):
+        """Test taking an analytics snapshot and grouping applications by status"""
+        response = requests.post(f"{API_BASE_URL}/admin/analytics/snapshot")
+        self.assertEqual(response.status_code, 201)
+        rows = response.json()['snapshot']['tables']['applications']['rows']
+        
+        data = requests.get(f"{API_BASE_URL}/admin/analytics/applications", params={'group_by': 'status'}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(sum(item['value'] for item in data['results']), rows)
+        
+        response = requests.get(f"{API_BASE_URL}/admin/analytics/applications", params={'group_by': 'missing'})
+        self.assertEqual(response.status_code, 400)
+        
+        # Text columns can be counted but not averaged
+        params = {'group_by': 'major', 'value': 'university', 'agg': 'avg'}
+        self.assertEqual(requests.get(f"{API_BASE_URL}/admin/analytics/students", params=params).status_code, 400)
+        params['value'] = 'gpa'
+        self.assertEqual(requests.get(f"{API_BASE_URL}/admin/analytics/students", params=params).status_code, 200)
+        print(f"✓ Analytics snapshot queried - {rows} applications in {data['query_ms']} ms")
+    
+    def test_43_api_trend_reports(self):
+        """Test that repeated trend reports reuse closed buckets"""
+        first = requests.get(f"{API_BASE_URL}/admin/trends/applications", params={'bucket': 'week'}).json()
+        self.assertTrue(first['success'])
+        self.assertGreater(sum(row['applications'] for row in first['rows']), 0)
+        
+        second = requests.get(f"{API_BASE_URL}/admin/trends/applications", params={'bucket': 'week'}).json()
+        self.assertEqual(second['rows'], first['rows'])
+        self.assertIsNotNone(second['run']['read_from'])
+        
+        response = requests.get(f"{API_BASE_URL}/admin/trends/conversion", params={'bucket': 'month'})
+        self.assertEqual(response.status_code, 400)
+        print(f"✓ Trend report reused {second['run']['buckets_reused']} closed buckets")
+    
+    def test_44_api_job_search(self):
+        """Test that a new job is found by full-text search, including by a word prefix"""
+        tag = f"quokka{int(time.time())}"
+        response = requests.post(f"{API_BASE_URL}/jobs", json={
+            'title': f'{tag.title()} Wrangler', 'company': 'Search Test Ltd', 'type': 'Part-time',
+            'description': 'Looking after the office quokkas', 'skills': ['Patience', 'Python']
+        })
+        self.assertEqual(response.status_code, 201)
+        job_id = response.json()['job_id']
+        
+        data = requests.get(f"{API_BASE_URL}/jobs/search", params={'q': f'{tag} wrangler'}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['jobs'][0]['id'], job_id)
+        
+        typed = requests.get(f"{API_BASE_URL}/jobs/search", params={'q': f'wrangler {tag[:-3]}'}).json()
+        self.assertEqual(typed['jobs'][0]['id'], job_id)
+        exact = requests.get(f"{API_BASE_URL}/jobs/search", params={'q': tag[:-3], 'prefix': 0}).json()
+        self.assertEqual(exact['total_matches'], 0)
+        
+        response = requests.get(f"{API_BASE_URL}/jobs/search", params={'q': ' '})
+        self.assertEqual(response.status_code, 400)
+        print(f"✓ Job search found the new job in {data['took_ms']} ms")
+    
+    def test_45_api_autocomplete(self):
+        """Test university suggestions and that registration reuses the existing spelling"""
+        data = requests.get(f"{API_BASE_URL}/autocomplete/university", params={'q': 'dub'}).json()
+        self.assertTrue(data['success'])
+        self.assertIn('Trinity College Dublin', [s['value'] for s in data['suggestions']])
+        before = next(s['count'] for s in data['suggestions'] if s['value'] == 'Trinity College Dublin')
+        
+        response = requests.post(f"{API_BASE_URL}/auth/register/student", json={
+            'name': 'Autocomplete Test', 'email': f"autocomplete_{int(time.time())}@test.ie",
+            'password': 'testpass123', 'university': '  trinity college   DUBLIN '
+        })
+        self.assertEqual(response.status_code, 201)
+        
+        data = requests.get(f"{API_BASE_URL}/autocomplete/university", params={'q': 'trin'}).json()
+        self.assertEqual(data['suggestions'][0], {'value': 'Trinity College Dublin', 'count': before + 1})
+        self.assertEqual(requests.get(f"{API_BASE_URL}/autocomplete/hobby").status_code, 404)
+        print(f"✓ Autocomplete suggested {data['suggestions'][0]['value']}")
+    
+    def test_46_api_serialized_rows(self):
+        """Test the field types produced by the compiled row serializers"""
+        users = requests.get(f"{API_BASE_URL}/admin/users").json()['users']
+        student = next(u for u in users if u['type'] == 'student' and u['gpa'])
+        self.assertIsInstance(student['id'], int)
+        self.assertIsInstance(student['gpa'], float)
+        datetime.fromisoformat(student['created_at'])
+        
+        references = requests.get(f"{API_BASE_URL}/references").json()['references']
+        self.assertTrue(all(isinstance(r['student_id'], int) for r in references))
+        self.assertTrue(all(r['rating'] is None or isinstance(r['rating'], int) for r in references))
+        print(f"✓ {len(users)} users and {len(references)} references serialized")
+    
+    def test_47_api_users_pagination(self):
+        """Test /api/admin/users pages, type and search filters and count-only mode"""
+        counts = requests.get(f"{API_BASE_URL}/admin/users", params={'count_only': '1'}).json()
+        self.assertEqual(counts['total'], counts['counts']['student'] + counts['counts']['employer'])
+        
+        # Walking every page sees each user once: all students, then all employers
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            data = requests.get(f"{API_BASE_URL}/admin/users", params=params).json()
+            self.assertLessEqual(len(data['users']), 3)
+            seen.extend((u['type'], u['id']) for u in data['users'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), counts['total'])
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(seen, sorted(seen, key=lambda u: (u[0] != 'student', u[1])))
+        
+        employers = requests.get(f"{API_BASE_URL}/admin/users", params={'type': 'employer', 'page_size': 100}).json()
+        self.assertTrue(all(u['type'] == 'employer' for u in employers['users']))
+        self.assertEqual(len(employers['users']), counts['counts']['employer'])
+        
+        name = employers['users'][0]['name']
+        found = requests.get(f"{API_BASE_URL}/admin/users", params={'search': name}).json()['users']
+        self.assertIn(employers['users'][0]['id'], [u['id'] for u in found if u['type'] == 'employer'])
+        searched = requests.get(f"{API_BASE_URL}/admin/users", params={'search': name, 'count_only': '1'}).json()
+        self.assertEqual(searched['total'], len(found))
+        
+        self.assertEqual(requests.get(f"{API_BASE_URL}/admin/users", params={'type': 'admin'}).status_code, 400)
+        self.assertEqual(requests.get(f"{API_BASE_URL}/admin/users", params={'cursor': 'bogus'}).status_code, 400)
+        print(f"✓ Walked {len(seen)} users in pages of 3")
+    
+    def test_48_api_student_dashboard(self):
+        """Test the combined dashboard sections and skipping unchanged ones by version"""
+        url = f"{API_BASE_URL}/students/1/dashboard"
+        sections = requests.get(url).json()['sections']
+        self.assertEqual(set(sections), {'jobs', 'applications', 'references'})
+        standalone = requests.get(f"{API_BASE_URL}/applications/student/1")
+        self.assertEqual(sections['applications']['data'], standalone.json())
+        self.assertEqual(f'"{sections["applications"]["version"]}"', standalone.headers['ETag'])
+        self.assertEqual(f'"{sections["jobs"]["version"]}"', requests.get(f"{API_BASE_URL}/jobs").headers['ETag'])
+        
+        versions = {name: section['version'] for name, section in sections.items()}
+        unchanged = requests.get(url, params=versions).json()['sections']
+        self.assertTrue(all(section.get('unchanged') for section in unchanged.values()))
+        
+        applied = {a['job_id'] for a in sections['applications']['data']['applications']}
+        job = next(j for j in sections['jobs']['data']['jobs'] if j['id'] not in applied)
+        requests.post(f"{API_BASE_URL}/applications", json={
+            "job_id": job['id'], "student_id": 1, "job_title": job['title'], "company": job['company']
+        })
+        changed = requests.get(url, params=versions).json()['sections']
+        self.assertNotEqual(changed['applications']['version'], versions['applications'])
+        self.assertIn(job['id'], [a['job_id'] for a in changed['applications']['data']['applications']])
+        self.assertTrue(changed['jobs']['unchanged'] and changed['references']['unchanged'])
+        print(f"✓ Only the applications section changed after applying to job {job['id']}")
+    
+    def test_49_api_jobs_skill_filter(self):
+        """Test that ?skill= on GET /api/jobs matches whole skills only"""
+        job_id = requests.post(f"{API_BASE_URL}/jobs", json={
+            'title': 'Frontend Intern', 'company': 'Skill Filter Ltd', 'location': 'Dublin',
+            'skills': ['JavaScript', 'CSS'], 'employer_id': 1
+        }).json()['job_id']
+        
+        def ids(skill):
+            return {j['id'] for j in requests.get(f"{API_BASE_URL}/jobs",
+                                                  params={'skill': skill, 'page_size': 100}).json()['jobs']}
+        self.assertIn(job_id, ids('JavaScript'))
+        self.assertIn(job_id, ids('css'))
+        self.assertNotIn(job_id, ids('Java'))
+        print("✓ Skill filter matches whole skills")
+    
+    def test_50_api_unknown_email_registered_later(self):
+        """Test that a cached unknown email in another case is forgotten once the account is registered"""
+        stamp = int(time.time() * 1000)
+        email = f"case_{stamp}@test.ie"
+        login = {'email': email.upper(), 'password': 'case-password'}
+        self.assertEqual(requests.post(f"{API_BASE_URL}/auth/login/student", json=login).status_code, 401)
+        requests.post(f"{API_BASE_URL}/auth/register/student",
+                      json={'name': 'Case Test', 'email': email, 'password': 'case-password'})
+        self.assertEqual(requests.post(f"{API_BASE_URL}/auth/login/student", json=login).status_code, 200)
+        print("✓ Registration clears the cached unknown email in any case")
 
 class TestAuthentication(unittest.TestCase):
     """Test authentication and registration"""